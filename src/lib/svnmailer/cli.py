@@ -54,6 +54,18 @@ and processes these further using the optparse module::
     svn-mailer unlock <rep> <author> [<conf>]
  -> svn-mailer --unlock --repository <rep> --author <author>
               [--config <conf>]
+
+The ``build-map`` subcommand builds a ``dbm:`` mapping index from a text
+file (see `svnmailer.settings.mappers.DBMMapper`)::
+
+    svn-mailer build-map <textfile> <indexfile>
+ -> svn-mailer --build-map --map-source <textfile> --map-index <indexfile>
+
+The ``--check-config`` option loads and validates the complete
+configuration (including all group sections) and exits without sending
+any notification::
+
+    svn-mailer --check-config --config <config>
 """
 __author__    = "André Malo"
 __docformat__ = "restructuredtext en"
@@ -232,8 +244,10 @@ class OptionHelper(object):
         the time.
 
         :Groups:
-         - `Titles`: `_COMMON_TITLE`, `_BEHAVIOR_TITLE`, `_SUPPLEMENTAL_TITLE`
-         - `Constraints`: `_PATH_OPTIONS`, `_REQUIRED_OPTIONS`
+         - `Titles`: `_COMMON_TITLE`, `_BEHAVIOR_TITLE`, `_SUPPLEMENTAL_TITLE`,
+           `_MAINTENANCE_TITLE`
+         - `Constraints`: `_PATH_OPTIONS`, `_REQUIRED_OPTIONS`,
+           `_BUILD_MAP_OPTIONS`
          - `Mapping Tables`: `_OLD_OPTIONS`, `_OLD_OPTIONS_1_2`
 
         :CVariables:
@@ -243,6 +257,8 @@ class OptionHelper(object):
 
          - `_SUPPLEMENTAL_TITLE`: Title of the supplemental option group
 
+         - `_MAINTENANCE_TITLE`: Title of the maintenance option group
+
          - `_PATH_OPTIONS`: List of option attributes that need to be
            treated as localized paths. Every entry is a tuple consisting of
            the option attribute name the option name for the error message.
@@ -254,6 +270,11 @@ class OptionHelper(object):
            for all modes) and an error text hint.
            (``(('name', (mode, ...), 'text'), ...)``)
 
+         - `_BUILD_MAP_OPTIONS`: List of option attributes that are required
+           for ``--build-map`` (instead of `_REQUIRED_OPTIONS`). Every entry
+           is a tuple consisting of the option attribute name and an error
+           text hint. (``(('name', 'text'), ...)``)
+
          - `_OLD_OPTIONS`: Mapping table for old style command lines (< svn
            1.2)
 
@@ -272,8 +293,10 @@ class OptionHelper(object):
          - `_COMMON_TITLE`: ``str``
          - `_BEHAVIOR_TITLE`: ``str``
          - `_SUPPLEMENTAL_TITLE`: ``str``
+         - `_MAINTENANCE_TITLE`: ``str``
          - `_PATH_OPTIONS`: ``tuple``
          - `_REQUIRED_OPTIONS`: ``tuple``
+         - `_BUILD_MAP_OPTIONS`: ``tuple``
          - `_OLD_OPTIONS`: ``dict``
          - `_OLD_OPTIONS_1_2`: ``dict``
          - `_WIN32_BG_ARG`: ``str``
@@ -287,6 +310,7 @@ class OptionHelper(object):
     _COMMON_TITLE = "COMMON PARAMETERS"
     _BEHAVIOR_TITLE = "BEHAVIOR OPTIONS"
     _SUPPLEMENTAL_TITLE = "SUPPLEMENTAL PARAMETERS"
+    _MAINTENANCE_TITLE = "MAINTENANCE OPTIONS"
 
     _PATH_OPTIONS = (('repository', '--repository'), ('config', '--config'))
     m = settings.MODES
@@ -297,6 +321,10 @@ class OptionHelper(object):
         ('propname', (m.propchange,), 'property name parameter'),
     )
     del m
+    _BUILD_MAP_OPTIONS = (
+        ('map_source', 'mapping source file'),
+        ('map_index', 'mapping index file'),
+    )
 
     _OLD_OPTIONS = {
         # svn-mailer commit <rep> <rev> [<cnf>]
@@ -305,6 +333,9 @@ class OptionHelper(object):
         # svn-mailer propchange <rep> <rev> <author> <prop> [<cnf>]
         "propchange": ("--propchange", "--repository", "--revision",
             "--author", "--propname", "--config"),
+
+        # svn-mailer build-map <textfile> <indexfile>
+        "build-map": ("--build-map", "--map-source", "--map-index"),
     }
     _OLD_OPTIONS_1_2 = {
         # svn-mailer propchange2 <rep> <rev> <author> <prop> <act> [<cnf>]
@@ -369,7 +400,14 @@ class OptionHelper(object):
             options.action = None
 
         self._ensureRequired(options)
+        if options.build_map:
+            # nothing to notify, just do it in the foreground
+            return options
+
         self._delocalize(options)
+        if options.check_config:
+            # report the result in the foreground
+            return options
 
         return self._handleBackground(options)
 
@@ -397,6 +435,7 @@ class OptionHelper(object):
             "%(prog)s commit <repos> <revision> [<config>]",
             "%(prog)s propchange <repos> <revision> <author> <propname> "
                      "[<config>]",
+            "%(prog)s build-map <textfile> <indexfile>",
         ]
         if subversion.version.min_1_2:
             clines.extend([
@@ -507,7 +546,21 @@ class OptionHelper(object):
 
             :exception CommandlineError: At least one option is missing
         """
-        for attrname, modes, errtext in self._REQUIRED_OPTIONS:
+        required = self._REQUIRED_OPTIONS
+        if options.build_map:
+            required = [
+                (attrname, None, errtext)
+                for attrname, errtext in self._BUILD_MAP_OPTIONS
+            ]
+        elif options.check_config:
+            # the repository is only needed to find the config file
+            if not (options.config or options.repository):
+                raise CommandlineError(
+                    "Missing config file or repository path"
+                )
+            required = ()
+
+        for attrname, modes, errtext in required:
             if not getattr(options, attrname):
                 if modes is None or options.mode in modes:
                     raise CommandlineError("Missing %s" % errtext)
@@ -518,6 +571,7 @@ class OptionHelper(object):
         self._addCommonOptions()
         self._addBehaviorOptions()
         self._addSupplementalOptions()
+        self._addMaintenanceOptions()
 
 
     def _addCommonOptions(self):
@@ -612,6 +666,37 @@ class OptionHelper(object):
             )
 
 
+    def _addMaintenanceOptions(self):
+        """ Adds the maintenance options group """
+        group = self._parser.add_option_group(self._MAINTENANCE_TITLE)
+
+        group.add_option('--build-map',
+            action = 'store_true',
+            default = False,
+            help = 'Builds a dbm mapping index (to be used as '
+                '"dbm:<indexfile>" in the [maps] section) from a text '
+                'file with "key = value" lines and exits. The other '
+                'options are ignored then.',
+        )
+        group.add_option('--check-config',
+            action = 'store_true',
+            default = False,
+            help = 'Loads the configuration, checks all option values '
+                'and exits. Usually group options are only checked if '
+                'the group is actually notified. Either the config file '
+                'or the repository path (to find the default config file) '
+                'has to be supplied.',
+        )
+        group.add_option('--map-source',
+            metavar = 'TEXTFILE',
+            help = 'The text file to build the mapping index from',
+        )
+        group.add_option('--map-index',
+            metavar = 'INDEXFILE',
+            help = 'The mapping index file to build',
+        )
+
+
     def _transformArgs(self, args):
         """ Parses the command line according to old style rules
 
@@ -19,11 +19,23 @@ Differ classes
 """
 __author__    = "André Malo"
 __docformat__ = "restructuredtext en"
-__all__       = ["InternalDiffer", "ExternalDiffer"]
+__all__       = [
+    "InternalDiffer", "PooledDiffer", "ExternalDiffer",
+    "PooledExternalDiffer", "DiffStat"
+]
+
+# global imports
+import difflib
 
 
 class InternalDiffer(object):
-    """ Differ without an external program call (uses difflib) """
+    """ Differ without an external program call (uses difflib)
+
+        File diffs don't split the files into line lists. Only the line
+        offsets and hashes are kept in memory and the lines are sliced from
+        memory mapped files when they're written (see `_IndexedDiff`). The
+        output is the same as with line lists.
+    """
 
     def __init__(self, tags = False):
         """ Initialization
@@ -34,30 +46,23 @@ class InternalDiffer(object):
         self._want_tags = tags
 
 
-    def _tags(self, list1, list2):
+    def _tags(self, opcodes):
         """ Returns diff tags
 
-            :Parameters:
-             - `list1`: The first sequence
-             - `list2`: The second sequence
-
-            :Types:
-             - `list1`: ``list``
-             - `list2`: ``list``
+            :param opcodes: The diff opcodes (like
+                            ``difflib.SequenceMatcher.get_opcodes()``)
+            :type opcodes: ``list``
 
             :return: iterable of tags (``(code, a1, a2, b1, b2), ...``)
             :rtype: generator
         """
-        import difflib
-
         codes = {
             'equal':   'E',
             'insert':  'A',
             'delete':  'D',
             'replace': 'M',
         }
-        matcher = difflib.SequenceMatcher(a = list1, b = list2)
-        for tag, a1, a2, b1, b2 in matcher.get_opcodes():
+        for tag, a1, a2, b1, b2 in opcodes:
             yield (codes.get(tag, 'U'), a1, a2, b1, b2)
 
 
@@ -94,13 +99,50 @@ class InternalDiffer(object):
             list1 = list2 = [""]
 
         if self._want_tags:
-            return self._tags(list1, list2)
+            return self._tags(
+                difflib.SequenceMatcher(a = list1, b = list2).get_opcodes()
+            )
 
         return difflib.unified_diff(
             list1, list2, label1, label2 or label1, date1, date2,
         )
 
 
+    def getContentDiff(self, content1, content2, label1, label2 = None,
+                       date1 = "", date2 = ""):
+        """ creates a diff of two file contents held in memory
+
+            Unlike `getStringDiff` the contents are split into lines and
+            compared exactly like `getFileDiff` does it.
+
+            :Parameters:
+             - `content1`: First content
+             - `content2`: Second content
+             - `label1`: Label for first data
+             - `label2`: Label for second data
+             - `date1`: Date description for first data
+             - `date2`: Date description for second data
+
+            :Types:
+             - `content1`: ``str``
+             - `content2`: ``str``
+             - `label1`: ``str``
+             - `label2`: ``str``
+             - `date1`: ``str``
+             - `date2`: ``str``
+
+            :return: unified diff lines (maybe a generator)
+            :rtype: iterable
+        """
+        diff = _IndexedDiff(
+            _StringBuffer(content1 or ""), _StringBuffer(content2 or "")
+        )
+        if self._want_tags:
+            return self._tags(diff.getOpcodes())
+
+        return diff.getUnifiedDiff(label1, label2 or label1, date1, date2)
+
+
     def getFileDiff(self, name1, name2, label1, label2 = None,
                     date1 = "", date2 = ""):
         """ creates a diff of two line based files
@@ -124,177 +166,2076 @@ class InternalDiffer(object):
             :return: unified diff lines (maybe a generator)
             :rtype: iterable
         """
-        import difflib
-
-        list1 = file(name1, "rb").readlines()
-        list2 = file(name2, "rb").readlines()
-        if not (list1 or list2):
-            list1 = list2 = [""]
+        buffer1 = _FileBuffer(name1)
+        try:
+            buffer2 = _FileBuffer(name2)
+        except:
+            buffer1.close()
+            raise
 
+        diff = _IndexedDiff(buffer1, buffer2)
         if self._want_tags:
-            return self._tags(list1, list2)
+            try:
+                return self._tags(diff.getOpcodes())
+            finally:
+                diff.close()
 
-        return difflib.unified_diff(
-            list1, list2, label1, label2 or label1, date1, date2,
-        )
+        return diff.getUnifiedDiff(label1, label2 or label1, date1, date2)
 
 
-class ExternalDiffer(object):
-    """ Differ which calls an external program (e.g. diff)
+class _IndexedDiff(object):
+    """ Line diff of two buffers (strings or files)
+
+        The buffers are read sequentially once, while their lines are
+        indexed by their offsets and hashed. The hash sequences are compared
+        by `_HashMatcher`, which finds the same matches as
+        ``difflib.SequenceMatcher`` does for the lines. The found matches
+        are verified against the bytes afterwards (if a hash collision
+        crept in, the lines themselves are compared instead). Lines are
+        sliced from the buffers only when they're written out.
+
+        :CVariables:
+         - `CONTEXT`: The number of context lines
 
         :IVariables:
-         - `_diff_command`: The diff command line
-         - `_tempdir`: The tempdir to use for string diffs
+         - `_buffer1`: The first buffer
+         - `_buffer2`: The second buffer
+         - `_opcodes`: The opcodes (or ``None`` if not computed yet)
+         - `_index1`: The line index of the first buffer
+         - `_index2`: The line index of the second buffer
 
         :Types:
-         - `_diff_command`: ``list``
-         - `_tempdir`: ``str``
+         - `CONTEXT`: ``int``
+         - `_buffer1`: `_StringBuffer` or `_FileBuffer`
+         - `_buffer2`: `_StringBuffer` or `_FileBuffer`
+         - `_opcodes`: ``list``
+         - `_index1`: `_LineIndex`
+         - `_index2`: `_LineIndex`
     """
+    CONTEXT = 3
 
-    def __init__(self, diff_command, tempdir = None):
+    def __init__(self, buffer1, buffer2):
         """ Initialization
 
             :Parameters:
-             - `diff_command`: The diff command to call
-             - `tempdir`: The tempdir to use for string diffs
+             - `buffer1`: The first buffer
+             - `buffer2`: The second buffer
 
             :Types:
-             - `diff_command`: ``list``
-             - `tempdir`: ``str``
+             - `buffer1`: `_StringBuffer` or `_FileBuffer`
+             - `buffer2`: `_StringBuffer` or `_FileBuffer`
         """
-        self._diff_command = diff_command
-        self._tempdir = tempdir
+        self._buffer1, self._buffer2 = buffer1, buffer2
+        self._opcodes = self._index1 = self._index2 = None
 
 
-    def getStringDiff(self, string1, string2, label1, label2 = None,
-                      date1 = "", date2 = ""):
-        """ creates a diff of two line based strings
+    def close(self):
+        """ Releases the buffers """
+        buffers = (self._buffer1, self._buffer2)
+        self._buffer1 = self._buffer2 = self._index1 = self._index2 = None
+        for buf in buffers:
+            if buf is not None:
+                buf.close()
 
-            If a string is ``None``, it's treated empty
+
+    def getUnifiedDiff(self, label1, label2, date1, date2):
+        """ Returns the unified diff (like ``difflib.unified_diff``)
+
+            The buffers are released after the last line.
 
             :Parameters:
-             - `string1`: First string
-             - `string2`: Second string
              - `label1`: Label for first data
              - `label2`: Label for second data
              - `date1`: Date description for first data
              - `date2`: Date description for second data
 
             :Types:
-             - `string1`: ``str``
-             - `string2`: ``str``
              - `label1`: ``str``
              - `label2`: ``str``
              - `date1`: ``str``
              - `date2`: ``str``
 
-            :return: unified diff lines (maybe a generator)
-            :rtype: iterable
+            :return: unified diff lines
+            :rtype: generator
         """
-        from svnmailer import util
+        try:
+            matcher = difflib.SequenceMatcher(None, [], [])
+            matcher.opcodes = self.getOpcodes()
+            getline1, getline2 = self._index1.getLine, self._index2.getLine
 
-        string1 = string1 or ""
-        string2 = string2 or ""
+            started = False
+            for group in matcher.get_grouped_opcodes(self.CONTEXT):
+                if not started:
+                    started = True
+                    # let difflib format the header lines
+                    for line in difflib.unified_diff(
+                            ["\n"], [], label1, label2, date1, date2):
+                        if line.startswith("@@"):
+                            break
+                        yield line
 
-        file1 = util.TempFile(self._tempdir)
-        file1.fp.write(string1)
-        file1.close()
+                first, last = group[0], group[-1]
+                yield "@@ -%s +%s @@\n" % (
+                    _formatRange(first[1], last[2] - first[1]),
+                    _formatRange(first[3], last[4] - first[3]),
+                )
+                for tag, a1, a2, b1, b2 in group:
+                    if tag == 'equal':
+                        for lineno in xrange(a1, a2):
+                            yield " " + getline1(lineno)
+                        continue
+                    for lineno in xrange(a1, a2):
+                        yield "-" + getline1(lineno)
+                    for lineno in xrange(b1, b2):
+                        yield "+" + getline2(lineno)
+        finally:
+            self.close()
 
-        file2 = util.TempFile(self._tempdir)
-        file2.fp.write(string2)
-        file2.close()
 
-        pipe = self._getPipe(
-            file1.name, file2.name, label1, label2, date1, date2
-        )
+    def getOpcodes(self):
+        """ Returns the diff opcodes
 
-        # yield line by line
-        line = pipe.fromchild.readline()
-        while line:
-            yield line
-            line = pipe.fromchild.readline()
+            :return: The opcodes (like
+                     ``difflib.SequenceMatcher.get_opcodes()``)
+            :rtype: ``list``
+        """
+        if self._opcodes is None:
+            self._opcodes = self._compare()
 
-        pipe.fromchild.close()
-        pipe.wait()
+        return self._opcodes
 
 
-    def getFileDiff(self, name1, name2, label1, label2 = None,
-                    date1 = "", date2 = ""):
-        """ creates a diff of two line based files
+    def _compare(self):
+        """ Indexes and compares the buffers
+
+            :return: The opcodes
+            :rtype: ``list``
+        """
+        index1 = self._index1 = _LineIndex(self._buffer1)
+        index2 = self._index2 = _LineIndex(self._buffer2)
+        if not (index1.count or index2.count):
+            # like difflib with two empty line lists ([""] vs. [""])
+            return [('equal', 0, 1, 0, 1)]
+
+        matcher = _HashMatcher(index1.hashes, index2.hashes)
+        opcodes = matcher.get_opcodes()
+        if not self._verify(opcodes, matcher.getPopular()):
+            lines1 = [index1.getLine(lineno) for lineno in xrange(index1.count)]
+            lines2 = [index2.getLine(lineno) for lineno in xrange(index2.count)]
+            opcodes = difflib.SequenceMatcher(None, lines1, lines2).get_opcodes()
+        index1.hashes = index2.hashes = None
+
+        return opcodes
+
+
+    def _verify(self, opcodes, popular):
+        """ Verifies the matches found by comparing the hashes
+
+            The equal blocks have to be equal bytewise and the lines
+            treated as popular by the matcher have to be equal to each
+            other. Other hash collisions don't influence the result.
 
             :Parameters:
-             - `name1`: First file name
-             - `name2`: Second file name
-             - `label1`: Label for first data
-             - `label2`: Label for second data
-             - `date1`: Date description for first data
-             - `date2`: Date description for second data
+             - `opcodes`: The opcodes
+             - `popular`: The popular lines of the second buffer (lists of
+               line numbers)
 
             :Types:
-             - `name1`: ``str``
-             - `name2`: ``str``
-             - `label1`: ``str``
-             - `label2`: ``str``
-             - `date1`: ``str``
-             - `date2`: ``str``
+             - `opcodes`: ``list``
+             - `popular`: ``list``
 
-            :return: unified diff lines (maybe a generator)
-            :rtype: iterable
+            :return: Are the matches correct?
+            :rtype: ``bool``
         """
-        pipe = self._getPipe(name1, name2, label1, label2, date1, date2)
+        read1, read2 = self._buffer1.read, self._buffer2.read
+        range1, range2 = self._index1.getRange, self._index2.getRange
+        chunksize = _LineIndex.CHUNKSIZE
 
-        # yield line by line
-        line = pipe.fromchild.readline()
-        while line:
-            yield line
-            line = pipe.fromchild.readline()
+        for tag, a1, a2, b1, b2 in opcodes:
+            if tag != 'equal':
+                continue
+            start1, end1 = range1(a1, a2)
+            start2, end2 = range2(b1, b2)
+            if end1 - start1 != end2 - start2:
+                return False
+            for pos in xrange(0, end1 - start1, chunksize):
+                length = min(chunksize, end1 - start1 - pos)
+                if read1(start1 + pos, length) != read2(start2 + pos, length):
+                    return False
 
-        pipe.fromchild.close()
-        pipe.wait()
+        for linenos in popular:
+            start, end = range2(linenos[0], linenos[0] + 1)
+            line = read2(start, end - start)
+            for lineno in linenos[1:]:
+                start, end = range2(lineno, lineno + 1)
+                if read2(start, end - start) != line:
+                    return False
 
+        return True
 
-    def _getPipe(self, name1, name2, label1, label2, date1, date2):
-        """ Returns a pipe from the diff program
+
+class _HashMatcher(difflib.SequenceMatcher):
+    """ ``difflib.SequenceMatcher`` for sequences of hashes
+
+        The matching blocks are exactly the ones ``difflib`` finds (without
+        junk, but including the handling of popular elements). Instead of a
+        dict of position lists the positions of equal elements of ``b`` are
+        chained in an array and the elements of ``a`` just point to their
+        first position in ``b``, so the memory needed doesn't depend on the
+        number of distinct elements.
+
+        :IVariables:
+         - `_first`: The first position in ``b`` of every element of ``a``
+           (``-1`` if there's none or the element is popular)
+         - `_next`: The next position in ``b`` of every element of ``b``
+           (``-1`` if there's none)
+         - `_popular`: The positions of the popular elements in ``b``
+           (``[[pos, ...], ...]``)
+
+        :Types:
+         - `_first`: ``array.array``
+         - `_next`: ``array.array``
+         - `_popular`: ``list``
+    """
+    _first = _next = _popular = None
+
+    def __init__(self, a, b):
+        """ Initialization
 
             :Parameters:
-             - `name1`: First file name
-             - `name2`: Second file name
-             - `label1`: Label for first data
-             - `label2`: Label for second data
-             - `date1`: Date description for first data
-             - `date2`: Date description for second data
+             - `a`: The first sequence
+             - `b`: The second sequence
 
             :Types:
-             - `name1`: ``str``
-             - `name2`: ``str``
-             - `label1`: ``str``
-             - `label2`: ``str``
-             - `date1`: ``str``
-             - `date2`: ``str``
+             - `a`: ``array.array``
+             - `b`: ``array.array``
+        """
+        difflib.SequenceMatcher.__init__(self, None, a, b)
 
-            :return: The Process object
-            :rtype: `svnmailer.processes.Process`
+
+    def set_seq1(self, a):
+        """ Sets the first sequence """
+        difflib.SequenceMatcher.set_seq1(self, a)
+        self._first = None
+
+
+    def set_seq2(self, b):
+        """ Sets the second sequence (doesn't build ``difflib``'s index) """
+        self.b = b
+        self.matching_blocks = self.opcodes = None
+        self.fullbcount = None
+        self._first = self._next = self._popular = None
+
+
+    def getPopular(self):
+        """ Returns the positions of the popular elements in ``b``
+
+            :return: The positions per element (``[[pos, ...], ...]``)
+            :rtype: ``list``
         """
-        from svnmailer import processes
+        self._chain()
+        return self._popular
 
-        params = {
-            "label_from": "%s %s" % (label1, date1 or ""),
-            "label_to"  : "%s %s" % (label2 or label1, date2 or ""),
-            "from"      : name1,
-            "to"        : name2,
-        }
 
-        # check for sanity
-        for key, value in params.items():
-            if isinstance(value, unicode):
-                params[key] = value.encode("utf-8")
+    def find_longest_match(self, alo, ahi, blo, bhi):
+        """ Finds the longest matching block (see ``difflib``) """
+        self._chain()
+        a, b, first, nextpos = self.a, self.b, self._first, self._next
+        besti, bestj, bestsize = alo, blo, 0
+        j2len = {}
+        for i in xrange(alo, ahi):
+            j2lenget = j2len.get
+            newj2len = {}
+            j = first[i]
+            while j >= 0:
+                if j >= blo:
+                    if j >= bhi:
+                        break
+                    k = newj2len[j] = j2lenget(j - 1, 0) + 1
+                    if k > bestsize:
+                        besti, bestj, bestsize = i - k + 1, j - k + 1, k
+                j = nextpos[j]
+            j2len = newj2len
 
-        cmd = list(self._diff_command)
-        cmd[1:] = [(isinstance(arg, unicode) and
-            [arg.encode("utf-8")] or [arg])[0] % params for arg in cmd[1:]
-        ]
+        while besti > alo and bestj > blo and a[besti - 1] == b[bestj - 1]:
+            besti, bestj, bestsize = besti - 1, bestj - 1, bestsize + 1
+        while besti + bestsize < ahi and bestj + bestsize < bhi and \
+                a[besti + bestsize] == b[bestj + bestsize]:
+            bestsize += 1
 
-        pipe = processes.Process.pipe4(cmd)
-        pipe.tochild.close()
+        return (besti, bestj, bestsize)
 
-        return pipe
+
+    def _chain(self):
+        """ Chains the positions of equal elements (if not done yet) """
+        import array
+
+        if self._first is not None:
+            return
+
+        a, b = self.a, self.b
+        lena, lenb = len(a), len(b)
+        typecode = _getIntType(lenb)
+
+        # open addressing table: slot -> last chained position in b
+        size = 2
+        while size < 2 * lenb:
+            size *= 2
+        mask = size - 1
+        slots = array.array(typecode, [-1]) * size
+        nextpos = array.array(typecode, [-1]) * lenb
+        for j in xrange(lenb - 1, -1, -1):
+            elt = b[j]
+            slot = elt & mask
+            pos = slots[slot]
+            while pos >= 0 and b[pos] != elt:
+                slot = (slot + 1) & mask
+                pos = slots[slot]
+            nextpos[j] = pos
+            slots[slot] = j
+
+        # popular elements are not chained (see difflib)
+        popular, unchain = [], {}
+        if lenb >= 200:
+            ntest = lenb // 100 + 1
+            for slot in xrange(size):
+                pos = slots[slot]
+                if pos < 0:
+                    continue
+                positions = []
+                while pos >= 0 and len(positions) <= ntest:
+                    positions.append(pos)
+                    pos = nextpos[pos]
+                if len(positions) > ntest:
+                    while pos >= 0:
+                        positions.append(pos)
+                        pos = nextpos[pos]
+                    popular.append(positions)
+                    unchain[b[positions[0]]] = None
+
+        first = array.array(typecode, [-1]) * lena
+        for i in xrange(lena):
+            elt = a[i]
+            if elt in unchain:
+                continue
+            slot = elt & mask
+            pos = slots[slot]
+            while pos >= 0 and b[pos] != elt:
+                slot = (slot + 1) & mask
+                pos = slots[slot]
+            first[i] = pos
+
+        self._first, self._next, self._popular = first, nextpos, popular
+
+
+class _LineIndex(object):
+    """ Offsets and hashes of the lines of a buffer
+
+        The lines are split at line feeds, a last line without one
+        counts as well (like ``file.readlines()`` does it).
+
+        :CVariables:
+         - `CHUNKSIZE`: The number of bytes read at once
+
+        :IVariables:
+         - `count`: The number of lines
+         - `hashes`: The hashes of the lines
+         - `_buffer`: The buffer
+         - `_offsets`: The line offsets (plus the end offset)
+
+        :Types:
+         - `CHUNKSIZE`: ``int``
+         - `count`: ``int``
+         - `hashes`: ``array.array``
+         - `_buffer`: `_StringBuffer` or `_FileBuffer`
+         - `_offsets`: ``array.array``
+    """
+    CHUNKSIZE = 65536
+
+    def __init__(self, buf):
+        """ Initialization
+
+            :param buf: The buffer to index
+            :type buf: `_StringBuffer` or `_FileBuffer`
+        """
+        import array
+
+        offsets = array.array(_getIntType(buf.size), [0])
+        hashes = array.array('l')
+        append, offset = offsets.append, 0
+        pos, rest = 0, ""
+        while pos < buf.size:
+            chunk = buf.read(pos, self.CHUNKSIZE)
+            if not chunk:
+                break
+            pos += len(chunk)
+            lines = (rest + chunk).split("\n")
+            rest = lines.pop()
+            for line in lines:
+                offset += len(line) + 1
+                append(offset)
+            # lines are hashed without the line feed...
+            hashes.extend(map(hash, lines))
+        if rest:
+            append(offset + len(rest))
+            # ...so this one can't collide with a complete line
+            hashes.append(hash(rest + "\n"))
+
+        self.count = len(hashes)
+        self.hashes = hashes
+        self._buffer = buf
+        self._offsets = offsets
+
+
+    def getLine(self, lineno):
+        """ Returns a line
+
+            :param lineno: The line number (zero based)
+            :type lineno: ``int``
+
+            :return: The line (including the line feed)
+            :rtype: ``str``
+        """
+        offsets = self._offsets
+        return self._buffer.getSlice(offsets[lineno], offsets[lineno + 1])
+
+
+    def getRange(self, start, end):
+        """ Returns the byte range of some lines
+
+            :Parameters:
+             - `start`: The first line number
+             - `end`: The line number after the last line
+
+            :Types:
+             - `start`: ``int``
+             - `end`: ``int``
+
+            :return: The start and end offsets (``(int, int)``)
+            :rtype: ``tuple``
+        """
+        return self._offsets[start], self._offsets[end]
+
+
+class _StringBuffer(object):
+    """ Buffer of a string
+
+        :IVariables:
+         - `size`: The size of the string
+         - `_data`: The string
+
+        :Types:
+         - `size`: ``int``
+         - `_data`: ``str``
+    """
+
+    def __init__(self, data):
+        """ Initialization
+
+            :param data: The string
+            :type data: ``str``
+        """
+        self.size = len(data)
+        self._data = data
+
+
+    def close(self):
+        """ Releases the string """
+        self._data = ""
+
+
+    def read(self, offset, length):
+        """ Returns a part of the string
+
+            :Parameters:
+             - `offset`: The start offset
+             - `length`: The maximum number of bytes
+
+            :Types:
+             - `offset`: ``int``
+             - `length`: ``int``
+
+            :return: The data
+            :rtype: ``str``
+        """
+        return self._data[offset:offset + length]
+
+
+    def getSlice(self, start, end):
+        """ Returns a part of the string
+
+            :Parameters:
+             - `start`: The start offset
+             - `end`: The end offset
+
+            :Types:
+             - `start`: ``int``
+             - `end`: ``int``
+
+            :return: The data
+            :rtype: ``str``
+        """
+        return self._data[start:end]
+
+
+class _FileBuffer(object):
+    """ Buffer of a file
+
+        `read` reads through the file, so the data read doesn't stay in
+        the process' memory. `getSlice` slices a (read only) memory map of
+        the file instead, which pages in just the parts sliced.
+
+        :IVariables:
+         - `size`: The size of the file
+         - `_fp`: The file
+         - `_map`: The memory map (or ``None`` if not mapped yet)
+
+        :Types:
+         - `size`: ``int``
+         - `_fp`: ``file``
+         - `_map`: ``mmap.mmap``
+    """
+
+    def __init__(self, name):
+        """ Initialization
+
+            :param name: The file name
+            :type name: ``str``
+        """
+        fp = file(name, "rb")
+        fp.seek(0, 2)
+        self.size = fp.tell()
+        self._fp = fp
+        self._map = None
+
+
+    def close(self):
+        """ Closes the file """
+        fmap, self._map = self._map, None
+        if fmap is not None:
+            fmap.close()
+        self._fp.close()
+
+
+    def read(self, offset, length):
+        """ Reads a part of the file
+
+            :Parameters:
+             - `offset`: The start offset
+             - `length`: The maximum number of bytes
+
+            :Types:
+             - `offset`: ``int``
+             - `length`: ``int``
+
+            :return: The data
+            :rtype: ``str``
+        """
+        self._fp.seek(offset)
+        return self._fp.read(length)
+
+
+    def getSlice(self, start, end):
+        """ Slices a part of the file (from the memory map)
+
+            :Parameters:
+             - `start`: The start offset
+             - `end`: The end offset
+
+            :Types:
+             - `start`: ``int``
+             - `end`: ``int``
+
+            :return: The data
+            :rtype: ``str``
+        """
+        if self._map is None:
+            if not self.size:
+                # empty files cannot be mapped
+                return ""
+            import mmap
+            self._map = mmap.mmap(
+                self._fp.fileno(), 0, access = mmap.ACCESS_READ
+            )
+        return self._map[start:end]
+
+
+def _getIntType(maximum):
+    """ Returns the smallest (signed) array type code for some numbers
+
+        :param maximum: The maximum number to be stored
+        :type maximum: ``int``
+
+        :return: The type code
+        :rtype: ``str``
+    """
+    import array
+
+    if maximum < 1 << (8 * array.array('i').itemsize - 1):
+        return 'i'
+    return 'l'
+
+
+def _formatRange(start, length):
+    """ Formats a unified diff hunk range
+
+        :Parameters:
+         - `start`: The start line (zero based)
+         - `length`: The number of lines
+
+        :Types:
+         - `start`: ``int``
+         - `length`: ``int``
+
+        :return: The formatted range
+        :rtype: ``str``
+    """
+    if length == 1:
+        return "%d" % (start + 1)
+    if not length:
+        start -= 1
+    return "%d,%d" % (start + 1, length)
+
+
+class PooledDiffer(InternalDiffer):
+    """ Internal differ, which computes file diffs in worker processes
+
+        File diffs announced by `prefetchFileDiff` (and content diffs
+        announced by `prefetchContentDiff`) are computed by a
+        ``multiprocessing`` pool in the background. `getFileDiff` and
+        `getContentDiff` return the same output as `InternalDiffer` would
+        (the header lines are generated in the calling process, since the
+        labels are usually not known in advance).
+
+        :ivar _pool: The worker pool
+        :type _pool: ``multiprocessing.pool.Pool``
+
+        :ivar _jobs: The pending jobs (``{(name1, name2, label1, label2,
+                     date1, date2): result}``, content jobs are keyed by
+                     the contents instead of the names)
+        :type _jobs: ``dict``
+    """
+
+    def __init__(self, processes):
+        """ Initialization
+
+            :param processes: The number of worker processes
+            :type processes: ``int``
+        """
+        import multiprocessing
+
+        super(PooledDiffer, self).__init__()
+        self._pool = multiprocessing.Pool(processes)
+        self._jobs = {}
+
+
+    def prefetchFileDiff(self, name1, name2, label1, label2 = None,
+                         date1 = "", date2 = ""):
+        """ Starts computing the diff of two files in the background
+
+            The parameters are the same as the ones, which are going to be
+            passed to `getFileDiff`.
+
+            :see: `InternalDiffer.getFileDiff`
+        """
+        self._jobs[(name1, name2, label1, label2 or label1, date1, date2)] = \
+            self._pool.apply_async(_getFileDiffHunks, (name1, name2))
+
+
+    def prefetchContentDiff(self, content1, content2, label1, label2 = None,
+                            date1 = "", date2 = ""):
+        """ Starts computing the diff of two file contents in the background
+
+            The contents are passed to the worker directly, no temporary
+            files are involved. The parameters are the same as the ones,
+            which are going to be passed to `getContentDiff`.
+
+            :see: `InternalDiffer.getContentDiff`
+        """
+        self._jobs[
+            (content1, content2, label1, label2 or label1, date1, date2)
+        ] = self._pool.apply_async(_getContentDiffHunks, (content1, content2))
+
+
+    def getFileDiff(self, name1, name2, label1, label2 = None,
+                    date1 = "", date2 = ""):
+        """ creates a diff of two line based files
+
+            If the diff was prefetched, the result is taken from the pool.
+            Otherwise it's computed right now.
+
+            :see: `InternalDiffer.getFileDiff`
+        """
+        job = self._jobs.pop(
+            (name1, name2, label1, label2 or label1, date1, date2), None
+        )
+        if job is None:
+            return super(PooledDiffer, self).getFileDiff(
+                name1, name2, label1, label2, date1, date2
+            )
+
+        return self._getResult(job, label1, label2, date1, date2)
+
+
+    def getContentDiff(self, content1, content2, label1, label2 = None,
+                       date1 = "", date2 = ""):
+        """ creates a diff of two file contents held in memory
+
+            If the diff was prefetched, the result is taken from the pool.
+            Otherwise it's computed right now.
+
+            :see: `InternalDiffer.getContentDiff`
+        """
+        job = self._jobs.pop(
+            (content1, content2, label1, label2 or label1, date1, date2), None
+        )
+        if job is None:
+            return super(PooledDiffer, self).getContentDiff(
+                content1, content2, label1, label2, date1, date2
+            )
+
+        return self._getResult(job, label1, label2, date1, date2)
+
+
+    def _getResult(self, job, label1, label2, date1, date2):
+        """ Waits for a job and adds the header lines to its result
+
+            :Parameters:
+             - `job`: The job
+             - `label1`: Label for first data
+             - `label2`: Label for second data
+             - `date1`: Date description for first data
+             - `date2`: Date description for second data
+
+            :Types:
+             - `job`: ``multiprocessing.pool.AsyncResult``
+             - `label1`: ``str``
+             - `label2`: ``str``
+             - `date1`: ``str``
+             - `date2`: ``str``
+
+            :return: The diff lines
+            :rtype: ``list``
+        """
+        import difflib
+
+        hunks = job.get()
+        if not hunks:
+            return hunks
+
+        header = list(difflib.unified_diff(
+            ["\n"], [], label1, label2 or label1, date1, date2,
+        ))[:2]
+        return header + hunks
+
+
+    def forget(self):
+        """ Drops all pending jobs """
+        self._jobs.clear()
+
+
+    def close(self):
+        """ Shuts down the worker pool """
+        self._jobs.clear()
+        self._pool.close()
+        self._pool.join()
+
+
+def _getFileDiffHunks(name1, name2):
+    """ Returns the unified diff of two files without the header lines
+
+        This is the worker function of `PooledDiffer`.
+
+        :Parameters:
+         - `name1`: First file name
+         - `name2`: Second file name
+
+        :Types:
+         - `name1`: ``str``
+         - `name2`: ``str``
+
+        :return: The diff lines
+        :rtype: ``list``
+    """
+    return list(InternalDiffer().getFileDiff(name1, name2, "", ""))[2:]
+
+
+def _getContentDiffHunks(content1, content2):
+    """ Returns the unified diff of two contents without the header lines
+
+        This is the worker function of `PooledDiffer`.
+
+        :Parameters:
+         - `content1`: First content
+         - `content2`: Second content
+
+        :Types:
+         - `content1`: ``str``
+         - `content2`: ``str``
+
+        :return: The diff lines
+        :rtype: ``list``
+    """
+    return list(
+        InternalDiffer().getContentDiff(content1, content2, "", "")
+    )[2:]
+
+
+class ExternalDiffer(object):
+    """ Differ which calls an external program (e.g. diff)
+
+        If the diff command is a plain ``diff -u``, string diffs up to
+        `_inline_limit` bytes are computed in-process and formatted the
+        same way, so no program is run at all.
+        Larger strings are fed to a plain ``diff -u`` through pipes (passed
+        as ``/dev/fd/<n>`` file names) where possible. Otherwise (and
+        always for custom diff commands, which may want to stat, seek or
+        reopen their inputs) the strings are written into temporary files
+        first.
+
+        :IVariables:
+         - `_diff_command`: The diff command line
+         - `_tempdir`: The tempdir to use for string diffs
+         - `_inline_limit`: The maximum size of string diffs (both strings
+           together) computed in-process
+         - `_pipe_strings`: May string diffs be fed through pipes?
+
+        :Types:
+         - `_diff_command`: ``list``
+         - `_tempdir`: ``str``
+         - `_inline_limit`: ``int``
+         - `_pipe_strings`: ``bool``
+    """
+
+    def __init__(self, diff_command, tempdir = None, inline_limit = 0):
+        """ Initialization
+
+            :Parameters:
+             - `diff_command`: The diff command to call
+             - `tempdir`: The tempdir to use for string diffs
+             - `inline_limit`: The maximum size of string diffs computed
+               in-process (``0`` disables it). It's ignored unless the
+               command is a plain ``diff -u``
+
+            :Types:
+             - `diff_command`: ``list``
+             - `tempdir`: ``str``
+             - `inline_limit`: ``int``
+        """
+        plain = _isPlainUnifiedDiff(diff_command)
+        self._diff_command = diff_command
+        self._tempdir = tempdir
+        self._inline_limit = plain and inline_limit or 0
+        self._pipe_strings = plain
+
+
+    def getStringDiff(self, string1, string2, label1, label2 = None,
+                      date1 = "", date2 = ""):
+        """ creates a diff of two line based strings
+
+            If a string is ``None``, it's treated empty
+
+            :Parameters:
+             - `string1`: First string
+             - `string2`: Second string
+             - `label1`: Label for first data
+             - `label2`: Label for second data
+             - `date1`: Date description for first data
+             - `date2`: Date description for second data
+
+            :Types:
+             - `string1`: ``str``
+             - `string2`: ``str``
+             - `label1`: ``str``
+             - `label2`: ``str``
+             - `date1`: ``str``
+             - `date2`: ``str``
+
+            :return: unified diff lines (maybe a generator)
+            :rtype: iterable
+        """
+        string1 = string1 or ""
+        string2 = string2 or ""
+
+        if len(string1) + len(string2) <= self._inline_limit and \
+                "\0" not in string1 and "\0" not in string2:
+            label_from, label_to = [
+                (isinstance(label, unicode) and
+                    [label.encode("utf-8")] or [label])[0]
+                for label in self._getLabels(label1, label2, date1, date2)
+            ]
+            return _getInlineDiff(string1, string2, label_from, label_to)
+
+        return self._getPipedStringDiff(
+            string1, string2, label1, label2, date1, date2
+        )
+
+
+    def getContentDiff(self, content1, content2, label1, label2 = None,
+                       date1 = "", date2 = ""):
+        """ creates a diff of two file contents held in memory
+
+            :see: `getStringDiff`
+        """
+        return self.getStringDiff(
+            content1, content2, label1, label2, date1, date2
+        )
+
+
+    def _getPipedStringDiff(self, string1, string2, label1, label2, date1,
+                            date2):
+        """ Runs the diff program on two strings
+
+            :see: `getStringDiff`
+
+            :return: unified diff lines
+            :rtype: generator
+        """
+        if self._pipe_strings and _canPipeStrings():
+            feeders = [_StringFeeder(string1), _StringFeeder(string2)]
+            try:
+                pipe = self._getPipe(
+                    feeders[0].name, feeders[1].name,
+                    label1, label2, date1, date2
+                )
+            finally:
+                for feeder in feeders:
+                    feeder.start()
+
+            for line in _readPipe(pipe):
+                yield line
+            for feeder in feeders:
+                feeder.join()
+        else:
+            from svnmailer import util
+
+            file1 = util.TempFile(self._tempdir)
+            file1.fp.write(string1)
+            file1.close()
+
+            file2 = util.TempFile(self._tempdir)
+            file2.fp.write(string2)
+            file2.close()
+
+            pipe = self._getPipe(
+                file1.name, file2.name, label1, label2, date1, date2
+            )
+            for line in _readPipe(pipe):
+                yield line
+
+
+    def getFileDiff(self, name1, name2, label1, label2 = None,
+                    date1 = "", date2 = ""):
+        """ creates a diff of two line based files
+
+            :Parameters:
+             - `name1`: First file name
+             - `name2`: Second file name
+             - `label1`: Label for first data
+             - `label2`: Label for second data
+             - `date1`: Date description for first data
+             - `date2`: Date description for second data
+
+            :Types:
+             - `name1`: ``str``
+             - `name2`: ``str``
+             - `label1`: ``str``
+             - `label2`: ``str``
+             - `date1`: ``str``
+             - `date2`: ``str``
+
+            :return: unified diff lines (maybe a generator)
+            :rtype: iterable
+        """
+        return _readPipe(
+            self._getPipe(name1, name2, label1, label2, date1, date2)
+        )
+
+
+    def _getPipe(self, name1, name2, label1, label2, date1, date2):
+        """ Returns a pipe from the diff program
+
+            :Parameters:
+             - `name1`: First file name
+             - `name2`: Second file name
+             - `label1`: Label for first data
+             - `label2`: Label for second data
+             - `date1`: Date description for first data
+             - `date2`: Date description for second data
+
+            :Types:
+             - `name1`: ``str``
+             - `name2`: ``str``
+             - `label1`: ``str``
+             - `label2`: ``str``
+             - `date1`: ``str``
+             - `date2`: ``str``
+
+            :return: The Process object
+            :rtype: `svnmailer.processes.Process`
+        """
+        from svnmailer import processes
+
+        label_from, label_to = self._getLabels(label1, label2, date1, date2)
+        params = {
+            "label_from": label_from,
+            "label_to"  : label_to,
+            "from"      : name1,
+            "to"        : name2,
+        }
+
+        # check for sanity
+        for key, value in params.items():
+            if isinstance(value, unicode):
+                params[key] = value.encode("utf-8")
+
+        cmd = list(self._diff_command)
+        cmd[1:] = [(isinstance(arg, unicode) and
+            [arg.encode("utf-8")] or [arg])[0] % params for arg in cmd[1:]
+        ]
+
+        pipe = processes.Process.pipe4(cmd)
+        pipe.tochild.close()
+
+        return pipe
+
+
+    def _getLabels(self, label1, label2, date1, date2):
+        """ Returns the labels passed to the diff program
+
+            :Parameters:
+             - `label1`: Label for first data
+             - `label2`: Label for second data
+             - `date1`: Date description for first data
+             - `date2`: Date description for second data
+
+            :Types:
+             - `label1`: ``str``
+             - `label2`: ``str``
+             - `date1`: ``str``
+             - `date2`: ``str``
+
+            :return: The two labels (``(label_from, label_to)``)
+            :rtype: ``tuple``
+        """
+        return (
+            "%s %s" % (label1, date1 or ""),
+            "%s %s" % (label2 or label1, date2 or ""),
+        )
+
+
+class PooledExternalDiffer(ExternalDiffer):
+    """ External differ, which runs file diffs concurrently
+
+        File diffs announced by `prefetchFileDiff` (and content diffs
+        announced by `prefetchContentDiff`) are run by a bounded number of
+        worker threads (each one waiting for a diff process). The output
+        is collected and handed out by `getFileDiff` and `getContentDiff`
+        in the order requested.
+
+        :ivar _pool: The worker thread pool
+        :type _pool: ``multiprocessing.pool.ThreadPool``
+
+        :ivar _jobs: The pending jobs (``{(name1, name2, label1, label2,
+                     date1, date2): result}``, content jobs are keyed by
+                     the contents instead of the names)
+        :type _jobs: ``dict``
+    """
+
+    def __init__(self, diff_command, processes, tempdir = None,
+                 inline_limit = 0):
+        """ Initialization
+
+            :Parameters:
+             - `diff_command`: The diff command to call
+             - `processes`: The maximum number of concurrent diff processes
+             - `tempdir`: The tempdir to use for string diffs
+             - `inline_limit`: The maximum size of string diffs computed
+               in-process
+
+            :Types:
+             - `diff_command`: ``list``
+             - `processes`: ``int``
+             - `tempdir`: ``str``
+             - `inline_limit`: ``int``
+        """
+        from multiprocessing import pool
+
+        super(PooledExternalDiffer, self).__init__(
+            diff_command, tempdir, inline_limit
+        )
+        self._pool = pool.ThreadPool(processes)
+        self._jobs = {}
+
+
+    def prefetchFileDiff(self, name1, name2, label1, label2 = None,
+                         date1 = "", date2 = ""):
+        """ Starts the diff of two files in the background
+
+            The parameters are the same as the ones, which are going to be
+            passed to `getFileDiff`.
+
+            :see: `ExternalDiffer.getFileDiff`
+        """
+        self._jobs[(name1, name2, label1, label2 or label1, date1, date2)] = \
+            self._pool.apply_async(self._runFileDiff, (
+                name1, name2, label1, label2, date1, date2
+            ))
+
+
+    def prefetchContentDiff(self, content1, content2, label1, label2 = None,
+                            date1 = "", date2 = ""):
+        """ Starts the diff of two file contents in the background
+
+            The parameters are the same as the ones, which are going to be
+            passed to `getContentDiff`.
+
+            :see: `ExternalDiffer.getContentDiff`
+        """
+        self._jobs[
+            (content1, content2, label1, label2 or label1, date1, date2)
+        ] = self._pool.apply_async(self._runContentDiff, (
+            content1, content2, label1, label2, date1, date2
+        ))
+
+
+    def getFileDiff(self, name1, name2, label1, label2 = None,
+                    date1 = "", date2 = ""):
+        """ creates a diff of two line based files
+
+            If the diff was prefetched, the result is taken from the pool.
+            Otherwise the diff program is run right now.
+
+            :see: `ExternalDiffer.getFileDiff`
+        """
+        job = self._jobs.pop(
+            (name1, name2, label1, label2 or label1, date1, date2), None
+        )
+        if job is None:
+            return super(PooledExternalDiffer, self).getFileDiff(
+                name1, name2, label1, label2, date1, date2
+            )
+
+        return job.get()
+
+
+    def getContentDiff(self, content1, content2, label1, label2 = None,
+                       date1 = "", date2 = ""):
+        """ creates a diff of two file contents held in memory
+
+            If the diff was prefetched, the result is taken from the pool.
+            Otherwise it's computed right now.
+
+            :see: `ExternalDiffer.getContentDiff`
+        """
+        job = self._jobs.pop(
+            (content1, content2, label1, label2 or label1, date1, date2), None
+        )
+        if job is None:
+            return super(PooledExternalDiffer, self).getContentDiff(
+                content1, content2, label1, label2, date1, date2
+            )
+
+        return job.get()
+
+
+    def forget(self):
+        """ Drops all pending jobs """
+        self._jobs.clear()
+
+
+    def close(self):
+        """ Shuts down the worker pool """
+        self._jobs.clear()
+        self._pool.close()
+        self._pool.join()
+
+
+    def _runFileDiff(self, name1, name2, label1, label2, date1, date2):
+        """ Runs a diff process and collects its output (worker thread)
+
+            :see: `ExternalDiffer.getFileDiff`
+
+            :return: The diff lines
+            :rtype: ``list``
+        """
+        return list(ExternalDiffer.getFileDiff(
+            self, name1, name2, label1, label2, date1, date2
+        ))
+
+
+    def _runContentDiff(self, content1, content2, label1, label2, date1,
+                        date2):
+        """ Diffs two contents and collects the output (worker thread)
+
+            :see: `ExternalDiffer.getContentDiff`
+
+            :return: The diff lines
+            :rtype: ``list``
+        """
+        return list(ExternalDiffer.getContentDiff(
+            self, content1, content2, label1, label2, date1, date2
+        ))
+
+
+def _isPlainUnifiedDiff(diff_command):
+    """ Returns whether a diff command is a plain ``diff -u``
+
+        Only options, which don't influence the output of text diffs,
+        are accepted.
+
+        :param diff_command: The diff command
+        :type diff_command: ``list``
+
+        :return: Is it ``diff -u``?
+        :rtype: ``bool``
+    """
+    import os
+
+    if not diff_command:
+        return False
+    program = os.path.basename(diff_command[0]).lower()
+    if program not in ("diff", "diff.exe", "gdiff"):
+        return False
+
+    harmless = (
+        "-u", "--unified", "-a", "--text", "-L", "--label",
+        "%(label_from)s", "%(label_to)s", "%(from)s", "%(to)s",
+    )
+    return "-u" in diff_command[1:] and not [arg
+        for arg in diff_command[1:] if arg not in harmless
+    ]
+
+
+def _splitFileLines(content):
+    """ Splits a file content into lines like ``file.readlines()`` does
+
+        :param content: The content
+        :type content: ``str``
+
+        :return: The lines
+        :rtype: ``list``
+    """
+    import cStringIO
+
+    return cStringIO.StringIO(content or "").readlines()
+
+
+def _getInlineDiff(string1, string2, label_from, label_to):
+    """ Creates a unified diff in the format of ``diff -u``
+
+        The changed lines are determined the way GNU diff determines them
+        (see `_getChangedLines`), so the output matches the one of
+        ``diff -u -L label_from -L label_to``.
+
+        :Parameters:
+         - `string1`: First string
+         - `string2`: Second string
+         - `label_from`: The label of the first string
+         - `label_to`: The label of the second string
+
+        :Types:
+         - `string1`: ``str``
+         - `string2`: ``str``
+         - `label_from`: ``str``
+         - `label_to`: ``str``
+
+        :return: unified diff lines
+        :rtype: generator
+    """
+    import difflib
+
+    def fmtline(prefix, line):
+        """ Formats a diff line """
+        if line.endswith("\n"):
+            return ["%s%s" % (prefix, line)]
+        return [
+            "%s%s\n" % (prefix, line), "\\ No newline at end of file\n"
+        ]
+
+    list1 = _splitFileLines(string1)
+    list2 = _splitFileLines(string2)
+
+    # let difflib group the hunks
+    matcher = difflib.SequenceMatcher(None, list1, list2)
+    matcher.opcodes = _getOpcodes(*_getChangedLines(list1, list2))
+
+    started = False
+    for group in matcher.get_grouped_opcodes(3):
+        if not started:
+            started = True
+            yield "--- %s\n" % label_from
+            yield "+++ %s\n" % label_to
+
+        first, last = group[0], group[-1]
+        yield "@@ -%s +%s @@\n" % (
+            _formatRange(first[1], last[2] - first[1]),
+            _formatRange(first[3], last[4] - first[3]),
+        )
+        for tag, a1, a2, b1, b2 in group:
+            if tag == 'equal':
+                for line in list1[a1:a2]:
+                    for res in fmtline(" ", line):
+                        yield res
+                continue
+            for line in list1[a1:a2]:
+                for res in fmtline("-", line):
+                    yield res
+            for line in list2[b1:b2]:
+                for res in fmtline("+", line):
+                    yield res
+
+
+def _getOpcodes(changed1, changed2):
+    """ Converts change flags to diff opcodes
+
+        :Parameters:
+         - `changed1`: The padded change flags of the first file
+         - `changed2`: The padded change flags of the second file
+
+        :Types:
+         - `changed1`: ``list``
+         - `changed2`: ``list``
+
+        :return: The opcodes (like ``difflib.SequenceMatcher.get_opcodes``)
+        :rtype: ``list``
+    """
+    opcodes = []
+    idx1 = idx2 = 0
+    end1, end2 = len(changed1) - 2, len(changed2) - 2
+    while idx1 < end1 or idx2 < end2:
+        start1, start2 = idx1, idx2
+        while idx1 < end1 and idx2 < end2 and \
+                not changed1[idx1 + 1] and not changed2[idx2 + 1]:
+            idx1 += 1
+            idx2 += 1
+        if idx1 > start1:
+            opcodes.append(('equal', start1, idx1, start2, idx2))
+
+        start1, start2 = idx1, idx2
+        while idx1 < end1 and changed1[idx1 + 1]:
+            idx1 += 1
+        while idx2 < end2 and changed2[idx2 + 1]:
+            idx2 += 1
+        if idx1 > start1 or idx2 > start2:
+            tag = (idx1 == start1 and 'insert') or \
+                (idx2 == start2 and 'delete') or 'replace'
+            opcodes.append((tag, start1, idx1, start2, idx2))
+
+    return opcodes or [('equal', 0, 0, 0, 0)]
+
+
+def _getChangedLines(list1, list2):
+    """ Determines the changed lines of two files like GNU diff
+
+        The lines are compared by a minimal O(ND) search (after
+        discarding lines, which cannot match or would confuse the
+        search). Finally the runs of changes are moved to the places
+        GNU diff moves them to.
+
+        :Parameters:
+         - `list1`: The lines of the first file
+         - `list2`: The lines of the second file
+
+        :Types:
+         - `list1`: ``list``
+         - `list2`: ``list``
+
+        :return: The change flags of both files (``(changed1, changed2)``),
+                 padded with an unchanged line at both ends
+        :rtype: ``tuple``
+    """
+    classes = {}
+    equivs1 = [classes.setdefault(line, len(classes)) for line in list1]
+    equivs2 = [classes.setdefault(line, len(classes)) for line in list2]
+
+    # the common head and tail don't take part (except for the context)
+    head, tail = 0, 0
+    maxlen = min(len(list1), len(list2))
+    while head < maxlen and equivs1[head] == equivs2[head]:
+        head += 1
+    while tail < maxlen - head and equivs1[-1 - tail] == equivs2[-1 - tail]:
+        tail += 1
+    head, tail = max(0, head - 3), max(0, tail - 3)
+    mid1 = equivs1[head:len(equivs1) - tail]
+    mid2 = equivs2[head:len(equivs2) - tail]
+    changed1 = [False] * (len(mid1) + 2)
+    changed2 = [False] * (len(mid2) + 2)
+
+    (vec1, real1), (vec2, real2) = _discardConfusingLines(
+        mid1, mid2, changed1, changed2
+    )
+    _compareSeq(vec1, vec2, real1, real2, changed1, changed2)
+
+    _shiftBoundaries(mid1, changed1, changed2)
+    _shiftBoundaries(mid2, changed2, changed1)
+
+    return (
+        [False] * (head + 1) + changed1[1:-1] + [False] * (tail + 1),
+        [False] * (head + 1) + changed2[1:-1] + [False] * (tail + 1),
+    )
+
+
+def _discardConfusingLines(equivs1, equivs2, changed1, changed2):
+    """ Discards lines, which can't match or would confuse the search
+
+        Lines without any match in the other file are marked as changed
+        right away. Lines with many matches are discarded as well, if
+        they're surrounded by other discarded lines.
+
+        :Parameters:
+         - `equivs1`: The line classes of the first file
+         - `equivs2`: The line classes of the second file
+         - `changed1`: The padded change flags of the first file
+         - `changed2`: The padded change flags of the second file
+
+        :Types:
+         - `equivs1`: ``list``
+         - `equivs2`: ``list``
+         - `changed1`: ``list``
+         - `changed2`: ``list``
+
+        :return: The remaining line classes of both files plus their
+                 real line numbers (``((vec1, real1), (vec2, real2))``)
+        :rtype: ``tuple``
+    """
+    counts1, counts2 = {}, {}
+    for equiv in equivs1:
+        counts1[equiv] = counts1.get(equiv, 0) + 1
+    for equiv in equivs2:
+        counts2[equiv] = counts2.get(equiv, 0) + 1
+
+    result = []
+    for equivs, counts, changed in (
+            (equivs1, counts2, changed1), (equivs2, counts1, changed2)):
+        end = len(equivs)
+        many, tem = 5, end // 64
+        tem >>= 2
+        while tem > 0:
+            many *= 2
+            tem >>= 2
+
+        # 1: discard, 2: discard provisionally
+        discards = []
+        for equiv in equivs:
+            nmatch = counts.get(equiv, 0)
+            discards.append(
+                (nmatch == 0 and 1) or (nmatch > many and 2) or 0
+            )
+        _cancelProvisionalDiscards(discards)
+
+        vec, real = [], []
+        for idx, equiv in enumerate(equivs):
+            if discards[idx]:
+                changed[idx + 1] = True
+            else:
+                vec.append(equiv)
+                real.append(idx)
+        result.append((vec, real))
+
+    return tuple(result)
+
+
+def _cancelProvisionalDiscards(discards):
+    """ Keeps provisionally discarded lines, unless they're inside a run
+        of discarded lines
+
+        :param discards: The discard flags (modified in place)
+        :type discards: ``list``
+    """
+    end = len(discards)
+    i = 0
+    while i < end:
+        if discards[i] == 2:
+            discards[i] = 0
+        elif discards[i]:
+            provisional = 0
+            j = i
+            while j < end and discards[j]:
+                if discards[j] == 2:
+                    provisional += 1
+                j += 1
+            while j > i and discards[j - 1] == 2:
+                j -= 1
+                discards[j] = 0
+                provisional -= 1
+            length = j - i
+
+            if provisional * 4 > length:
+                while j > i:
+                    j -= 1
+                    if discards[j] == 2:
+                        discards[j] = 0
+            else:
+                minimum, tem = 1, length >> 2
+                tem >>= 2
+                while tem > 0:
+                    minimum <<= 1
+                    tem >>= 2
+                minimum += 1
+
+                # cancel subruns of `minimum` or more provisionals
+                j, consec = 0, 0
+                while j < length:
+                    if discards[i + j] != 2:
+                        consec = 0
+                    else:
+                        consec += 1
+                        if minimum == consec:
+                            j -= consec
+                        elif minimum < consec:
+                            discards[i + j] = 0
+                    j += 1
+
+                # cancel provisionals near the ends of the run
+                for step in (1, -1):
+                    pos = [i, i + length - 1][step < 0]
+                    consec = 0
+                    for j in xrange(length):
+                        if j >= 8 and discards[pos + step * j] == 1:
+                            break
+                        if discards[pos + step * j] == 2:
+                            consec = 0
+                            discards[pos + step * j] = 0
+                        elif discards[pos + step * j] == 0:
+                            consec = 0
+                        else:
+                            consec += 1
+                        if consec == 3:
+                            break
+
+                i += length - 1
+        i += 1
+
+
+def _compareSeq(vec1, vec2, real1, real2, changed1, changed2):
+    """ Marks the lines outside a shortest edit script as changed
+
+        This is the divide and conquer variant of the O(ND) algorithm
+        by Eugene W. Myers, as used by GNU diff.
+
+        :Parameters:
+         - `vec1`: The line classes of the first file
+         - `vec2`: The line classes of the second file
+         - `real1`: The real line numbers of `vec1`
+         - `real2`: The real line numbers of `vec2`
+         - `changed1`: The padded change flags of the first file
+         - `changed2`: The padded change flags of the second file
+
+        :Types:
+         - `vec1`: ``list``
+         - `vec2`: ``list``
+         - `real1`: ``list``
+         - `real2`: ``list``
+         - `changed1`: ``list``
+         - `changed2`: ``list``
+    """
+    fdiag, bdiag = {}, {}
+    stack = [(0, len(vec1), 0, len(vec2))]
+    while stack:
+        xoff, xlim, yoff, ylim = stack.pop()
+        while xoff < xlim and yoff < ylim and vec1[xoff] == vec2[yoff]:
+            xoff += 1
+            yoff += 1
+        while xoff < xlim and yoff < ylim and \
+                vec1[xlim - 1] == vec2[ylim - 1]:
+            xlim -= 1
+            ylim -= 1
+
+        if xoff == xlim:
+            for y in xrange(yoff, ylim):
+                changed2[real2[y] + 1] = True
+        elif yoff == ylim:
+            for x in xrange(xoff, xlim):
+                changed1[real1[x] + 1] = True
+        else:
+            xmid, ymid = _findMiddleSnake(
+                vec1, vec2, xoff, xlim, yoff, ylim, fdiag, bdiag
+            )
+            # the lower half is processed first
+            stack.append((xmid, xlim, ymid, ylim))
+            stack.append((xoff, xmid, yoff, ymid))
+
+
+def _findMiddleSnake(vec1, vec2, xoff, xlim, yoff, ylim, fdiag, bdiag):
+    """ Finds the midpoint of a shortest edit script
+
+        :Parameters:
+         - `vec1`: The line classes of the first file
+         - `vec2`: The line classes of the second file
+         - `xoff`: The start of the range in `vec1`
+         - `xlim`: The end of the range in `vec1`
+         - `yoff`: The start of the range in `vec2`
+         - `ylim`: The end of the range in `vec2`
+         - `fdiag`: Scratch space for the forward search
+         - `bdiag`: Scratch space for the backward search
+
+        :Types:
+         - `vec1`: ``list``
+         - `vec2`: ``list``
+         - `xoff`: ``int``
+         - `xlim`: ``int``
+         - `yoff`: ``int``
+         - `ylim`: ``int``
+         - `fdiag`: ``dict``
+         - `bdiag`: ``dict``
+
+        :return: The midpoint (``(x, y)``)
+        :rtype: ``tuple``
+    """
+    dmin, dmax = xoff - ylim, xlim - yoff
+    fmid, bmid = xoff - yoff, xlim - ylim
+    fmin = fmax = fmid
+    bmin = bmax = bmid
+    odd = (fmid - bmid) & 1
+    fdiag[fmid] = xoff
+    bdiag[bmid] = xlim
+    maxint = xlim + ylim + 1
+
+    while True:
+        if fmin > dmin:
+            fmin -= 1
+            fdiag[fmin - 1] = -1
+        else:
+            fmin += 1
+        if fmax < dmax:
+            fmax += 1
+            fdiag[fmax + 1] = -1
+        else:
+            fmax -= 1
+        for diag in xrange(fmax, fmin - 1, -2):
+            tlo, thi = fdiag[diag - 1], fdiag[diag + 1]
+            x = [tlo + 1, thi][tlo < thi]
+            y = x - diag
+            while x < xlim and y < ylim and vec1[x] == vec2[y]:
+                x += 1
+                y += 1
+            fdiag[diag] = x
+            if odd and bmin <= diag <= bmax and bdiag[diag] <= x:
+                return x, y
+
+        if bmin > dmin:
+            bmin -= 1
+            bdiag[bmin - 1] = maxint
+        else:
+            bmin += 1
+        if bmax < dmax:
+            bmax += 1
+            bdiag[bmax + 1] = maxint
+        else:
+            bmax -= 1
+        for diag in xrange(bmax, bmin - 1, -2):
+            tlo, thi = bdiag[diag - 1], bdiag[diag + 1]
+            x = [thi - 1, tlo][tlo < thi]
+            y = x - diag
+            while xoff < x and yoff < y and vec1[x - 1] == vec2[y - 1]:
+                x -= 1
+                y -= 1
+            bdiag[diag] = x
+            if not odd and fmin <= diag <= fmax and x <= fdiag[diag]:
+                return x, y
+
+
+def _shiftBoundaries(equivs, changed, other_changed):
+    """ Moves runs of changed lines like GNU diff does
+
+        Runs are merged where possible and moved forward as far as
+        possible, unless they can be aligned with a run of changes
+        in the other file. The flag lists are modified in place.
+
+        :Parameters:
+         - `equivs`: The line classes of the file
+         - `changed`: The padded change flags of the file
+         - `other_changed`: The padded change flags of the other file
+
+        :Types:
+         - `equivs`: ``list``
+         - `changed`: ``list``
+         - `other_changed`: ``list``
+    """
+    # indexes are 1-based because of the padding
+    i, j, i_end = 1, 1, len(equivs) + 1
+    while True:
+        while i < i_end and not changed[i]:
+            while other_changed[j]:
+                j += 1
+            j += 1
+            i += 1
+        if i == i_end:
+            break
+
+        start = i
+        i += 1
+        while changed[i]:
+            i += 1
+        while other_changed[j]:
+            j += 1
+
+        while True:
+            runlength = i - start
+
+            # move back, merging with previous runs
+            while start > 1 and equivs[start - 2] == equivs[i - 2]:
+                start -= 1
+                changed[start] = True
+                i -= 1
+                changed[i] = False
+                while changed[start - 1]:
+                    start -= 1
+                j -= 1
+                while other_changed[j]:
+                    j -= 1
+
+            corresponding = other_changed[j - 1] and i or i_end
+
+            # move forward as far as possible, merging with following runs
+            while i != i_end and equivs[start - 1] == equivs[i - 1]:
+                changed[start] = False
+                start += 1
+                changed[i] = True
+                i += 1
+                while changed[i]:
+                    i += 1
+                j += 1
+                while other_changed[j]:
+                    j += 1
+                    corresponding = i
+
+            if runlength == i - start:
+                break
+
+        # align with a corresponding run in the other file
+        while corresponding < i:
+            start -= 1
+            changed[start] = True
+            i -= 1
+            changed[i] = False
+            j -= 1
+            while other_changed[j]:
+                j -= 1
+
+
+def _readPipe(pipe):
+    """ Yields the output lines of a diff process and waits for it
+
+        :param pipe: The diff process
+        :type pipe: `svnmailer.processes.Process`
+
+        :return: The lines
+        :rtype: generator
+    """
+    # yield line by line
+    line = pipe.fromchild.readline()
+    while line:
+        yield line
+        line = pipe.fromchild.readline()
+
+    pipe.fromchild.close()
+    pipe.wait()
+
+
+def _canPipeStrings():
+    """ Returns whether string diffs can be fed through pipes
+
+        This needs ``/dev/fd`` and a process implementation, which passes
+        open file descriptors to the child.
+
+        :return: Can we use pipes?
+        :rtype: ``bool``
+    """
+    try:
+        return _canPipeStrings._result
+    except AttributeError:
+        import os, sys
+        from svnmailer import processes
+
+        _canPipeStrings._result = bool(
+            sys.platform != 'win32' and
+            processes.Process.IMPLEMENTATION == 'subprocess' and
+            os.path.isdir('/dev/fd')
+        )
+        return _canPipeStrings._result
+
+
+class _StringFeeder(object):
+    """ Feeds a string through a pipe to a child process
+
+        The read end is inherited by the child and addressed via
+        ``/dev/fd/<n>``. The write end is not inherited; it's fed
+        by a thread, so the child may read the inputs in any order.
+
+        :IVariables:
+         - `name`: The file name of the read end
+         - `_data`: The data to feed
+         - `_rfd`: The read end (or ``None`` after `start`)
+         - `_wfd`: The write end
+         - `_thread`: The feeding thread (or ``None``)
+
+        :Types:
+         - `name`: ``str``
+         - `_data`: ``str``
+         - `_rfd`: ``int``
+         - `_wfd`: ``int``
+         - `_thread`: ``threading.Thread``
+    """
+
+    def __init__(self, data):
+        """ Initialization
+
+            :param data: The data to feed
+            :type data: ``str``
+        """
+        import fcntl, os
+
+        self._data = data
+        self._rfd, self._wfd = os.pipe()
+        flags = fcntl.fcntl(self._wfd, fcntl.F_GETFD)
+        fcntl.fcntl(self._wfd, fcntl.F_SETFD, flags | fcntl.FD_CLOEXEC)
+        self.name = "/dev/fd/%d" % self._rfd
+        self._thread = None
+
+
+    def start(self):
+        """ Closes the read end (the child has its own) and starts feeding
+        """
+        import os, threading
+
+        os.close(self._rfd)
+        self._rfd = None
+        self._thread = threading.Thread(target = self._feed)
+        self._thread.setDaemon(True)
+        self._thread.start()
+
+
+    def join(self):
+        """ Waits for the feeding thread """
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+    def _feed(self):
+        """ Writes the data and closes the pipe (feeding thread) """
+        import os
+
+        try:
+            data, self._data = self._data, None
+            offset, length = 0, len(data)
+            while offset < length:
+                try:
+                    written = os.write(self._wfd, buffer(data, offset, 65536))
+                except OSError:
+                    # child went away without reading everything
+                    break
+                offset += written
+        finally:
+            os.close(self._wfd)
+
+
+class DiffStat(object):
+    """ Counts changed lines without creating an actual diff
+
+        The lines are compared by their hashes. After stripping common
+        leading and trailing lines, both sequences are walked in parallel.
+        On a mismatch the nearer one of the next occurrences of the
+        current lines is taken as the next match (a greedy approximation
+        of the longest common subsequence). The count is computed like
+        the diff opcode based one: deleted and added lines are summed up,
+        modified blocks count their longer side.
+
+        If a sequence is longer than `maxlines`, only the lines whose hash
+        is divisible by a sampling factor are compared. Since the sample
+        depends on the line content only, equal lines are sampled on both
+        sides. Modified lines can't be paired within a sample, so the
+        greater one of the deleted and added line totals is scaled up
+        instead.
+
+        :ivar maxlines: The maximum number of lines to compare without
+                        sampling (or ``None``)
+        :type maxlines: ``int``
+    """
+
+    def __init__(self, maxlines = None):
+        """ Initialization
+
+            :param maxlines: The maximum number of lines to compare without
+                             sampling (``None`` means unlimited)
+            :type maxlines: ``int``
+        """
+        self.maxlines = maxlines
+
+
+    def getStringLineCount(self, string1, string2):
+        """ Returns the number of changed lines of two line based strings
+
+            If a string is ``None``, it's treated empty
+
+            :Parameters:
+             - `string1`: First string
+             - `string2`: Second string
+
+            :Types:
+             - `string1`: ``str``
+             - `string2`: ``str``
+
+            :return: The number of changed lines
+            :rtype: ``int``
+        """
+        return self.getLineCount(
+            map(hash, (string1 or "").splitlines()),
+            map(hash, (string2 or "").splitlines()),
+        )
+
+
+    def getLineCount(self, hashes1, hashes2):
+        """ Returns the number of changed lines
+
+            :Parameters:
+             - `hashes1`: The line hashes of the old content
+             - `hashes2`: The line hashes of the new content
+
+            :Types:
+             - `hashes1`: ``list``
+             - `hashes2`: ``list``
+
+            :return: The number of changed lines
+            :rtype: ``int``
+        """
+        hashes1, hashes2, factor = self._prepare(hashes1, hashes2)
+        if not (hashes1 and hashes2):
+            return max(len(hashes1), len(hashes2))
+        elif factor > 1:
+            return max(self._count(hashes1, hashes2)[1:]) * factor
+
+        return self._count(hashes1, hashes2)[0]
+
+
+    def getLineCounts(self, hashes1, hashes2):
+        """ Returns the numbers of deleted and added lines
+
+            :Parameters:
+             - `hashes1`: The line hashes of the old content
+             - `hashes2`: The line hashes of the new content
+
+            :Types:
+             - `hashes1`: ``list``
+             - `hashes2`: ``list``
+
+            :return: The number of deleted and added lines
+                     (``(deleted, added)``)
+            :rtype: ``tuple``
+        """
+        hashes1, hashes2, factor = self._prepare(hashes1, hashes2)
+        if not (hashes1 and hashes2):
+            return (len(hashes1), len(hashes2))
+
+        deleted, added = self._count(hashes1, hashes2)[1:]
+        return (deleted * factor, added * factor)
+
+
+    def _prepare(self, hashes1, hashes2):
+        """ Strips common lines and samples the rest if necessary
+
+            :Parameters:
+             - `hashes1`: The line hashes of the old content
+             - `hashes2`: The line hashes of the new content
+
+            :Types:
+             - `hashes1`: ``list``
+             - `hashes2`: ``list``
+
+            :return: The remaining hashes and the sampling factor
+                     (``(hashes1, hashes2, factor)``)
+            :rtype: ``tuple``
+        """
+        start, end1, end2 = 0, len(hashes1), len(hashes2)
+        while start < end1 and start < end2 and \
+                hashes1[start] == hashes2[start]:
+            start += 1
+        while end1 > start and end2 > start and \
+                hashes1[end1 - 1] == hashes2[end2 - 1]:
+            end1 -= 1
+            end2 -= 1
+
+        hashes1, hashes2 = hashes1[start:end1], hashes2[start:end2]
+
+        factor = 1
+        longest = max(len(hashes1), len(hashes2))
+        if hashes1 and hashes2 and self.maxlines and \
+                longest > self.maxlines:
+            factor = (longest + self.maxlines - 1) // self.maxlines
+            hashes1 = [value for value in hashes1 if not value % factor]
+            hashes2 = [value for value in hashes2 if not value % factor]
+
+        return (hashes1, hashes2, factor)
+
+
+    def _count(self, hashes1, hashes2):
+        """ Counts the changed lines of two hash sequences
+
+            :Parameters:
+             - `hashes1`: The line hashes of the old content
+             - `hashes2`: The line hashes of the new content
+
+            :Types:
+             - `hashes1`: ``list``
+             - `hashes2`: ``list``
+
+            :return: The number of changed lines and the total numbers of
+                     deleted and added lines (``(changed, deleted, added)``)
+            :rtype: ``tuple``
+        """
+        import bisect
+
+        positions1, positions2 = {}, {}
+        for idx, value in enumerate(hashes1):
+            positions1.setdefault(value, []).append(idx)
+        for idx, value in enumerate(hashes2):
+            positions2.setdefault(value, []).append(idx)
+
+        def nextpos(positions, value, idx):
+            """ Returns the next position of `value` (at least `idx`) """
+            try:
+                poslist = positions[value]
+            except KeyError:
+                return None
+            found = bisect.bisect_left(poslist, idx)
+            if found < len(poslist):
+                return poslist[found]
+            return None
+
+        count = deleted = added = total_deleted = total_added = 0
+        idx1, idx2, end1, end2 = 0, 0, len(hashes1), len(hashes2)
+        while idx1 < end1 and idx2 < end2:
+            if hashes1[idx1] == hashes2[idx2]:
+                count += max(deleted, added)
+                total_deleted += deleted
+                total_added += added
+                deleted = added = 0
+                idx1 += 1
+                idx2 += 1
+                continue
+
+            next2 = nextpos(positions2, hashes1[idx1], idx2)
+            next1 = nextpos(positions1, hashes2[idx2], idx1)
+            if next1 is None and next2 is None:
+                deleted += 1
+                added += 1
+                idx1 += 1
+                idx2 += 1
+            elif next1 is None or \
+                    (next2 is not None and next2 - idx2 <= next1 - idx1):
+                added += next2 - idx2
+                idx2 = next2
+            else:
+                deleted += next1 - idx1
+                idx1 = next1
+
+        deleted += end1 - idx1
+        added += end2 - idx2
+
+        return (
+            count + max(deleted, added),
+            total_deleted + deleted,
+            total_added + added,
+        )
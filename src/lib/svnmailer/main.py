@@ -23,13 +23,17 @@ This module is the central core of the svnmailer. It dispatches all work to be
 done. It contains just one class (`Main`), which reads the config file while
 it is initialized. When the `Main.run` method is called, it selects the
 groups to be notified, the notifiers to be run and runs all notifiers for
-each group.
+each group. (The ``build-map`` command line is served by `MapIndexBuilder`
+instead. With ``--check-config`` the `Main.run` method stops after the
+configuration was loaded and validated.)
 
 The `Main` class may raise several exceptions (which all inherit from `Error`):
 
 - `ConfigError` occurs, if the configuration contains errors (like type
   or value errors, unicode errors etc). The `ConfigError` exception is
-  initialized with a string describing what kind of error occured.
+  initialized with a string describing what kind of error occured. Since
+  most group options are validated on first use, the error may occur
+  while selecting the groups as well.
 
 - `NotifierError` occurs, if one or more of the notifiers throw an
   exception. The `Main` class catches these exceptions (except
@@ -46,7 +50,9 @@ The `Main` class may raise several exceptions (which all inherit from `Error`):
 """
 __author__    = "André Malo"
 __docformat__ = "restructuredtext en"
-__all__       = ['Main', 'Error', 'ConfigError', 'NotifierError']
+__all__       = [
+    'Main', 'MapIndexBuilder', 'Error', 'ConfigError', 'NotifierError'
+]
 
 # global imports
 import sys
@@ -91,7 +97,8 @@ class Main(object):
             :param background: May the process daemonize itself?
             :type background: ``bool``
 
-            :return: A new `Main` instance
+            :return: A new `Main` instance (or a `MapIndexBuilder`
+                     instance, if ``--build-map`` was requested)
             :rtype: `Main`
 
             :Exceptions:
@@ -105,6 +112,9 @@ class Main(object):
         except cli.Error, exc:
             raise CommandlineError(str(exc))
 
+        if options.build_map:
+            return MapIndexBuilder(options.map_source, options.map_index)
+
         return cls.fromOptions(options)
 
     fromCommandline = classmethod(fromCommandline)
@@ -137,11 +147,21 @@ class Main(object):
     def run(self):
         """ Dispatches the work to be done
 
+            :return: The number of checked groups if only the config
+                     was to be checked (``--check-config``), ``None``
+                     otherwise
+            :rtype: ``int``
+
             :Exceptions:
              - `svnmailer.subversion.RepositoryError`: Error while
                accessing the subversion repository
              - `NotifierError`: One or more notifiers went crazy
+             - `ConfigError`: A group contains invalid options
         """
+        if self._settings.runtime.check_config:
+            # the settings were completely validated while loading
+            return len(self._settings.groups)
+
         from svnmailer import subversion
 
         try:
@@ -160,21 +180,23 @@ class Main(object):
                         except throwables:
                             raise
                         except:
-                            import traceback
-                            info = sys.exc_info()
-                            backtrace = traceback.format_exception(
-                                info[0], info[1], info[2]
-                            )
-                            del info
-                            backtrace[0] = "Notifier: %s.%s\nRevision: %s\n" \
-                                "Groups: %r\n%s" % (
-                                notifier.__module__,
-                                notifier.__class__.__name__,
-                                self._settings.runtime.revision,
+                            notifier_errors.append(self._getNotifierError(
+                                "%s.%s" % (
+                                    notifier.__module__,
+                                    notifier.__class__.__name__,
+                                ),
                                 [group._name for group in groupset.groups],
-                                backtrace[0],
-                            )
-                            notifier_errors.append(''.join(backtrace))
+                            ))
+
+                try:
+                    selector.finish()
+                except throwables:
+                    raise
+                except:
+                    notifier_errors.append(self._getNotifierError(
+                        "%s.finish" % selector.__class__.__name__, []
+                    ))
+
                 if notifier_errors:
                     raise NotifierError(*notifier_errors)
 
@@ -187,6 +209,32 @@ class Main(object):
             self._closeRepository()
 
 
+    def _getNotifierError(self, name, groups):
+        """ Returns the formatted backtrace of the current notifier error
+
+            :Parameters:
+             - `name`: The name of the failed notifier
+             - `groups`: The names of the groups processed
+
+            :Types:
+             - `name`: ``str``
+             - `groups`: ``list``
+
+            :return: The error description
+            :rtype: ``str``
+        """
+        import traceback
+
+        info = sys.exc_info()
+        backtrace = traceback.format_exception(info[0], info[1], info[2])
+        del info
+        backtrace[0] = "Notifier: %s\nRevision: %s\nGroups: %r\n%s" % (
+            name, self._settings.runtime.revision, groups, backtrace[0]
+        )
+
+        return ''.join(backtrace)
+
+
     def _getNotifierSelector(self):
         """ Returns the notifier selector
 
@@ -231,49 +279,68 @@ class Main(object):
 
             :return: The list (maybe empty). (``[GroupSet, ...]``)
             :rtype: ``list``
+
+            :exception ConfigError: A selected group contains invalid options
         """
         # collect changes and group by group [ ;-) ]
         group_changes = {}
         group_cache = {}
         changes = self._getChanges()
         for change in changes:
-            for group in self._getGroupsByChange(change):
+            for group, view in self._getGroupsByChange(change):
                 groupid = id(group)
                 try:
                     group_changes[groupid].append(change)
                 except KeyError:
-                    group_cache[groupid] = group
+                    self._checkGroup(group)
                     group_changes[groupid] = [change]
 
+                # the view of the last change is notified
+                group_cache[groupid] = view
+
         # Build the groupset
         # TODO: make group compression configurable?
+        # Equal groups (see their fingerprint) with equal change lists
+        # (changes compare by path) land in the same bucket
         group_sets = []
+        buckets = {}
         for groupid, changelist in group_changes.items():
             group = group_cache[groupid]
-            for stored in group_sets:
-                # We don't need to compare the group with *all*
-                # groups of this set. If the group is considered
-                # equal to the first stored group, all other stored
-                # groups are considered equal as well. (Otherwise
-                # they wouldn't been there ...)
-                if stored.changes == changelist and stored.groups[0] == group:
-                    stored.groups.append(group)
-                    group = None
-                    break
-
-            if group is not None:
-                group_sets.append(GroupSet([group], changelist, changes))
+            key = (tuple([change.path for change in changelist]), group)
+            try:
+                buckets[key].groups.append(group)
+            except KeyError:
+                stored = buckets[key] = GroupSet([group], changelist, changes)
+                group_sets.append(stored)
 
         return group_sets
 
 
+    def _checkGroup(self, group):
+        """ Transforms the (lazily transformed) options of a group
+
+            :param group: The group to check
+            :type group: `svnmailer.settings._base.GroupSettingsContainer`
+
+            :exception ConfigError: The group contains invalid options
+        """
+        try:
+            group('values')
+        except (ValueError, TypeError), exc:
+            raise ConfigError, "%s (in section [%s])" % (
+                str(exc), group._name.encode('utf-8')
+            ), sys.exc_info()[2]
+
+
     def _getGroupsByChange(self, change):
         """ Returns the matching groups for a particular change 
 
             :param change: The change to select
             :type change: `svnmailer.subversion.VersionedPathDescriptor`
 
-            :return: The group list
+            :return: The selected groups and their read-only views with the
+                     substitution record of the change
+                     (``[(group, view), ...]``)
             :rtype: ``list``
         """
         selected_groups = []
@@ -310,13 +377,10 @@ class Main(object):
                 else:
                     continue
 
-            # store the substdict for later use
-            for name, value in subst.items():
-                group[name] = value
-
+            # the group itself is shared by all changes
             (selected_groups, ignored_groups)[
                 bool(group.ignore_if_other_matches)
-            ].append(group)
+            ].append((group, group('view', subst)))
 
         # BRAINER: theoretically there could be more than one group
         # in the ignore list, which would have to be ignored at all then.
@@ -423,6 +487,49 @@ class Main(object):
             pass
 
 
+class MapIndexBuilder(object):
+    """ Builds a mapping index (``svn-mailer build-map``)
+
+        :IVariables:
+         - `source`: The name of the text file
+         - `target`: The name of the index file
+
+        :Types:
+         - `source`: ``str``
+         - `target`: ``str``
+    """
+
+    def __init__(self, source, target):
+        """ Initialization
+
+            :Parameters:
+             - `source`: The name of the text file
+             - `target`: The name of the index file
+
+            :Types:
+             - `source`: ``str``
+             - `target`: ``str``
+        """
+        self.source = source
+        self.target = target
+
+
+    def run(self):
+        """ Builds the index
+
+            :return: The number of entries written
+            :rtype: ``int``
+
+            :exception ConfigError: The index could not be built
+        """
+        from svnmailer.settings import mappers
+
+        try:
+            return mappers.DBMMapper.buildIndex(self.source, self.target)
+        except mappers.Error, exc:
+            raise ConfigError, str(exc), sys.exc_info()[2]
+
+
 class GroupSet(object):
     """ Container object for a single groupset
 
@@ -96,6 +96,15 @@ class BaseNotifier(object):
 
          - `ENC_PROPERTY`: The property name, where encodings could be stored
 
+         - `RECODE_BUFSIZE`: The buffer size of recoding content dumps
+
+         - `INLINE_DIFF_LIMIT`: String diffs up to this size (in bytes)
+           are computed in-process even if an external differ is
+           configured
+
+         - `DIFF_SPOOL_SIZE`: The default maximum size (in bytes) of
+           content dumps kept in memory
+
         :IVariables:
          - `_settings`: The settings to use
          - `_groupset`: The groupset to process
@@ -112,6 +121,9 @@ class BaseNotifier(object):
          - `ENC_CONFIG`: ``str``
          - `ENC_DEFAULT`: ``str``
          - `ENC_PROPERTY`: ``str``
+         - `RECODE_BUFSIZE`: ``int``
+         - `INLINE_DIFF_LIMIT`: ``int``
+         - `DIFF_SPOOL_SIZE`: ``int``
 
          - `_settings`: `svnmailer.settings._base.BaseSettings`
          - `_groupset`: `svnmailer.main.GroupSet`
@@ -127,6 +139,9 @@ class BaseNotifier(object):
     ENC_CONFIG = "retrieve encoding from config"
     ENC_DEFAULT = "show default encoding"
     ENC_PROPERTY = "svnmailer:content-charset"
+    RECODE_BUFSIZE = 65536
+    INLINE_DIFF_LIMIT = 16384
+    DIFF_SPOOL_SIZE = 1024 * 1024
 
     _diffable_tests = (
         (ADD,        addFunc),
@@ -234,7 +249,9 @@ class BaseNotifier(object):
         from svnmailer import differ
 
         if command:
-            return differ.ExternalDiffer(command, self.getTempDir())
+            return differ.ExternalDiffer(command, self.getTempDir(),
+                inline_limit = self.INLINE_DIFF_LIMIT
+            )
         else:
             return differ.InternalDiffer(tags = tags)
 
@@ -248,6 +265,35 @@ class BaseNotifier(object):
         return util.TempFile(tempdir = self.getTempDir(), text = False)
 
 
+    def getSpooledTempFile(self):
+        """ Returns a temporary file container, which keeps small contents
+            in memory
+
+            :return: The container (see `getDiffSpoolSize`)
+            :rtype: `svnmailer.util.SpooledTempFile`
+        """
+        return util.SpooledTempFile(
+            tempdir = self.getTempDir(), maxsize = self.getDiffSpoolSize()
+        )
+
+
+    def getDiffSpoolSize(self):
+        """ Returns the maximum size of content dumps kept in memory
+
+            Dumps kept in memory are handed to the differ directly. Larger
+            ones are spilled to temporary files.
+
+            :return: The size in bytes (``0`` means, that the dumps are
+                     always written to temporary files)
+            :rtype: ``int``
+        """
+        size = self._settings.general.diff_spool_size
+        if size is None:
+            return self.DIFF_SPOOL_SIZE
+
+        return max(0, size)
+
+
     def getTempDir(self):
         """ Returns the temporary directory
 
@@ -318,7 +364,10 @@ class BaseNotifier(object):
 
             :return: Two file container objects plus their recoding state
                      (file1, file2, rec1, rec2), where ``rec?`` is either the
-                     accompanying original encoding or ``None``
+                     accompanying original encoding or ``None``. Small
+                     contents are kept in memory (see `getDiffSpoolSize`).
+                     If both revisions have the same content, it's dumped
+                     only once and ``file1 is file2``
             :rtype: ``tuple``
         """
         from svnmailer import stream
@@ -386,22 +435,32 @@ class BaseNotifier(object):
                 except:
                     pass
 
-        file1 = self.getTempFile()
+        file1 = self.getSpooledTempFile()
         if not change.wasAdded() or change.wasCopied():
             fp = (enc1 and enc1.lower() != 'utf-8') and \
-                stream.UnicodeStream(file1.fp, enc1) or file1.fp
+                stream.UnicodeStream(file1.fp, enc1,
+                    bufsize = self.RECODE_BUFSIZE
+                ) or file1.fp
             self._settings.runtime._repos.dumpPathContent(
                 fp, change.getBasePath(), change.getBaseRevision()
             )
+            fp.close()
         file1.close()
 
-        file2 = self.getTempFile()
-        if not change.wasDeleted():
+        if enc1 == enc2 and change.hasIdenticalContent():
+            # don't dump the same content twice
+            file2 = file1
+        else:
+            file2 = self.getSpooledTempFile()
+        if file2 is not file1 and not change.wasDeleted():
             fp = (enc2 and enc2.lower() != 'utf-8') and \
-                stream.UnicodeStream(file2.fp, enc2) or file2.fp
+                stream.UnicodeStream(file2.fp, enc2,
+                    bufsize = self.RECODE_BUFSIZE
+                ) or file2.fp
             self._settings.runtime._repos.dumpPathContent(
                 fp, change.path, change.revision
             )
+            fp.close()
         file2.close()
 
         if show_applied_charset:
@@ -413,6 +472,38 @@ class BaseNotifier(object):
         return (file1, file2, rec1, rec2)
 
 
+    def getContentLineHashes(self, change):
+        """ Returns the line hashes of the old and new content of a file
+
+            Unlike `dumpContent` the content is neither recoded nor stored
+            in temporary files. If both revisions have the same content,
+            it's not read at all (and two empty lists are returned).
+
+            :param change: The change to process
+            :type change: `svnmailer.subversion.VersionedPathDescriptor`
+
+            :return: The hash lists (``(old, new)``)
+            :rtype: ``tuple``
+        """
+        from svnmailer import stream
+
+        if change.hasIdenticalContent():
+            return ([], [])
+
+        repos = self._settings.runtime._repos
+        fp1 = stream.LineHashStream()
+        if not change.wasAdded() or change.wasCopied():
+            repos.dumpPathContent(
+                fp1, change.getBasePath(), change.getBaseRevision()
+            )
+
+        fp2 = stream.LineHashStream()
+        if not change.wasDeleted():
+            repos.dumpPathContent(fp2, change.path, change.revision)
+
+        return (fp1.getHashes(), fp2.getHashes())
+
+
     def getContentEncodings(self, change, default = None):
         """ Returns the encodings of the change content (base and current rev)
 
@@ -593,6 +684,27 @@ class BaseNotifier(object):
             return generator.getContentDiffUrl(change)
 
 
+    def isContentTooLarge(self, config, change):
+        """ Returns whether the content of a file is too large to be diffed
+
+            The decision is made from the file lengths stored in the
+            repository (``max_diff_size`` option), so no content is read.
+
+            :Parameters:
+             - `config`: group config
+             - `change`: The particular change to process
+
+            :Types:
+             - `config`: `svnmailer.settings._base.GroupSettingsContainer`
+             - `change`: `svnmailer.subversion.VersionedPathDescriptor`
+
+            :return: Is it too large?
+            :rtype: ``bool``
+        """
+        limit = config.max_diff_size
+        return bool(limit and limit > 0 and change.getContentLength() > limit)
+
+
     def isUTF8Property(self, name):
         """ Returns if the supplied property name represents an UTF-8 property
 
@@ -108,6 +108,7 @@ class MailNotifier(_text.TextNotifier):
             self.writeMetaData()
             self.writePathList()
             self.writeDiffList()
+            self.writeDiffStat()
         elif mode == MODES.propchange:
             self.writeRevPropData()
         elif mode in (MODES.lock, MODES.unlock):
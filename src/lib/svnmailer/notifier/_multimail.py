@@ -107,6 +107,7 @@ def decorateNotifier(cls, action, config, groupset):
 class MultiMailNotifier(_mail.MailNotifier):
     """ Bases class for mail notifiers using attachments for the diffs """
     __implements__ = [_mail.MailNotifier]
+    RAW_CONTENT_DIFF = True
 
     # need this (variable args) for deco classes
     def __init__(self, config, groupset, *args, **kwargs):
@@ -317,6 +318,15 @@ class SplittingDecorator(object):
         self.__super.writeMetaData()
 
 
+    def writeDiffStat(self):
+        """ Writes the diffstat summary to drop_fp as well """
+        self.__super.writeDiffStat()
+
+        summary = self.getDiffStat()
+        if summary:
+            self.drop_fp.write(summary)
+
+
     def _getMultiMails(self):
         """ Returns the multipart mail(s)
 
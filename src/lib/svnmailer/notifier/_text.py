@@ -20,12 +20,24 @@ Plain text notifier base
 """
 __author__    = "André Malo"
 __docformat__ = "restructuredtext en"
-__all__       = ['TextNotifier']
+__all__       = ['TextNotifier', 'DiffStatSummary', 'finish']
 
 # global imports
 from svnmailer.notifier import _base
 
 
+def finish(settings):
+    """ Shuts down the diff worker pools of the current run
+
+        :param settings: The svnmailer settings
+        :type settings: `svnmailer.settings._base.BaseSettings`
+    """
+    settings # pylint
+    pooled, TextNotifier._pooled_differs = TextNotifier._pooled_differs, {}
+    for differ in pooled.values():
+        differ.close()
+
+
 class TextNotifier(_base.BaseNotifier):
     """ Base class for plain text notifications
 
@@ -35,27 +47,53 @@ class TextNotifier(_base.BaseNotifier):
          - `OUTPUT_SEPARATOR`: the separator between headline and diff
          - `OUTPUT_SEPARATOR_LIGHT`: the separator between headline and
            property diff
+         - `RAW_CONTENT_DIFF`: Are the content diffs written raw? (Derived
+           classes passing ``raw = True`` to `writeContentDiff` need to set
+           it, so the prefetched dumps match)
+         - `DIFF_PREFETCH_BYTES`: The default maximum size of the content
+           dumps prefetched ahead of the writer
+         - `_pooled_differs`: The differs with worker pools shared by
+           all notifiers of the run (``{diff_command: differ}``, the
+           internal differ is stored under ``None``)
 
         :IVariables:
          - `fp`: The file to write to
          - `config`: The group config
          - `changeset`: The list of changes to process
          - `differ`: The differ object
+         - `diffstat`: The diffstat summary (or ``None``, if
+           ``show_diffstat`` is off)
+         - `_diffstat_path`: The path, whose diff is currently written
+           (or ``None``)
+         - `_prefetcher`: The diff prefetcher of the current diff list
+           (or ``None``)
 
         :Types:
          - `OUTPUT_SEPARATOR`: ``str``
          - `OUTPUT_SEPARATOR_LIGHT`: ``str``
+         - `RAW_CONTENT_DIFF`: ``bool``
+         - `DIFF_PREFETCH_BYTES`: ``int``
+         - `_pooled_differs`: ``dict``
 
          - `fp`: file like object
          - `config`: `svnmailer.settings._base.GroupSettingsContainer`
          - `changeset`: ``list``
          - `differ`: ``svnmailer.differ.*``
+         - `diffstat`: `DiffStatSummary`
+         - `_diffstat_path`: ``str``
+         - `_prefetcher`: `_DiffPrefetcher`
     """
     __implements__ = [_base.BaseNotifier]
 
     OUTPUT_SEPARATOR = "=" * 78 + "\n"
     OUTPUT_SEPARATOR_LIGHT = "-" * 78 + "\n"
+    RAW_CONTENT_DIFF = False
+    DIFF_PREFETCH_BYTES = 32 * 1024 * 1024
     fp = None
+    diffstat = None
+    _diffstat_path = None
+    _prefetcher = None
+    _pooled_differs = {}
 
 
     def __init__(self, settings, groupset):
@@ -64,6 +102,8 @@ class TextNotifier(_base.BaseNotifier):
         groups, self.changeset = (groupset.groups, groupset.changes)
         self.config = groups[0]
         self.differ = self.getDiffer(self.config.diff_command)
+        if self.config.show_diffstat:
+            self.diffstat = DiffStatSummary()
 
 
     def run(self):
@@ -176,17 +216,133 @@ class TextNotifier(_base.BaseNotifier):
         if xset:
             set.extend(xset)
 
-        for change in set:
-            for test in diff_tests:
-                if test(change):
-                    if change.hasContentChanges():
-                        self.writeContentDiff(change)
+        prefetcher = self._getDiffPrefetcher([
+            change for change in set
+            if [test for test in diff_tests if test(change)]
+        ])
+        old_differ = self.differ
+        if prefetcher is not None:
+            self._prefetcher, self.differ = prefetcher, prefetcher.differ
+        try:
+            for change in set:
+                for test in diff_tests:
+                    if test(change):
+                        if change.hasContentChanges():
+                            self.writeContentDiff(change)
+
+                        if change.hasPropertyChanges() and \
+                                self.PROPCHANGE in diff_tokens:
+                            self.writePropertyDiffs(diff_tokens, change)
+                        # one diff per change is enough
+                        break
+                else:
+                    if self.diffstat is not None and \
+                            change.hasContentChanges():
+                        self.countContentDiff(change)
+        finally:
+            if prefetcher is not None:
+                prefetcher.close()
+                self._prefetcher, self.differ = None, old_differ
+
+
+    def _getDiffPrefetcher(self, changes):
+        """ Returns the diff prefetcher for the changes to diff
+
+            The prefetcher is only used if ``diff_processes`` is greater
+            than 1. It's not available on win32 for the internal differ,
+            because ``multiprocessing`` would re-run the main script there.
+
+            :param changes: The changes, whose diffs are going to be
+                            written (in that order)
+            :type changes: ``list``
+
+            :return: The prefetcher or ``None``
+            :rtype: `_DiffPrefetcher`
+        """
+        import sys
+        from svnmailer import differ
+
+        general = self._settings.general
+        processes = general.diff_processes or 0
+        if processes < 2:
+            return None
+
+        if type(self.differ) is differ.InternalDiffer:
+            if sys.platform == 'win32':
+                return None
+            key = None
+        elif type(self.differ) is differ.ExternalDiffer:
+            key = tuple(self.config.diff_command)
+        else:
+            return None
+
+        changes = [change for change in changes
+            if change.hasContentChanges() and not change.isDirectory() and
+            not change.isBinary() and
+            not self.isContentTooLarge(self.config, change) and
+            self.getContentDiffAction(change) is not None
+        ]
+        if len(changes) < 2:
+            return None
+
+        pooled = TextNotifier._pooled_differs.get(key)
+        if pooled is None:
+            try:
+                if key is None:
+                    pooled = differ.PooledDiffer(processes)
+                else:
+                    pooled = differ.PooledExternalDiffer(
+                        self.config.diff_command, processes,
+                        self.getTempDir(), self.INLINE_DIFF_LIMIT
+                    )
+            except ImportError:
+                return None
+            TextNotifier._pooled_differs[key] = pooled
+
+        return _DiffPrefetcher(self, pooled, changes, self.RAW_CONTENT_DIFF,
+            processes * 2,
+            general.diff_prefetch_bytes or self.DIFF_PREFETCH_BYTES
+        )
+
+
+    def writeDiffStat(self):
+        """ Writes the diffstat summary (if enabled) """
+        summary = self.getDiffStat()
+        if summary:
+            self.fp.write(summary)
 
-                    if change.hasPropertyChanges() and \
-                            self.PROPCHANGE in diff_tokens:
-                        self.writePropertyDiffs(diff_tokens, change)
-                    # one diff per change is enough
-                    break
+
+    def getDiffStat(self):
+        """ Returns the diffstat summary block
+
+            :return: The summary or ``None`` (if disabled or empty)
+            :rtype: ``str``
+        """
+        if self.diffstat is not None and self.diffstat.entries:
+            return "\nDiffstat:\n%s" % self.diffstat.render()
+
+        return None
+
+
+    def countContentDiff(self, change):
+        """ Adds a changed file to the diffstat without creating a diff
+
+            :param change: The particular change to process
+            :type change: `svnmailer.subversion.VersionedPathDescriptor`
+        """
+        from svnmailer import differ
+
+        if change.isDirectory():
+            return
+        elif change.isBinary():
+            self.diffstat.addBinary(change.path)
+        elif self.isContentTooLarge(self.config, change):
+            self.diffstat.addTooLarge(change.path)
+        else:
+            deleted, added = differ.DiffStat().getLineCounts(
+                *self.getContentLineHashes(change)
+            )
+            self.diffstat.add(change.path, added, deleted)
 
 
     def writePropertyDiffs(self, diff_tokens, change, raw = False):
@@ -342,37 +498,93 @@ class TextNotifier(_base.BaseNotifier):
                     change.wasDeleted()
                 ]
             )
+            if self.diffstat is not None:
+                self.diffstat.addBinary(change.path)
+        elif self.isContentTooLarge(config, change):
+            self.fp.write("File too large - no diff available.\n")
+            if self.diffstat is not None:
+                self.diffstat.addTooLarge(change.path)
         else:
-            from svnmailer.settings import SHOWENC
+            file1, file2, rec1, rec2 = self.getContentDump(change, raw)
+            name1, name2 = self.getContentDiffNames(change)
 
-            if raw:
-                default = False
-                enc = None
+            if file1 is file2:
+                # same content, the diff is empty
+                content1 = content2 = ""
             else:
-                enc = config.apply_charset_property and \
-                    self.ENC_CONFIG or self.ENC_DEFAULT
-                default = bool(config.show_applied_charset == SHOWENC.yes)
-            show_applied_charset = bool(config.show_applied_charset == SHOWENC.yes)
-
-            default_charsets = None
-            if config.default_charsets:
-                default_charsets = config.default_charsets
-            file1, file2, rec1, rec2 = self.dumpContent(
-                change, enc = enc, default = default, default_charsets = default_charsets, show_applied_charset = show_applied_charset
-            )
-            if config.show_applied_charset == SHOWENC.no:
-                rec1 = rec2 = None
-
-            self.writeDiff(token,
-                (change.wasCopied() and
-                    [change.getBasePath()] or [change.path])[0],
-                change.path, file1.name, file2.name, isfile = True,
-                rec1 = rec1, rec2 = rec2
-            )
+                content1, content2 = file1.getvalue(), file2.getvalue()
+
+            self._diffstat_path = change.path
+            try:
+                if content1 is None or content2 is None:
+                    self.writeDiff(token, name1, name2, file1.name,
+                        file2.name, isfile = True, rec1 = rec1, rec2 = rec2
+                    )
+                else:
+                    self.writeDiff(token, name1, name2, content1, content2,
+                        content = True, rec1 = rec1, rec2 = rec2
+                    )
+            finally:
+                self._diffstat_path = None
 
         self.fp.write("\n")
 
 
+    def getContentDump(self, change, raw = False):
+        """ Returns the content dump of a change to diff
+
+            If the dump was prefetched (see `writeDiffList`), it's taken
+            from there.
+
+            :Parameters:
+             - `change`: The particular change to process
+             - `raw`: Prefer no recoding?
+
+            :Types:
+             - `change`: `svnmailer.subversion.VersionedPathDescriptor`
+             - `raw`: ``bool``
+
+            :return: The two files and the encodings to show
+                     (``(file1, file2, rec1, rec2)``)
+            :rtype: ``tuple``
+        """
+        if self._prefetcher is not None:
+            dump = self._prefetcher.get(change, raw)
+            if dump is not None:
+                return dump
+
+        return self._dumpContentForDiff(change, raw)
+
+
+    def _dumpContentForDiff(self, change, raw = False):
+        """ Dumps the content of a change to diff
+
+            :see: `getContentDump`
+        """
+        from svnmailer.settings import SHOWENC
+
+        config = self.config
+        if raw:
+            default = False
+            enc = None
+        else:
+            enc = config.apply_charset_property and \
+                self.ENC_CONFIG or self.ENC_DEFAULT
+            default = bool(config.show_applied_charset == SHOWENC.yes)
+        show_applied_charset = bool(config.show_applied_charset == SHOWENC.yes)
+
+        default_charsets = None
+        if config.default_charsets:
+            default_charsets = config.default_charsets
+        file1, file2, rec1, rec2 = self.dumpContent(
+            change, enc = enc, default = default, default_charsets = default_charsets, show_applied_charset = show_applied_charset
+        )
+        if config.show_applied_charset == SHOWENC.no:
+            rec1 = rec2 = None
+
+        return (file1, file2, rec1, rec2)
+
+
     def writeContentDiffAction(self, change):
         """ Writes the content diff action for a particular change
 
@@ -401,12 +613,13 @@ class TextNotifier(_base.BaseNotifier):
 
 
     def writeDiff(self, token, name1, name2, value1, value2, isfile = False,
-                  rec1 = None, rec2 = None, time = None):
+                  rec1 = None, rec2 = None, time = None, content = False):
         """ Writes a diff
 
             By default `value1` and `value2` are strings to diff,
             but if `isfile` is set and ``True``, these are treated as names
-            of files to diff.
+            of files to diff. If `content` is set and ``True``, they are
+            file contents held in memory.
 
             :Parameters:
              - `token`: The diff token
@@ -415,6 +628,7 @@ class TextNotifier(_base.BaseNotifier):
              - `value1`: The first value
              - `value2`: The second value
              - `isfile`: are the values file names?
+             - `content`: are the values file contents?
 
             :Types:
              - `token`: ``unicode``
@@ -423,26 +637,47 @@ class TextNotifier(_base.BaseNotifier):
              - `value1`: ``str``
              - `value2`: ``str``
              - `isfile`: ``bool``
+             - `content`: ``bool``
         """
-        date1 = ["(original)", "(added)"][token == self.ADD]
-        date2 = [self.getDate(time), "(removed)"][token == self.DELETE]
+        date1, date2 = self.getDiffDates(token, rec1, rec2, time)
 
-        if rec1 and token != self.ADD:
-            date1 = "[%s] %s" % (rec1, date1)
-        if rec2 and token != self.DELETE:
-            date2 = "[%s] %s" % (rec2, date2)
+        if isfile:
+            meth = self.differ.getFileDiff
+        elif content:
+            meth = self.differ.getContentDiff
+        else:
+            meth = self.differ.getStringDiff
 
-        meth = [
-            self.differ.getStringDiff, self.differ.getFileDiff
-        ][bool(isfile)]
+        if content and value1 == value2:
+            # same content, no need to ask the differ
+            diff = ()
+        else:
+            diff = meth(value1, value2, name1, name2, date1, date2)
 
         diff_empty = True
-        for line in meth(value1, value2, name1, name2, date1, date2):
+        counting = self._diffstat_path is not None and \
+            self.diffstat is not None
+        added = deleted = 0
+        in_hunk = False
+        for line in diff:
             diff_empty = False
             self.fp.write(line)
             if not line.endswith("\n"):
                 self.fp.write("\n")
 
+            if counting:
+                char = line[:1]
+                if char == '@':
+                    in_hunk = True
+                elif in_hunk:
+                    if char == '+':
+                        added += 1
+                    elif char == '-':
+                        deleted += 1
+
+        if counting:
+            self.diffstat.add(self._diffstat_path, added, deleted)
+
         if diff_empty:
             if rec1 != None and rec2 != None and rec1 != rec2:
                 self.fp.write("--- ")
@@ -459,6 +694,53 @@ class TextNotifier(_base.BaseNotifier):
             self.fp.write("    (empty)\n")
 
 
+    def getDiffDates(self, token, rec1 = None, rec2 = None, time = None):
+        """ Returns the date descriptions of a diff
+
+            :Parameters:
+             - `token`: The diff token
+             - `rec1`: The encoding of the first value to show (or ``None``)
+             - `rec2`: The encoding of the second value to show
+               (or ``None``)
+             - `time`: Time to display in seconds since epoch
+               (``None`` means the revision time)
+
+            :Types:
+             - `token`: ``unicode``
+             - `rec1`: ``str``
+             - `rec2`: ``str``
+             - `time`: ``int``
+
+            :return: The two descriptions (``(date1, date2)``)
+            :rtype: ``tuple``
+        """
+        date1 = ["(original)", "(added)"][token == self.ADD]
+        date2 = [self.getDate(time), "(removed)"][token == self.DELETE]
+
+        if rec1 and token != self.ADD:
+            date1 = "[%s] %s" % (rec1, date1)
+        if rec2 and token != self.DELETE:
+            date2 = "[%s] %s" % (rec2, date2)
+
+        return (date1, date2)
+
+
+    def getContentDiffNames(self, change):
+        """ Returns the (faked) file names of a content diff
+
+            :param change: The particular change to process
+            :type change: `svnmailer.subversion.VersionedPathDescriptor`
+
+            :return: The two names (``(name1, name2)``)
+            :rtype: ``tuple``
+        """
+        return (
+            (change.wasCopied() and
+                [change.getBasePath()] or [change.path])[0],
+            change.path,
+        )
+
+
     def writePathList(self):
         """ Writes the commit path list """
         self._doWritePathList(self.changeset)
@@ -555,3 +837,241 @@ class TextNotifier(_base.BaseNotifier):
             self.fp.write("\n")
 
         self.fp.write("\n")
+
+
+class DiffStatSummary(object):
+    """ Collects changed line counts per file and renders a histogram
+
+        :CVariables:
+         - `WIDTH`: The maximum width of the histogram bars
+
+        :IVariables:
+         - `entries`: The collected entries
+           (``[(path, added, deleted), ...]``). For files without counts
+           (binary or too large) ``added`` is ``None`` and ``deleted`` is
+           the marker to show instead
+
+        :Types:
+         - `WIDTH`: ``int``
+         - `entries`: ``list``
+    """
+    WIDTH = 40
+
+    def __init__(self):
+        """ Initialization """
+        self.entries = []
+
+
+    def add(self, path, added, deleted):
+        """ Adds the counts of a text file
+
+            :Parameters:
+             - `path`: The path of the file
+             - `added`: The number of added lines
+             - `deleted`: The number of deleted lines
+
+            :Types:
+             - `path`: ``str``
+             - `added`: ``int``
+             - `deleted`: ``int``
+        """
+        self.entries.append((path, added, deleted))
+
+
+    def addBinary(self, path):
+        """ Adds a binary file
+
+            :param path: The path of the file
+            :type path: ``str``
+        """
+        self.entries.append((path, None, "Bin"))
+
+
+    def addTooLarge(self, path):
+        """ Adds a file, which was too large to be diffed
+
+            :param path: The path of the file
+            :type path: ``str``
+        """
+        self.entries.append((path, None, "Big"))
+
+
+    def render(self):
+        """ Returns the summary block
+
+            :return: The summary (one line per file and a total line)
+            :rtype: ``str``
+        """
+        pathwidth = max([len(entry[0]) for entry in self.entries])
+        maxcount = max([0] + [added + deleted
+            for _, added, deleted in self.entries if added is not None
+        ])
+        countwidth = len(str(maxcount))
+        scale = maxcount > self.WIDTH and \
+            float(self.WIDTH) / maxcount or 1.0
+
+        lines = []
+        total_added = total_deleted = 0
+        for path, added, deleted in self.entries:
+            if added is None:
+                lines.append(" %-*s | %*s\n" % (
+                    pathwidth, path, countwidth, deleted
+                ))
+                continue
+
+            total_added += added
+            total_deleted += deleted
+            plus, minus = int(added * scale), int(deleted * scale)
+            if added and not plus:
+                plus = 1
+            if deleted and not minus:
+                minus = 1
+            lines.append(" %-*s | %*d %s%s\n" % (
+                pathwidth, path, countwidth, added + deleted,
+                "+" * plus, "-" * minus,
+            ))
+
+        lines.append(
+            " %d file%s changed, %d insertion%s(+), %d deletion%s(-)\n" % (
+                len(self.entries), ["s", ""][len(self.entries) == 1],
+                total_added, ["s", ""][total_added == 1],
+                total_deleted, ["s", ""][total_deleted == 1],
+            )
+        )
+
+        return ''.join(lines)
+
+
+class _DiffPrefetcher(object):
+    """ Dumps contents ahead of the writer and lets a pool diff them
+
+        The dumps are done in the main process (they need the repository).
+        The number of outstanding diffs and the size of their dumps are
+        limited.
+
+        :IVariables:
+         - `differ`: The pooled differ
+         - `_notifier`: The notifier
+         - `_pending`: The changes not dumped yet (in order)
+         - `_raw`: The ``raw`` flag of the dumps
+         - `_maxjobs`: The maximum number of outstanding dumps
+         - `_maxbytes`: The maximum size of the outstanding dumps
+         - `_dumps`: The outstanding dumps (``{change: (dump, size)}``)
+         - `_bytes`: The size of the outstanding dumps
+
+        :Types:
+         - `differ`: `svnmailer.differ.PooledDiffer` or
+           `svnmailer.differ.PooledExternalDiffer`
+         - `_notifier`: `TextNotifier`
+         - `_pending`: ``list``
+         - `_raw`: ``bool``
+         - `_maxjobs`: ``int``
+         - `_maxbytes`: ``int``
+         - `_dumps`: ``dict``
+         - `_bytes`: ``int``
+    """
+
+    def __init__(self, notifier, pooled, changes, raw, maxjobs, maxbytes):
+        """ Initialization
+
+            :Parameters:
+             - `notifier`: The notifier
+             - `pooled`: The pooled differ
+             - `changes`: The changes to diff (in order)
+             - `raw`: The ``raw`` flag of the dumps
+             - `maxjobs`: The maximum number of outstanding dumps
+             - `maxbytes`: The maximum size of the outstanding dumps
+
+            :Types:
+             - `notifier`: `TextNotifier`
+             - `pooled`: `svnmailer.differ.PooledDiffer` or
+               `svnmailer.differ.PooledExternalDiffer`
+             - `changes`: ``list``
+             - `raw`: ``bool``
+             - `maxjobs`: ``int``
+             - `maxbytes`: ``int``
+        """
+        self._notifier = notifier
+        self.differ = pooled
+        self._pending = changes[:]
+        self._pending.reverse()
+        self._raw = raw
+        self._maxjobs = maxjobs
+        self._maxbytes = maxbytes
+        self._dumps = {}
+        self._bytes = 0
+
+
+    def get(self, change, raw):
+        """ Returns the dump of a change and prefetches the next ones
+
+            :Parameters:
+             - `change`: The change
+             - `raw`: The ``raw`` flag of the requested dump
+
+            :Types:
+             - `change`: `svnmailer.subversion.VersionedPathDescriptor`
+             - `raw`: ``bool``
+
+            :return: The dump (see `TextNotifier.getContentDump`) or
+                     ``None``, if it's not prefetched
+            :rtype: ``tuple``
+        """
+        if raw != self._raw:
+            return None
+
+        while change not in self._dumps and self._pending:
+            self._prefetch()
+
+        try:
+            dump, size = self._dumps.pop(change)
+        except KeyError:
+            return None
+        self._bytes -= size
+
+        # now run ahead
+        while self._pending and len(self._dumps) < self._maxjobs and \
+                self._bytes < self._maxbytes:
+            self._prefetch()
+
+        return dump
+
+
+    def close(self):
+        """ Drops the outstanding dumps """
+        self._pending = []
+        self._dumps.clear()
+        self.differ.forget()
+
+
+    def _prefetch(self):
+        """ Dumps the next change and starts diffing it """
+        import os
+
+        change = self._pending.pop()
+        dump = self._notifier._dumpContentForDiff(change, self._raw)
+        file1, file2, rec1, rec2 = dump
+        content1, content2 = file1.getvalue(), file2.getvalue()
+        if file1 is file2 or (content1 is not None and content1 == content2):
+            # same content, nothing to diff
+            self._dumps[change] = (dump, 0)
+            return
+
+        notifier = self._notifier
+        name1, name2 = notifier.getContentDiffNames(change)
+        date1, date2 = notifier.getDiffDates(
+            notifier.getContentDiffAction(change), rec1, rec2
+        )
+        if content1 is not None and content2 is not None:
+            # held in memory, pass it to the differ directly
+            size = len(content1) + len(content2)
+            self.differ.prefetchContentDiff(
+                content1, content2, name1, name2, date1, date2
+            )
+        else:
+            size = os.path.getsize(file1.name) + os.path.getsize(file2.name)
+            self.differ.prefetchFileDiff(
+                file1.name, file2.name, name1, name2, date1, date2
+            )
+        self._dumps[change] = (dump, size)
+        self._bytes += size
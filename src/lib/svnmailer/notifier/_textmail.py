@@ -310,6 +310,15 @@ class SplittingDecorator(object):
         self._flushToFinalStream()
 
 
+    def writeDiffStat(self):
+        """ Appends the diffstat summary to the last part and the summary """
+        summary = self.getDiffStat()
+        if summary:
+            self._flushToFinalStream()
+            self.final_fp.write(summary)
+            self.drop_fp.write(summary)
+
+
     def writePropertyDiffs(self, diff_tokens, change):
         """ write the stuff to the real stream """
         self.__super.writePropertyDiffs(diff_tokens, change)
@@ -344,6 +353,13 @@ class TruncatingDecorator(object):
         return self.__super._getMailWriter(fp)
 
 
+    def writeDiffStat(self):
+        """ Writes the diffstat summary regardless of the truncation """
+        summary = self.getDiffStat()
+        if summary:
+            self.fp.writeWithoutTruncation(summary)
+
+
 class URLDecorator(object):
     """ Shows only the urls, if the mail gets too long
 
@@ -437,6 +453,15 @@ class URLDecorator(object):
             self.url_fp.write("\n")
 
 
+    def writeDiffStat(self):
+        """ Writes the diffstat summary to both streams """
+        self.__super.writeDiffStat()
+
+        summary = self.getDiffStat()
+        if summary:
+            self.url_fp.write(summary)
+
+
 class URLTruncatingDecorator(object):
     """ Truncates the mail body after n bytes """
 
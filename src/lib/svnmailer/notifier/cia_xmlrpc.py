@@ -45,11 +45,19 @@ The notifier runs only in the post-commit hook. For activation you need
 to supply the ``cia_rpc_server`` option in ``[general]`` and at least a
 ``cia_project_name`` in the group that should be tracked by CIA.
 
+All messages of a run are delivered over one (keep-alive) connection.
+``cia_rpc_timeout`` limits the time spent on a single request. If
+``cia_rpc_background`` is true, the messages are delivered by a background
+thread while the other notifiers are running. ``cia_rpc_timeout`` then also
+limits the time to wait for outstanding messages at the end of the run
+(it defaults to 60 seconds in this case, so a hanging server can't block
+the hook).
+
 .. _CIA server: http://cia.navi.cx/
 """
 __author__    = "André Malo"
 __docformat__ = "restructuredtext en"
-__all__       = ['getNotifier']
+__all__       = ['getNotifier', 'finish', 'Error', 'DeliveryError']
 
 # global imports
 from svnmailer.notifier import _base
@@ -76,27 +84,58 @@ def getNotifier(config, groupset):
     return []
 
 
+def finish(config):
+    """ Finishes the message delivery of the current run
+
+        :param config: The svnmailer config
+        :type config: `svnmailer.settings._base.BaseSettings`
+
+        :exception DeliveryError: One or more background deliveries failed
+    """
+    config # pylint
+    CIAXMLRPCNotifier.finish()
+
+
+class Error(Exception):
+    """ Base exception for this module """
+    pass
+
+class DeliveryError(Error):
+    """ The message delivery failed """
+    pass
+
+
 class CIAXMLRPCNotifier(_base.BaseNotifier):
     """ The CIA XML-RPC Notifier class
 
         :IVariables:
          - `config`: The current group configuration
          - `changeset`: The changeset to process
-         - `differ`: The differ object
+         - `diffstat`: The changed line counter
+
+        :CVariables:
+         - `DIFFSTAT_MAXLINES`: The number of changed lines per file, above
+           which the line count is estimated by sampling
+         - `_delivery`: The message delivery of the current run
 
         :Types:
          - `config`: `svnmailer.settings._base.GroupSettingsContainer`
          - `changeset`: ``list``
-         - `differ`: ``svnmailer.differ.*``
+         - `diffstat`: `svnmailer.differ.DiffStat`
+         - `DIFFSTAT_MAXLINES`: ``int``
+         - `_delivery`: `_Delivery`
     """
     __implements__ = [_base.BaseNotifier]
+    DIFFSTAT_MAXLINES = 50000
+    _delivery = None
 
 
     def __init__(self, config, groupset):
         """ Initialization """
+        from svnmailer import differ
+
         super(CIAXMLRPCNotifier, self).__init__(config, groupset)
-        # we use difflib's opcode output
-        self.differ = self.getDiffer(tags = True)
+        self.diffstat = differ.DiffStat(maxlines = self.DIFFSTAT_MAXLINES)
         self.changeset = None
         self.config = None
 
@@ -131,9 +170,32 @@ class CIAXMLRPCNotifier(_base.BaseNotifier):
             :param doc: The message document
             :type doc: DOM object
         """
-        import xmlrpclib
-        server = xmlrpclib.ServerProxy(self._settings.general.cia_rpc_server)
-        server.hub.deliver(doc.toxml(encoding = 'utf-8'))
+        general = self._settings.general
+        url = general.cia_rpc_server.encode('utf-8')
+
+        delivery = CIAXMLRPCNotifier._delivery
+        if delivery is not None and delivery.url != url:
+            delivery.finish()
+            delivery = None
+        if delivery is None:
+            delivery = CIAXMLRPCNotifier._delivery = _Delivery(
+                url, general.cia_rpc_timeout, general.cia_rpc_background
+            )
+
+        delivery.deliver(doc.toxml(encoding = 'utf-8'))
+
+
+    def finish(cls):
+        """ Finishes the message delivery of the current run
+
+            :exception DeliveryError: One or more background deliveries
+                                      failed
+        """
+        delivery, cls._delivery = cls._delivery, None
+        if delivery is not None:
+            delivery.finish()
+
+    finish = classmethod(finish)
 
 
     def composeCIAXMLMessage(self):
@@ -251,8 +313,9 @@ class CIAXMLRPCNotifier(_base.BaseNotifier):
     def _getDiffLineCount(self):
         """ Returns the number of changed lines
 
-            It counts the number of minus lines and the number of plus lines
-            and returns the greater value.
+            The number is computed by `svnmailer.differ.DiffStat`, which
+            only looks at line hashes. The contents are neither recoded
+            nor stored in temporary files.
 
             :return: The diff line count or ``None``
             :rtype: ``unicode``
@@ -260,49 +323,24 @@ class CIAXMLRPCNotifier(_base.BaseNotifier):
         count = 0
         for change in self.changeset:
             # content
-            if not (change.isDirectory() or change.isBinary()):
-                file1, file2 = self.dumpContent(change)[:2]
-                diff_out = self.differ.getFileDiff(
-                    file1.name, file2.name, '1', '2',
+            if not (change.isDirectory() or change.isBinary() or
+                    self.isContentTooLarge(self.config, change)):
+                count += self.diffstat.getLineCount(
+                    *self.getContentLineHashes(change)
                 )
-                count += self._getTagCount(diff_out)
-                del file1, file2, diff_out
 
             # properties
             if change.hasPropertyChanges():
                 propdict = change.getModifiedProperties()
-                for name, values in propdict.items():
+                for values in propdict.values():
                     if not self.isBinaryProperty(values):
-                        diff_out = self.differ.getStringDiff(
-                            values[0], values[1], name, name
+                        count += self.diffstat.getStringLineCount(
+                            values[0], values[1]
                         )
-                        count += self._getTagCount(diff_out)
-                        del diff_out
 
         return count and unicode(count) or None
 
 
-    def _getTagCount(self, diff_out):
-        """ Returns the number of changed lines for a diff
-
-            :param diff_out: The diff output (one opcode per item)
-            :type diff_out: iterable
-
-            :return: Number of changed lines
-            :rtype: ``int``
-        """
-        lines = 0
-        for tag, a1, a2, b1, b2 in diff_out:
-            if tag == 'A':   # added
-                lines += b2 - b1
-            elif tag == 'D': # deleted
-                lines += a2 - a1
-            elif tag == 'M': # modified
-                lines += max(a2 - a1, b2 - b1)
-
-        return lines
-
-
     def _getFileUri(self, change):
         """ Returns an URL associated with the changed file
 
@@ -443,3 +481,195 @@ class CIAXMLRPCNotifier(_base.BaseNotifier):
                 elem.setAttribute(key, util.filterForXml(value))
 
         return elem
+
+
+class _Delivery(object):
+    """ XML-RPC message delivery to the CIA server
+
+        :CVariables:
+         - `BACKGROUND_TIMEOUT`: The timeout in seconds for background
+           deliveries, if none is configured
+
+        :IVariables:
+         - `url`: The server URL
+         - `timeout`: The timeout in seconds (or ``None``)
+         - `_proxy`: The server proxy
+         - `_transport`: The (keep-alive) transport
+         - `_queue`: The message queue of the background thread
+         - `_thread`: The background thread (or ``None``)
+         - `_errors`: The errors of the background deliveries
+
+        :Types:
+         - `BACKGROUND_TIMEOUT`: ``int``
+
+         - `url`: ``str``
+         - `timeout`: ``int``
+         - `_proxy`: ``xmlrpclib.ServerProxy``
+         - `_transport`: ``xmlrpclib.Transport``
+         - `_queue`: ``Queue.Queue``
+         - `_thread`: ``threading.Thread``
+         - `_errors`: ``list``
+    """
+    BACKGROUND_TIMEOUT = 60
+
+    def __init__(self, url, timeout = None, background = False):
+        """ Initialization
+
+            :Parameters:
+             - `url`: The server URL
+             - `timeout`: The timeout in seconds (defaults to
+               `BACKGROUND_TIMEOUT` for background deliveries)
+             - `background`: Deliver the messages in a background thread?
+
+            :Types:
+             - `url`: ``str``
+             - `timeout`: ``int``
+             - `background`: ``bool``
+        """
+        import xmlrpclib
+
+        if not timeout and background:
+            timeout = self.BACKGROUND_TIMEOUT
+
+        self.url = url
+        self.timeout = timeout or None
+        self._transport = _getTransport(url, self.timeout)
+        self._proxy = xmlrpclib.ServerProxy(url, transport = self._transport)
+        self._queue = None
+        self._thread = None
+        self._errors = []
+        if background:
+            import Queue, threading
+
+            self._queue = Queue.Queue()
+            self._thread = threading.Thread(target = self._run)
+            self._thread.setDaemon(True)
+            self._thread.start()
+
+
+    def deliver(self, message):
+        """ Delivers a message
+
+            :param message: The XML message
+            :type message: ``str``
+        """
+        if self._thread is None:
+            self._proxy.hub.deliver(message)
+        else:
+            self._queue.put(message)
+
+
+    def finish(self):
+        """ Waits for the background thread and closes the connection
+
+            :exception DeliveryError: One or more background deliveries
+                                      failed
+        """
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(self.timeout)
+            if self._thread.isAlive():
+                self._errors.append(
+                    "CIA delivery to %s did not finish within %s seconds" %
+                    (self.url, self.timeout)
+                )
+            else:
+                self._close()
+        else:
+            self._close()
+
+        if self._errors:
+            raise DeliveryError(*self._errors)
+
+
+    def _close(self):
+        """ Closes the connection
+
+            Transports keep their connection only since python 2.7, older
+            ones have nothing to close.
+        """
+        close = getattr(self._transport, 'close', None)
+        if close is not None:
+            close()
+
+
+    def _run(self):
+        """ Delivers the queued messages (background thread) """
+        import sys, traceback
+
+        while True:
+            message = self._queue.get()
+            if message is None:
+                break
+            try:
+                self._proxy.hub.deliver(message)
+            except:
+                info = sys.exc_info()
+                self._errors.append(''.join(
+                    traceback.format_exception(info[0], info[1], info[2])
+                ))
+                del info
+
+
+def _getTransport(url, timeout):
+    """ Returns a keep-alive XML-RPC transport suitable for the URL
+
+        :Parameters:
+         - `url`: The server URL
+         - `timeout`: The timeout of the connections in seconds (or ``None``)
+
+        :Types:
+         - `url`: ``str``
+         - `timeout`: ``int``
+
+        :return: The transport
+        :rtype: ``xmlrpclib.Transport``
+    """
+    import urllib, xmlrpclib
+
+    if (urllib.splittype(url)[0] or '').lower() == 'https':
+        base = xmlrpclib.SafeTransport
+    else:
+        base = xmlrpclib.Transport
+
+    class TimeoutTransport(base):
+        """ Transport with timeout """
+
+        def make_connection(self, host):
+            """ Returns the (cached) connection """
+            conn = base.make_connection(self, host)
+            if timeout:
+                # before python 2.7 the connection is wrapped into an
+                # httplib.HTTP(S) compat object
+                _setTimeout(getattr(conn, '_conn', conn), timeout)
+            return conn
+
+    return TimeoutTransport()
+
+
+def _setTimeout(conn, timeout):
+    """ Sets the timeout of a ``httplib`` connection
+
+        Before python 2.6 the connections don't support timeouts, so
+        the timeout is set on the socket after connecting (the connect
+        itself is not limited then).
+
+        :Parameters:
+         - `conn`: The connection
+         - `timeout`: The timeout in seconds
+
+        :Types:
+         - `conn`: ``httplib.HTTPConnection``
+         - `timeout`: ``int``
+    """
+    if hasattr(conn, 'timeout'):
+        conn.timeout = timeout
+    else:
+        connect = conn.connect
+
+        def timeoutconnect():
+            """ Connects and sets the socket timeout """
+            connect()
+            conn.sock.settimeout(timeout)
+
+        conn.connect = timeoutconnect
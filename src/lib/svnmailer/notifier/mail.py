@@ -20,7 +20,16 @@ Text based email notifiers (either piped to a program or via SMTP)
 """
 __author__    = "André Malo"
 __docformat__ = "restructuredtext en"
-__all__       = ['getNotifier']
+__all__       = ['getNotifier', 'finish', 'Error', 'SendmailError']
+
+
+class Error(Exception):
+    """ Base exception for this module """
+    pass
+
+class SendmailError(Error):
+    """ The mailer command exited with a non-zero status """
+    pass
 
 
 def getNotifier(config, groupset):
@@ -56,6 +65,18 @@ def getNotifier(config, groupset):
     return []
 
 
+def finish(config):
+    """ Waits for pending mail submissions
+
+        :param config: The svnmailer config
+        :type config: `svnmailer.settings._base.BaseSettings`
+
+        :exception SendmailError: One or more mailer commands failed
+    """
+    config # pylint
+    SendmailSubmitter.finish()
+
+
 class SMTPSubmitter(object):
     """ Use SMTP to submit the mail """
     _settings = None
@@ -86,20 +107,59 @@ class SMTPSubmitter(object):
 
 
 class SendmailSubmitter(object):
-    """ Pipe all stuff to a mailer """
+    """ Pipe all stuff to a mailer
+
+        If ``sendmail_processes`` is configured to be greater than 1, the
+        mailer commands are not waited for immediately. Up to that number
+        of mailers run in parallel and are reaped by `finish`.
+
+        :CVariables:
+         - `_batch`: The pending submissions of the current run
+
+        :Types:
+         - `_batch`: `_SendmailBatch`
+    """
     _settings = None
+    _batch = None
 
     def sendMail(self, sender, to_addr, mail):
-        """ Sends the mail via a piped mailer """
+        """ Sends the mail via a piped mailer
+
+            :exception SendmailError: The mailer command failed (only
+                                      raised here in synchronous mode)
+        """
         from svnmailer import processes
 
-        pipe = processes.Process.pipe2(self._getMailCommand(sender, to_addr))
+        command = self._getMailCommand(sender, to_addr)
+        pipe = processes.Process.pipe2(command)
         pipe.fromchild.close() # we don't expect something
-        mail.dump(pipe.tochild)
-        pipe.tochild.close()
+        try:
+            mail.dump(pipe.tochild)
+        finally:
+            pipe.tochild.close()
+
+        maxprocs = self._settings.general.sendmail_processes or 1
+        if maxprocs > 1:
+            batch = SendmailSubmitter._batch
+            if batch is None:
+                batch = SendmailSubmitter._batch = _SendmailBatch()
+            batch.add(pipe, command, maxprocs)
+        else:
+            status = pipe.wait()
+            if status:
+                raise SendmailError(_getSendmailErrorMessage(command, status))
+
+
+    def finish(cls):
+        """ Waits for all pending mailers of the current run
 
-        # what do we do with the return code?
-        pipe.wait()
+            :exception SendmailError: One or more mailer commands failed
+        """
+        batch, cls._batch = cls._batch, None
+        if batch is not None:
+            batch.finish()
+
+    finish = classmethod(finish)
 
 
     def _getMailCommand(self, sender, to_addr):
@@ -127,3 +187,78 @@ class SendmailSubmitter(object):
         cmd.extend(to_addr)
 
         return cmd
+
+
+class _SendmailBatch(object):
+    """ Bounded set of running mailer processes
+
+        :IVariables:
+         - `_running`: The running processes (``[(process, command), ...]``)
+         - `_failed`: The error messages of failed mailers
+
+        :Types:
+         - `_running`: ``list``
+         - `_failed`: ``list``
+    """
+
+    def __init__(self):
+        """ Initialization """
+        self._running = []
+        self._failed = []
+
+
+    def add(self, pipe, command, maxprocs):
+        """ Adds a running mailer
+
+            If there are already `maxprocs` mailers running, the oldest
+            ones are waited for first.
+
+            :Parameters:
+             - `pipe`: The mailer process (stdin already closed)
+             - `command`: The mailer command (for error messages)
+             - `maxprocs`: The maximum number of running mailers
+
+            :Types:
+             - `pipe`: `svnmailer.processes.Process`
+             - `command`: ``list``
+             - `maxprocs`: ``int``
+        """
+        while len(self._running) >= maxprocs:
+            self._reap()
+        self._running.append((pipe, command))
+
+
+    def finish(self):
+        """ Waits for all running mailers
+
+            :exception SendmailError: One or more mailer commands failed
+        """
+        while self._running:
+            self._reap()
+        if self._failed:
+            raise SendmailError(*self._failed)
+
+
+    def _reap(self):
+        """ Waits for the oldest running mailer and records failures """
+        pipe, command = self._running.pop(0)
+        status = pipe.wait()
+        if status:
+            self._failed.append(_getSendmailErrorMessage(command, status))
+
+
+def _getSendmailErrorMessage(command, status):
+    """ Returns the error message for a failed mailer
+
+        :Parameters:
+         - `command`: The mailer command
+         - `status`: The exit status
+
+        :Types:
+         - `command`: ``list``
+         - `status`: ``int``
+
+        :return: The message
+        :rtype: ``str``
+    """
+    return "Mailer command %r exited with status %s" % (command, status)
@@ -20,7 +20,7 @@ Text based news notifier (via NNTP)
 """
 __author__    = "André Malo"
 __docformat__ = "restructuredtext en"
-__all__       = ['getNotifier']
+__all__       = ['getNotifier', 'finish']
 
 
 def getNotifier(settings, groupset):
@@ -49,29 +49,236 @@ def getNotifier(settings, groupset):
     return []
 
 
+def finish(settings):
+    """ Closes the NNTP connections of the current run
+
+        :param settings: The svnmailer settings
+        :type settings: `svnmailer.settings._base.BaseSettings`
+    """
+    settings # pylint
+    NNTPSubmitter.finish()
+
+
 class NNTPSubmitter(object):
-    """ Use NNTP to submit the notification as news article """
+    """ Use NNTP to submit the notification as news article
+
+        The connection is kept open for the whole run and shared by all
+        groupsets. It's closed by `finish`.
+
+        :CVariables:
+         - `_session`: The open session (or ``None``)
+
+        :Types:
+         - `_session`: `_NNTPSession`
+    """
     _settings = None
+    _session = None
 
     def sendNews(self, posting):
         """ Sends the posting via nntp """
-        import cStringIO, nntplib
+        import nntplib
+
+        general = self._settings.general
+        host, port = (general.nntp_host, nntplib.NNTP_PORT)
+        if ':' in host and host.find(':') == host.rfind(':'):
+            host, port = host.split(':', 1)
+        params = (host, int(port), general.nntp_user, general.nntp_pass)
+
+        session = NNTPSubmitter._session
+        if session is not None and session.params != params:
+            session.close()
+            session = None
+        if session is None:
+            session = NNTPSubmitter._session = _NNTPSession(params)
+
+        session.post(posting)
+
+
+    def finish(cls):
+        """ Closes the session of the current run """
+        session, cls._session = cls._session, None
+        if session is not None:
+            session.close()
+
+    finish = classmethod(finish)
 
-        fp = cStringIO.StringIO()
+
+class _NNTPSession(object):
+    """ Reusable NNTP connection
+
+        If the connection turns out to be dead when a new posting is
+        started, it's reopened and the posting is tried again. Failures
+        after the article data has been sent are not retried (the article
+        might have been accepted already), but the connection is dropped.
+
+        :IVariables:
+         - `params`: The connection parameters
+           (``(host, port, user, password)``)
+         - `_conn`: The connection (or ``None``)
+
+        :Types:
+         - `params`: ``tuple``
+         - `_conn`: ``nntplib.NNTP``
+    """
+
+    def __init__(self, params):
+        """ Initialization
+
+            :param params: The connection parameters
+                           (``(host, port, user, password)``)
+            :type params: ``tuple``
+        """
+        self.params = params
+        self._conn = None
+
+
+    def post(self, posting):
+        """ Posts an article
+
+            :param posting: The posting object
+            :type posting: ``_textmail._TextMail``
+        """
+        import nntplib, socket
+
+        reused = self._conn is not None
+        conn = self._connect()
         try:
-            posting.dump(fp)
-            fp.seek(0)
+            resp = conn.shortcmd('POST')
+        except (socket.error, EOFError, nntplib.NNTPTemporaryError):
+            self.close(abort = True)
+            if not reused:
+                raise
+            conn = self._connect()
+            resp = conn.shortcmd('POST')
+
+        if resp[:1] != '3':
+            raise nntplib.NNTPReplyError(resp)
 
-            general = self._settings.general
-            host, port = (general.nntp_host, nntplib.NNTP_PORT)
-            if ':' in host and host.find(':') == host.rfind(':'):
-                host, port = host.split(':', 1)
+        try:
+            writer = _PostingWriter(conn.sock)
+            posting.dump(writer)
+            writer.close()
+            conn.getresp()
+        except:
+            self.close(abort = True)
+            raise
 
-            conn = nntplib.NNTP(
-                host = host, port = int(port), readermode = True,
-                user = general.nntp_user, password = general.nntp_pass,
+
+    def close(self, abort = False):
+        """ Closes the connection
+
+            :param abort: Drop the connection without saying goodbye?
+            :type abort: ``bool``
+        """
+        import nntplib, socket
+
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            if not abort:
+                try:
+                    conn.quit()
+                    return
+                except (socket.error, EOFError, nntplib.NNTPError):
+                    pass
+            try:
+                conn.file.close()
+                conn.sock.close()
+            except (AttributeError, socket.error):
+                pass
+
+
+    def _connect(self):
+        """ Returns the open connection (and opens it if necessary)
+
+            :return: The connection
+            :rtype: ``nntplib.NNTP``
+        """
+        import nntplib
+
+        if self._conn is None:
+            host, port, user, password = self.params
+            self._conn = nntplib.NNTP(
+                host = host, port = port, readermode = True,
+                user = user, password = password,
             )
-            conn.post(fp)
-            conn.quit()
-        finally:
-            fp.close()
+
+        return self._conn
+
+
+class _PostingWriter(object):
+    """ Stream, which sends the article data to the NNTP server
+
+        Lines are terminated with CRLF and dot-stuffed. The data is sent in
+        chunks of about `CHUNKSIZE` bytes.
+
+        :CVariables:
+         - `CHUNKSIZE`: The approximate size of the sent chunks
+
+        :IVariables:
+         - `_sock`: The connection socket
+         - `_partial`: The incomplete last line written so far
+         - `_buf`: The lines to send
+         - `_buflen`: The number of bytes in `_buf`
+
+        :Types:
+         - `CHUNKSIZE`: ``int``
+         - `_sock`: ``socket.socket``
+         - `_partial`: ``str``
+         - `_buf`: ``list``
+         - `_buflen`: ``int``
+    """
+    CHUNKSIZE = 16384
+
+    def __init__(self, sock):
+        """ Initialization
+
+            :param sock: The connection socket
+            :type sock: ``socket.socket``
+        """
+        self._sock = sock
+        self._partial = ''
+        self._buf = []
+        self._buflen = 0
+
+
+    def write(self, towrite):
+        """ Writes article data
+
+            :param towrite: The data to write
+            :type towrite: ``str``
+        """
+        lines = (self._partial + towrite).split('\n')
+        self._partial = lines.pop()
+        for line in lines:
+            self._putline(line)
+
+
+    def close(self):
+        """ Sends the rest and the article terminator """
+        if self._partial:
+            self._putline(self._partial)
+            self._partial = ''
+        self._buf.append('.\r\n')
+        self._flush()
+
+
+    def _putline(self, line):
+        """ Adds a line to the send buffer
+
+            :param line: The line (without line terminator)
+            :type line: ``str``
+        """
+        if line[:1] == '.':
+            line = '.' + line
+        line += '\r\n'
+        self._buf.append(line)
+        self._buflen += len(line)
+        if self._buflen >= self.CHUNKSIZE:
+            self._flush()
+
+
+    def _flush(self):
+        """ Sends the buffered lines """
+        if self._buf:
+            buf, self._buf, self._buflen = self._buf, [], 0
+            self._sock.sendall(''.join(buf))
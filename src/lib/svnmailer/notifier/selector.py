@@ -61,3 +61,29 @@ class Selector(object):
             notifiers.extend(stdout.getNotifier(self._settings, groupset))
 
         return notifiers
+
+
+    def finish(self):
+        """ Finishes the work of the notifiers of the whole run
+
+            Notifiers may defer some work (like waiting for submission
+            processes) until all groupsets are processed. All modules
+            are finished, even if one of them fails. The first error is
+            raised afterwards. ``KeyboardInterrupt`` and ``SystemExit``
+            are passed through immediately.
+        """
+        import sys
+        from svnmailer.notifier import _text, mail, news, cia_xmlrpc
+
+        error = None
+        for module in (mail, news, cia_xmlrpc, _text):
+            try:
+                module.finish(self._settings)
+            except (KeyboardInterrupt, SystemExit):
+                raise
+            except:
+                if error is None:
+                    error = sys.exc_info()
+
+        if error is not None:
+            raise error[0], error[1], error[2]
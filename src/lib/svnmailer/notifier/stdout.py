@@ -77,6 +77,7 @@ class StdoutNotifier(_text.TextNotifier):
             self.writeMetaData()
             self.writePathList()
             self.writeDiffList()
+            self.writeDiffStat()
         elif mode == MODES.propchange:
             self.writeRevPropData()
         elif mode in (MODES.lock, MODES.unlock):
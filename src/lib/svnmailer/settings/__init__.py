@@ -152,6 +152,8 @@ group_members = {
         'show_applied_charset'       : ('token',
                                        {'allowed': SHOWENC.valid_tokens}),
         'default_charsets'           : 'tokenlist',
+        'show_diffstat'              : 'humanbool',
+        'max_diff_size'              : 'int',
 
         # deprecated
         'viewcvs_base_url'           : ('unicode',    {'map': True}),
@@ -178,11 +180,20 @@ group_members = {
         'cia_project_name', 'cia_project_module', 'cia_project_branch',
         'cia_project_submodule', 'cia_project_path',
     ],
+    # transformed while loading, because they're needed to select the
+    # groups. The others are transformed on first access.
+    'eager': [
+        '_name',
+        '_def_for_repos', '_def_for_paths',
+        'for_repos', 'for_paths', 'exclude_paths', 'ignore_if_other_matches',
+        'extract_x509_author',
+    ],
 }
 
 general_members = {
     'members': {
         'sendmail_command'  : ('unicommand', {'map': True}),
+        'sendmail_processes': 'int',
         'ssl_mode'          : ('unicode',    {'map': True}),
         'smtp_host'         : ('unicode',    {'map': True}),
         'smtp_user'         : ('quotedstr',  {'map': True}),
@@ -192,7 +203,12 @@ general_members = {
         'nntp_pass'         : ('quotedstr',  {'map': True}),
         'debug_all_mails_to': ('tokenlist',  {'map': True}),
         'cia_rpc_server'    : ('unicode',    {'map': True}),
+        'cia_rpc_timeout'   : 'int',
+        'cia_rpc_background': 'humanbool',
         'tempdir'           : ('filename',   {'map': True}),
+        'diff_processes'    : 'int',
+        'diff_prefetch_bytes': 'int',
+        'diff_spool_size'   : 'int',
 
         # deprecated
         'diff_command'      : 'unicommand', # no map, because it's treated as
@@ -212,6 +228,7 @@ runtime_members = {
         'stdin'        : 'stdin',
         'path_encoding': 'string',
         'debug'        : 'bool',
+        'check_config' : 'bool',
         'revision'     : 'int',
         'repository'   : 'filename',
         'config'       : 'filename',
@@ -282,6 +299,7 @@ class Manager(util.Singleton):
     }
     _MAPPERS = [
         'svnmailer.settings.mappers.PlainMapper',
+        'svnmailer.settings.mappers.DBMMapper',
     ]
 
 
@@ -387,7 +405,11 @@ class Manager(util.Singleton):
         ])
         mappers = tuple([self._load(cls) for cls in self._MAPPERS])
 
-        return loader(options, members, typemap, mappers)
+        settings = loader(options, members, typemap, mappers)
+        for cls in dict.fromkeys(typemap.values()).keys():
+            cls.expireCache()
+
+        return settings
 
 
     def _load(self, classname):
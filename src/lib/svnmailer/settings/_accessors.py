@@ -52,6 +52,9 @@ class UnicodeMember(_base.BasePostmapMember):
     def doTransform(self, value):
         """ Transforms the value to unicode if it wasn't already
 
+            If the member is substituted, the value is compiled into a
+            `util.Template`.
+
             :Exceptions:
              - `TypeError`: The supplied value is neither ``str`` nor
                ``unicode``
@@ -59,13 +62,9 @@ class UnicodeMember(_base.BasePostmapMember):
              - `UnicodeError`: The supplied value is a string and cannot
                be interpreted as the specified charset
         """
-        if isinstance(value, str):
-            value = unicode(value, self.CHARSET)
-        elif not isinstance(value, unicode):
-            raise TypeError(
-                "Supplied value must be string or unicode, not %r" %
-                type(value).__name__
-            )
+        value = self._toUnicode(value)
+        if self.SUBST and not isinstance(value, util.Template):
+            value = util.Template(value)
 
         return value
 
@@ -85,7 +84,28 @@ class UnicodeMember(_base.BasePostmapMember):
              - `UnicodeError`: The mapped value is a string and cannot
                be interpreted as the specified charset
         """
-        return self.transform(self.mapper(value))
+        return self._toUnicode(self.mapper(value))
+
+
+    def _toUnicode(self, value):
+        """ Transforms the value to unicode if it wasn't already
+
+            :Exceptions:
+             - `TypeError`: The supplied value is neither ``str`` nor
+               ``unicode``
+
+             - `UnicodeError`: The supplied value is a string and cannot
+               be interpreted as the specified charset
+        """
+        if isinstance(value, str):
+            value = unicode(value, self.CHARSET)
+        elif not isinstance(value, unicode):
+            raise TypeError(
+                "Supplied value must be string or unicode, not %r" %
+                type(value).__name__
+            )
+
+        return value
 
 
 class StringMember(_base.BaseMember):
@@ -159,9 +179,26 @@ class HumanBooleanMember(_base.BaseMember):
 class RegexMember(_base.BasePremapMember):
     """ Regex storage
 
-        :ivar _flags: The flags for the regex compiler
-        :type _flags: ``int``
+        The compiled patterns are interned in a table, which is shared by
+        all regex members and subsequent loads of the settings. It grows
+        while the settings are loaded and is cleaned up afterwards (see
+        `expireCache`).
+
+        :CVariables:
+         - `_CACHE`: The compiled patterns
+           (``{(pattern, flags): [regex, load], ...}``)
+         - `_LOAD`: The number of the current settings load
+
+        :IVariables:
+         - `_flags`: The flags for the regex compiler
+
+        :Types:
+         - `_CACHE`: ``dict``
+         - `_LOAD`: ``int``
+         - `_flags`: ``int``
     """
+    _CACHE = {}
+    _LOAD = 0
 
     def init(self):
         """ Custom initialization """
@@ -169,6 +206,19 @@ class RegexMember(_base.BasePremapMember):
         self._flags = self.param.get('flags', 0)
 
 
+    def expireCache(cls):
+        """ Drops the patterns, which were not used by the last load """
+        load = RegexMember._LOAD
+        cache = cls._CACHE
+        for key, entry in cache.items():
+            if entry[1] != load:
+                del cache[key]
+
+        RegexMember._LOAD = load + 1
+
+    expireCache = classmethod(expireCache)
+
+
     def doTransform(self, value):
         """ Turns into a regex
 
@@ -181,12 +231,18 @@ class RegexMember(_base.BasePremapMember):
         if isinstance(value, str):
             value = unicode(value, self.CHARSET)
 
+        key = (value, self._flags)
         try:
-            value = re.compile(value, self._flags)
-        except re.error:
-            raise ValueError("Regex %r could not be compiled" % value)
+            entry = self._CACHE[key]
+        except KeyError:
+            try:
+                regex = re.compile(value, self._flags)
+            except re.error:
+                raise ValueError("Regex %r could not be compiled" % value)
+            entry = self._CACHE[key] = [regex, None]
 
-        return value
+        entry[1] = RegexMember._LOAD
+        return entry[0]
 
 
 class TokenMember(_base.BasePremapMember):
@@ -281,7 +337,10 @@ class TokenlistMember(_base.BasePostmapMember):
                     type(value).__name__
                 )
 
-            value = TokenList(value.split())
+            value = value.split()
+            if self.SUBST:
+                value = [util.Template(token) for token in value]
+            value = TokenList(value)
 
         if self._allowed is not None and (not self.MAP or self.mapper is None):
             self._checkallowed(value)
@@ -21,8 +21,8 @@ Base classes for setting loader implementations
 :Groups:
  - `Settings Containers`: `GroupSettingsContainer`, `GeneralSettingsContainer`,
    `RuntimeSettingsContainer`
- - `Base Classes`: `BaseSettings`, `BaseMapper`, `BaseConfig`, `BaseMember`,
-   `BasePremapMember`, `BasePostmapMember`
+ - `Base Classes`: `BaseSettings`, `BaseMapper`, `BaseIndexedMapper`,
+   `BaseConfig`, `BaseMember`, `BasePremapMember`, `BasePostmapMember`
 """
 __author__    = "André Malo"
 __docformat__ = "restructuredtext en"
@@ -34,7 +34,9 @@ __all__       = [
     'RuntimeSettingsContainer',
     'BaseSettings',
     'MapFinder',
+    'CachedMapper',
     'BaseMapper',
+    'BaseIndexedMapper',
     'BaseConfig',
     'BaseMember',
     'BasePremapMember',
@@ -197,6 +199,7 @@ class BaseSettings(object):
             repository    = options.repository,
             path_encoding = options.path_encoding,
             debug         = options.debug,
+            check_config  = getattr(options, 'check_config', False),
             config        = options.config,
             mode          = options.mode,
             author        = options.author,
@@ -309,6 +312,7 @@ class BaseSettings(object):
                 members  = group_members['members'],
                 aliases  = group_members['aliases'],
                 eqignore = group_members['eqignore'],
+                eager    = group_members['eager'],
                 typemap  = typemap,
             ),
             'general': create(cls = self._GENERAL_CONTAINER,
@@ -348,6 +352,9 @@ class MapFinder(object):
     def find(self, spec):
         """ Asks the map finder classes for a matching mapper
 
+            The mapper is wrapped into a `CachedMapper`, so every value
+            is mapped only once.
+
             :param spec: The mapping spec
             :type spec: ``str``
 
@@ -357,23 +364,126 @@ class MapFinder(object):
         for mapper in self._mappers:
             result = mapper.create(spec)
             if result is not None:
-                return result
+                return self._createCachedMapper(result, mapper.CACHESIZE)
 
         return None
 
 
+    def _createCachedMapper(self, mapper, size):
+        """ Returns a new `CachedMapper` instance
+
+            :Parameters:
+             - `mapper`: The mapper to wrap
+             - `size`: The maximum number of cached results (or ``None``)
+
+            :Types:
+             - `mapper`: ``callable``
+             - `size`: ``int``
+
+            :return: The caching mapper
+            :rtype: `CachedMapper`
+        """
+        return CachedMapper(mapper, size)
+
+
     def cleanup(self):
         """ Asks the map finder classes to cleanup behind them """
         for mapper in self._mappers:
             mapper.cleanup()
 
 
+class CachedMapper(object):
+    """ Mapper wrapper, which memoizes the mapping results
+
+        The mapper is shared by all containers, so each value is mapped
+        only once per run. If the cache size is limited, the least
+        recently used results are dropped when the cache is full.
+
+        :IVariables:
+         - `_mapper`: The wrapped mapper
+         - `_cache`: The mapping results (``{value: [tick, result], ...}``)
+         - `_size`: The maximum number of cached results (or ``None``)
+         - `_tick`: The access counter
+
+        :Types:
+         - `_mapper`: ``callable``
+         - `_cache`: ``dict``
+         - `_size`: ``int``
+         - `_tick`: ``int``
+    """
+
+    def __init__(self, mapper, size = None):
+        """ Initialization
+
+            :Parameters:
+             - `mapper`: The mapper to wrap
+             - `size`: The maximum number of cached results. If omitted or
+               ``None``, the cache is unlimited
+
+            :Types:
+             - `mapper`: ``callable``
+             - `size`: ``int``
+        """
+        self._mapper = mapper
+        self._cache = {}
+        self._size = size
+        self._tick = 0
+
+
+    def __call__(self, value):
+        """ Maps a value
+
+            :param `value`: The value to map
+            :type `value`: ``basestring``
+
+            :return: The mapped value
+            :rtype: ``basestring``
+        """
+        self._tick += 1
+        try:
+            entry = self._cache[value]
+        except KeyError:
+            size = self._size
+            if size is not None and len(self._cache) >= size:
+                self._shrink(size)
+            result = self._mapper(value)
+            self._cache[value] = [self._tick, result]
+            return result
+        except TypeError:
+            # unhashable, don't cache
+            return self._mapper(value)
+
+        entry[0] = self._tick
+        return entry[1]
+
+
+    def _shrink(self, size):
+        """ Drops the least recently used half of the cache
+
+            :param `size`: The maximum cache size
+            :type `size`: ``int``
+        """
+        ticks = [(entry[0], key) for key, entry in self._cache.items()]
+        ticks.sort()
+        for _, key in ticks[:max(1, len(ticks) - size / 2)]:
+            del self._cache[key]
+
+
 class BaseMapper(object):
     """ Base class for mapper generators
 
-        :ivar `_config`: The config object
-        :type `_config`: `BaseConfig`
+        :CVariables:
+         - `CACHESIZE`: The maximum number of memoized mapping results per
+           mapper (``None`` means unlimited)
+
+        :IVariables:
+         - `_config`: The config object
+
+        :Types:
+         - `CACHESIZE`: ``int``
+         - `_config`: `BaseConfig`
     """
+    CACHESIZE = None
 
     def __init__(self, config):
         """ Initialization
@@ -412,11 +522,112 @@ class BaseMapper(object):
         pass
 
 
+class BaseIndexedMapper(BaseMapper):
+    """ Base class for mappers, which look up the values in an index
+
+        An indexed mapper is specified as `PREFIX` followed by the index
+        file name (e.g. ``dbm:/path/to/authors.db``). Relative names are
+        resolved against the directory of the config. Instead of parsing
+        a whole mapping section into memory, the keys are looked up in
+        the index on demand (and memoized by the `CachedMapper`). Values,
+        which are not found, are passed through.
+
+        Subclasses must define `PREFIX` and implement `openIndex`.
+
+        :CVariables:
+         - `PREFIX`: The spec prefix, which selects the mapper
+         - `CACHESIZE`: The size of the in-process LRU cache
+
+        :Types:
+         - `PREFIX`: ``str``
+         - `CACHESIZE`: ``int``
+    """
+    PREFIX = None
+    CACHESIZE = 4096
+
+    def create(self, spec):
+        """ Returns an indexed mapper if the spec starts with `PREFIX`
+
+            :exception Error: The index name is relative, but the config
+                              has no base directory
+        """
+        prefix = self.PREFIX
+        if not prefix or not spec.startswith(prefix):
+            return None
+
+        import os
+        filename = os.path.expanduser(spec[len(prefix):].strip())
+        if not os.path.isabs(filename):
+            basedir = self._config.basedir
+            if basedir is None:
+                raise Error(
+                    "Relative mapping index name %r: please specify an "
+                    "absolute path" % filename
+                )
+            filename = os.path.join(basedir, filename)
+
+        return self._generateMapper(self.openIndex(filename))
+
+
+    def openIndex(self, filename):
+        """ Opens the index
+
+            This method must be implemented by subclasses
+
+            :param `filename`: The name of the index file
+            :type `filename`: ``str``
+
+            :return: The lookup function. It gets the key as ``str``
+                     (encoded in the config charset) and returns the
+                     mapped value (``str``) or ``None``
+            :rtype: ``callable``
+
+            :exception Error: The index could not be opened
+        """
+        raise NotImplementedError()
+
+
+    def _generateMapper(self, lookup):
+        """ Generates the mapper for a particular index
+
+            :param `lookup`: The lookup function
+            :type `lookup`: ``callable``
+
+            :return: The mapping function
+            :rtype: ``callable``
+        """
+        charset = self._config.charset
+
+        def mapfunc(value):
+            """ Mapping function """
+            key = value
+            if isinstance(key, unicode):
+                try:
+                    key = key.encode(charset)
+                except UnicodeError:
+                    # can't be in the index
+                    return value
+
+            result = lookup(key)
+            if result is None:
+                return value
+
+            return result
+
+        return mapfunc
+
+
 class BaseConfig(object):
     """ Representation of the loaded config
 
-        :ivar `charset`: Charset of the config file
-        :type `charset`: ``str``
+        :IVariables:
+         - `charset`: Charset of the config file
+         - `basedir`: The directory relative file names in the config are
+           resolved against (or ``None``)
+
+        :Types:
+         - `charset`: ``str``
+         - `basedir`: ``str``
     """
 
     def __init__(self, settingsobj):
@@ -426,6 +637,7 @@ class BaseConfig(object):
             :type `settingsobj`: `BaseSettings`
         """
         self.charset = settingsobj._charset
+        self.basedir = None
 
 
     def extractSection(self, section, xform = True, keep = False, check = True):
@@ -496,6 +708,17 @@ class BaseMember(_typedstruct.Member):
         self.FILECHARSET = arg and arg["path_encoding"]
 
 
+    def expireCache(cls):
+        """ Cleans up caches shared by the members of this type
+
+            It's called after the settings were loaded. The default
+            implementation does nothing.
+        """
+        pass
+
+    expireCache = classmethod(expireCache)
+
+
     def transform(self, value):
         """ Transform if value is not None """
         if value is not None:
@@ -595,7 +818,31 @@ class BasePremapMember(BaseMember):
 
 
 class BasePostmapMember(BaseMember):
-    """ Base class for postmap only descriptors """
+    """ Base class for postmap only descriptors
+
+        The postmapped values are memoized per input value.
+
+        :ivar `_postmapped`: The postmapped values (``{value: result}``)
+        :type `_postmapped`: ``dict``
+    """
+
+    def init(self):
+        """ Initialization """
+        super(BasePostmapMember, self).init()
+        self._postmapped = {}
+
+
+    def postmap(self, value):
+        """ Postmap the value if it's activated """
+        if self.MAP and value is not None:
+            try:
+                value = self._postmapped[value]
+            except KeyError:
+                result = self._postmapped[value] = self.doPostmap(value)
+                value = result
+
+        return value
+
 
     def doPremap(self, value):
         """ Passes through """
@@ -106,9 +106,34 @@ class FileParser(object):
         This variant just reads the stuff and does not apply any
         typing or transformation. It also uses a better design...
 
-        :ivar `_sections`: The parsed sections
-        :type `_sections`: ``dict``
+        The file is read at once and split into classified lines by a
+        single regular expression (`_TOKENIZE`).
+
+        :CVariables:
+         - `_TOKENIZE`: The line tokenizer. Every match is exactly one line,
+           the name of the last matched group is the line type (``skip``
+           for blank and comment lines, ``section`` for section headers,
+           ``cont`` for continuation lines, ``value`` for option lines
+           and ``error`` for garbage)
+
+        :IVariables:
+         - `_sections`: The parsed sections
+
+        :Types:
+         - `_TOKENIZE`: ``callable``
+         - `_sections`: ``dict``
     """
+    import re as _re
+    _TOKENIZE = _re.compile(r"""
+        ^(?:
+            (?P<skip> [ \t\r\f\v]* | [#;].* )
+          | \[ (?P<section> [^\]\n]+ ) \] .*
+          | (?P<cont> [ \t\r\f\v] .* )
+          | (?P<name> [^=:\n]+ ) [=:] (?P<value> .* )
+          | (?P<error> .+ )
+        )(?:\n|\Z)
+    """, _re.M | _re.X).finditer
+    del _re
 
     def __init__(self):
         """ Initialization """
@@ -187,102 +212,43 @@ class FileParser(object):
 
         # speed enhancements
         sections = self._sections
-        readline = fp.readline
-        is_comment = self._isComment
-        try_section = self._trySectionHeader
-        parse = self._parseOption
         create_section = self._createSection
         create_option = self._createOption
 
-        while True:
-            line = readline()
-            if not line:
-                break
+        for match in self._TOKENIZE(fp.read()):
             lineno += 1
+            kind = match.lastgroup
 
             # skip blank lines and comments
-            if line.strip() and not is_comment(line):
-                # section header?
-                header = try_section(line)
-                if header is not None:
-                    option = None # reset for the next continuation line
-                    section = sections.get(header)
-                    if section is None:
-                        section = create_section(header)
-                        sections[header] = section
-
-                # line continuation?
-                elif line[0].isspace():
-                    try:
-                        option.addLine(line)
-                    except AttributeError:
-                        raise ContinuationError(filename, lineno)
-
-                # must be a new option
-                else:
-                    name, value = parse(line)
-                    if name is None:
-                        raise OptionSyntaxError(filename, lineno)
-                    option = create_option(name, value)
-                    if section is None:
-                        section = create_section()
-                        sections[None] = section
-                    section.add(option)
-
-
-    def _isComment(self, line):
-        """ Decides if `line` is comment
-
-            :param `line`: The line to inspect
-            :type `line`: ``str``
-
-            :return: Is `line` is comment line?
-            :rtype: ``bool``
-        """
-        return bool(line.startswith('#') or line.startswith(';'))
-
-
-    def _trySectionHeader(self, line):
-        """ Tries to extract a section header from `line`
-
-            :param `line`: The line to process
-            :type `line`: ``str``
-
-            :return: The section header name or ``None``
-            :rtype: ``str``
-        """
-        if line.startswith('['):
-            pos = line.find(']')
-            if pos > 1: # one name char minimum
-                return line[1:pos]
-
-        return None
-
-
-    def _parseOption(self, line):
-        """ Parses `line` as option (``name [:=] value``)
+            if kind == 'skip':
+                continue
+
+            # must be a new option
+            elif kind == 'value':
+                option = create_option(*match.group('name', 'value'))
+                if section is None:
+                    section = create_section()
+                    sections[None] = section
+                section.add(option)
+
+            # section header?
+            elif kind == 'section':
+                option = None # reset for the next continuation line
+                header = match.group('section')
+                section = sections.get(header)
+                if section is None:
+                    section = create_section(header)
+                    sections[header] = section
+
+            # line continuation?
+            elif kind == 'cont':
+                if option is None:
+                    raise ContinuationError(filename, lineno)
+                option = option.addLine(match.group('cont'))
+                section.add(option)
 
-            :param `line`: The line to process
-            :type `line`: ``str``
-
-            :return: The name and the value (both ``None`` if an error occured)
-            :rtype: ``tuple``
-        """
-        pose = line.find('=')
-        posc = line.find(':')
-        pos = min(pose, posc)
-        if pos < 0:
-            if pose >= 0:
-                pos = pose
-            elif posc >= 0:
-                pos = posc
             else:
-                return (None, None)
-
-        if pos > 0: # name must not be empty
-            return (line[:pos], line[pos + 1:])
-
-        return (None, None)
+                raise OptionSyntaxError(filename, lineno)
 
 
     def _createSection(self, name = None):
@@ -371,9 +337,11 @@ class Section(object):
         self._options[option.name] = option
 
 
-class Option(object):
+class Option(tuple):
     """ Represents a config option
 
+        The option is a ``(name, value)`` tuple.
+
         :IVariables:
          - `name`: The name of the option
          - `value`: The value of the option
@@ -382,8 +350,9 @@ class Option(object):
          - `name`: ``str``
          - `value`: ``str``
     """
+    __slots__ = ()
 
-    def __init__(self, name, value):
+    def __new__(cls, name, value):
         """ Initialization
 
             :Parameters:
@@ -394,20 +363,29 @@ class Option(object):
              - `name`: ``str``
              - `value`: ``str``
         """
-        self.name = name.rstrip()
         value = value.strip()
         if value == '""': # compat
             value = ''
-        self.value = value
+
+        return tuple.__new__(cls, (name.rstrip(), value))
+
+
+    name = property(lambda self: self[0], doc = "The name of the option")
+    value = property(lambda self: self[1], doc = "The value of the option")
 
 
     def addLine(self, line):
-        """ Adds a line to the option value
+        """ Returns the option with a line added to the value
 
             `line` is appended to the current value with one space
             character as delimiter.
 
             :param `line`: The line to add
             :type `line`: ``str``
+
+            :return: The new option
+            :rtype: `Option`
         """
-        self.value = ' '.join((self.value, line.strip()))
+        return tuple.__new__(self.__class__,
+            (self[0], ' '.join((self[1], line.strip())))
+        )
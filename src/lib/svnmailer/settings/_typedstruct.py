@@ -30,6 +30,11 @@ The `Member` class provides the interface for those conversion functions.
 Each converter class should inherit from it. The `Struct` class is the base
 class for all containers that want to be created by `StructCreator` (basically
 because of its ``__metaclass__``).
+
+A container can be viewed with an additional substitution record (see
+``container('view', subst)``). The view shares the member values with the
+container, but is read-only and keeps its own substitution record and
+caches.
 """
 __author__    = "André Malo"
 __docformat__ = "restructuredtext en"
@@ -194,12 +199,19 @@ class StructCreator(object):
 
         :IVariables:
          - `_cls`: The struct class to use
+         - `_struct`: The generated struct class. It's shared by all
+           created instances, which keep their own data in a `Private`
+           container slot.
          - `_members`: The prepared members
            (``{('name', 'alias', 'alias', ...): (spec, param), ...}``)
          - `_aliases`: The member aliases. (``{'alias': 'real', ...}``)
          - `_names`: The member names as ``tuple`` (without aliases)
          - `_eqignore`: Member names to be ignored in EQ comparisons
            (``dict`` for faster lookup)
+         - `_eager`: Member names to be transformed when they are set
+           (``dict`` for faster lookup). The values of all other members
+           are transformed on first access. If ``None``, all members are
+           transformed immediately.
 
         :Types:
          - `_BASESTRUCT`: `MetaClass`
@@ -207,17 +219,19 @@ class StructCreator(object):
          - `_DEFAULTMEMBER`: `Member`
 
          - `_cls`: `MetaClass`
+         - `_struct`: `MetaClass`
          - `_members`: ``dict``
          - `_aliases`: ``dict``
          - `_names`: ``tuple``
          - `_eqignore`: ``dict``
+         - `_eager`: ``dict``
     """
     _BASESTRUCT    = Struct
     _DEFAULTSTRUCT = Struct
     _DEFAULTMEMBER = Member
 
     def __init__(self, members, cls = None, aliases = None, typemap = None,
-                 eqignore = None):
+                 eqignore = None, eager = None):
         """ Initialization
     
             :Parameters:
@@ -237,12 +251,17 @@ class StructCreator(object):
              - `eqignore`: Member names to be ignored in EQ comparisons. If
                ``None``, different containers are always considered different.
 
+             - `eager`: Member names to be transformed when they are set.
+               The values of all other members are transformed on first
+               access. If ``None``, all members are transformed immediately.
+
             :Types:
              - `cls`: `Struct`
              - `members`: iterable or ``dict``
              - `aliases`: ``dict``
              - `typemap`: ``dict``
              - `eqignore`: sequence
+             - `eager`: sequence
         """
         self._cls = cls or self._DEFAULTSTRUCT
         self._aliases = aliases or {}
@@ -255,6 +274,12 @@ class StructCreator(object):
             eqignore = dict.fromkeys(eqignore)
         self._eqignore = eqignore
 
+        if eager is not None:
+            eager = dict.fromkeys(eager)
+        self._eager = eager
+
+        self._struct = self._generateStruct()
+
 
     def create(self, maps = None, arg = None, initkw = None):
         """ Creates a new struct with extended properties
@@ -275,9 +300,6 @@ class StructCreator(object):
 
             :exception AssertionError: The parameter set was inconsistent
         """
-        cls = self._cls
-        private = self._createPrivate()
-
         # merge alias maps to real
         maps = dict(maps or {})
         for alias, real in self._aliases.items():
@@ -285,78 +307,89 @@ class StructCreator(object):
                 maps[real] = maps[alias]
                 del maps[alias]
 
-        # add members
-        space = self._generateMembers(private, maps, arg)
-        space.update({'__module__': cls.__module__, '__slots__': self._names})
+        private = self._createPrivate(self._generateMembers(maps, arg))
+
+        # the private container needs to be in place before the
+        # initial values are stored
+        cls = self._struct
+        struct = cls.__new__(cls)
+        struct.__private__ = private
+        struct.__init__(**(initkw or {}))
+
+        return struct
+
+
+    def _generateStruct(self):
+        """ Generates the struct class
+
+            :return: The new struct class
+            :rtype: `MetaClass`
+        """
+        cls = self._cls
+
+        # add member descriptors
+        space = {}
+        descriptor = self._createDescriptor
+        for names in self._members:
+            space.update(dict.fromkeys(names, descriptor(names[0])))
+        space.update({
+            '__module__': cls.__module__, '__slots__': ('__private__',)
+        })
 
         # create new class
         cls = self._createMetaClass(cls.__name__, (cls,), space)
 
         # add __special__s
-        for name, func in self._generateSpecials(private).items():
+        for name, func in self._generateSpecials().items():
             setattr(cls, name, instancemethod(func, None, cls))
 
-        # return instance of the new class
-        return cls(**(initkw or {}))
+        return cls
 
 
-    def _generateSpecials(self, private):
+    def _generateSpecials(self):
         """ Generates the special methods
 
-            :param `private`: The private data container
-            :type `private`: `Private`
-
             :return: The special methods (``{'name': method, ...}``)
             :rtype: ``dict``
         """
         space = {
-            '__setitem__': self._generateSetItem(private),
-            '__getitem__': self._generateGetItem(private),
-            '__repr__'   : self._generateRepr(private),
-            '__call__'   : self._generateCall(private),
+            '__setitem__': self._generateSetItem(),
+            '__getitem__': self._generateGetItem(),
+            '__repr__'   : self._generateRepr(),
+            '__call__'   : self._generateCall(),
         }
         if self._eqignore is not None:
+            fingerprint = self._generateFingerprint()
             space.update({
-                '__eq__': self._generateEq(private),
-                '__ne__': self._generateEq(private, False),
+                '__eq__'  : self._generateEq(fingerprint),
+                '__ne__'  : self._generateEq(fingerprint, False),
+                '__hash__': self._generateHash(fingerprint),
             })
 
         return space
 
 
-    def _generateMembers(self, private, maps, arg):
-        """ Generates the members descriptors
+    def _generateMembers(self, maps, arg):
+        """ Generates the member instances
 
             :Parameters:
-             - `private`: The private data container
              - `maps`: The mappers to use (``{'membername': mapper, ...}``)
-             - `arg`: Initializer argument for the descriptors
+             - `arg`: Initializer argument for the members
 
             :Types:
-             - `private`: `Private`
              - `maps`: ``dict``
              - `arg`: any
 
-            :return: The member descriptors (``{'name': descriptor, ...}``)
+            :return: The member instances (``{'name': member, ...}``)
             :rtype: ``dict``
 
             :exception AssertionError: Something was inconsistent or wrong
         """
-        space = {}
-
-        # optimize for speed and readability
-        descriptor = self._createDescriptor
-        entries = dict.fromkeys
-        mapper  = maps.get
-        update  = space.update
-
-        for names, (spec, param) in self._members.items():
-            name = names[0]
-            update(entries(names,
-                descriptor(name, private, spec(mapper(name), arg, param))
-            ))
-
-        return space
+        mapper = maps.get
+        return dict([
+            (names[0], spec(mapper(names[0]), arg, param))
+            for names, (spec, param) in self._members.items()
+        ])
 
 
     def _prepareMembers(self, members, typemap):
@@ -433,12 +466,9 @@ class StructCreator(object):
         return newmembers, tuple(members.keys())
 
 
-    def _generateSetItem(self, private):
+    def _generateSetItem(self):
         """ Returns the ``__setitem__`` method
 
-            :param `private`: The private data container
-            :type `private`: `Private`
-
             :return: The method function
             :rtype: ``callable``
         """
@@ -453,17 +483,19 @@ class StructCreator(object):
                  - `name`: ``unicode``
                  - `value`: ``unicode``
             """
+            private = this.__private__
+            if private.readonly:
+                raise TypeError("The substitution record of a view is "
+                    "read-only")
             private.subst[name] = value
+            private.generation += 1
 
         return __setitem__
 
 
-    def _generateGetItem(self, private):
+    def _generateGetItem(self):
         """ Returns the ``__getitem__`` method
 
-            :param `private`: The private data container
-            :type `private`: `Private`
-
             :return: The method function
             :rtype: ``callable``
         """
@@ -478,17 +510,14 @@ class StructCreator(object):
 
                 :exception KeyError: The key was not found
             """
-            return private.subst[name]
+            return this.__private__.subst[name]
 
         return __getitem__
 
 
-    def _generateRepr(self, private):
+    def _generateRepr(self):
         """ Returns the ``__repr__`` method
 
-            :param `private`: The private data container
-            :type `private`: `Private`
-
             :return: The method function
             :rtype: ``callable``
         """
@@ -500,9 +529,10 @@ class StructCreator(object):
                 :return: A string representation of the struct
                 :rtype: ``str``
             """
+            _materialize(this)
             members = ',\n    '.join([
                 "%s = %r" % (name, val) for name, val in [(name, val)
-                for name, val in private.values.items()
+                for name, val in this.__private__.values.items()
             ] if val is not None])
             if members:
                 members = "\n    %s\n" % members
@@ -514,44 +544,105 @@ class StructCreator(object):
         return __repr__
 
 
-    def _generateCall(self, private):
+    def _generateCall(self):
         """ Returns the __call__ method
 
-            :param `private`: The private data container
-            :type `private`: `Private`
-
             :return: The method function
             :rtype: ``callable``
         """
-        def __call__(this, name):
+        def __call__(this, name, subst = None):
             """ Returns a value specified by `name`
 
-                :param `name`: The key to retrieve. Possible values are:
-                               ``members``, ``subst``, ``values``
-                :type `name`: ``str``
+                :Parameters:
+                 - `name`: The key to retrieve. Possible values are:
+                   ``members``, ``subst``, ``values`` (which transforms
+                   all pending values first) and ``view`` (a read-only
+                   view of the struct with `subst` added to the
+                   substitution record)
+                 - `subst`: The substitution record of the view
+                   (``{'name': value, ...}``)
+
+                :Types:
+                 - `name`: ``str``
+                 - `subst`: ``dict``
 
                 :return: The requested value
                 :rtype: any
 
                 :exception KeyError: `name` was not recognized
             """
+            private = this.__private__
             if name == 'members':
                 return private.members
             elif name == 'subst':
                 return util.ReadOnlyDict(private.subst)
             elif name == 'values':
+                _materialize(this)
                 return util.ReadOnlyDict(private.values)
+            elif name == 'view':
+                cls = this.__class__
+                view = cls.__new__(cls)
+                view.__private__ = private.view(subst or {})
+                return view
 
             raise KeyError("%s not recognized")
 
         return __call__
 
 
-    def _generateEq(self, private, iseq = True):
+    def _generateFingerprint(self):
+        """ Returns the fingerprint function
+
+            The fingerprint of a struct is a hashable tuple of the member
+            names and values (substituted and postmapped), which are not
+            ignored in comparisons. It's cached until the member values
+            or the substitution record change.
+
+            :return: The fingerprint function
+            :rtype: ``callable``
+        """
+        ignore = self._eqignore
+        attrs = tuple([name for name in self._names if name not in ignore])
+
+        def fingerprint(this):
+            """ Returns the fingerprint of the struct
+
+                :param `this`: The struct
+                :type `this`: `Struct`
+
+                :return: The fingerprint (``(('name', ...), (value, ...))``)
+                :rtype: ``tuple``
+
+                :exception AttributeError: `this` is not a generated struct
+            """
+            private = this.__private__
+            try:
+                generation, value = private.fingerprint
+            except TypeError:
+                pass
+            else:
+                if generation == private.generation:
+                    return value
+
+            value = (attrs, tuple([getattr(this, name) for name in attrs]))
+
+            # getattr doesn't change the generation
+            private.fingerprint = (private.generation, value)
+            return value
+
+        return fingerprint
+
+
+    def _generateEq(self, fingerprint, iseq = True):
         """ Returns ``__eq__``/``__ne__`` descriptor
 
-            :param `private`: The private data container
-            :type `private`: `Private`
+            :Parameters:
+             - `fingerprint`: The fingerprint function
+             - `iseq`: Return ``__eq__``? (otherwise ``__ne__``)
+
+            :Types:
+             - `fingerprint`: ``callable``
+             - `iseq`: ``bool``
 
             :return: The method function
             :rtype: ``callable``
@@ -570,17 +661,10 @@ class StructCreator(object):
             if not(isinstance(this, base) and isinstance(other, base)):
                 return False
 
-            ignore = private.eqignore
-            attrs = [name for name in private.members if name not in ignore]
-
-            for name in attrs:
-                try:
-                    if getattr(this, name) != getattr(other, name):
-                        return False
-                except AttributeError:
-                    return False
-
-            return True
+            try:
+                return fingerprint(this) == fingerprint(other)
+            except AttributeError:
+                return False
 
         if iseq:
             return __eq__
@@ -592,32 +676,53 @@ class StructCreator(object):
         return __ne__
 
 
-    def _createPrivate(self):
+    def _generateHash(self, fingerprint):
+        """ Returns the ``__hash__`` method
+
+            :param `fingerprint`: The fingerprint function
+            :type `fingerprint`: ``callable``
+
+            :return: The method function
+            :rtype: ``callable``
+        """
+        def __hash__(this):
+            """ Returns the hash of the fingerprint
+
+                Note that the hash changes with the member values and the
+                substitution record, so don't change them while the
+                struct is used as dict key.
+
+                :return: The hash value
+                :rtype: ``int``
+            """
+            return hash(fingerprint(this))
+
+        return __hash__
+
+
+    def _createPrivate(self, accessors):
         """ Returns a new `Private` instance
 
+            :param `accessors`: The member instances
+                                (``{'name': member, ...}``)
+            :type `accessors`: ``dict``
+
             :return: A new `Private` instance
             :rtype: `Private`
         """
-        return Private(self._names, self._eqignore)
+        return Private(self._names, self._eqignore, accessors, self._eager)
 
 
-    def _createDescriptor(self, name, private, member):
+    def _createDescriptor(self, name):
         """ Returns a new `Descriptor` instance
 
-            :Parameters:
-             - `name`: The name of the member
-             - `private`: The private data container
-             - `member`: The actual member instance
-
-            :Types:
-             - `name`: ``str``
-             - `private`: `Private`
-             - `member`: `Member`
+            :param `name`: The name of the member
+            :type `name`: ``str``
 
             :return: A new `Descriptor` instance
             :rtype: `Descriptor`
         """
-        return Descriptor(name, private, member)
+        return Descriptor(name)
 
 
     def _createMetaClass(self, name, bases, cdict):
@@ -646,77 +751,184 @@ class Private(object):
          - `members`: The list of members
          - `eqignore`: List of ignorable members in comparisions (as
            ``dict`` for faster lookup)
+         - `accessors`: The member instances (``{'name': member, ...}``)
+         - `eager`: The members to transform immediately (as ``dict``
+           for faster lookup, ``None`` means all)
          - `values`: The member values
+         - `pending`: The values not transformed yet
+           (``{'name': value, ...}``)
          - `subst`: The substitution record
+         - `cache`: The substituted and postmapped member values
+           (``{'name': (generation, value), ...}``)
+         - `fingerprint`: The fingerprint of the struct
+           (``(generation, value)`` or ``None``)
+         - `generation`: The generation of `values` and `subst`. It's
+           incremented on every change, which invalidates the `cache`.
+         - `readonly`: Is this the container of a view? Views share
+           `values` and `pending` with the viewed struct, which must not
+           be modified anymore then.
 
         :Types:
          - `members`: ``tuple``
          - `eqignore`: ``dict``
+         - `accessors`: ``dict``
+         - `eager`: ``dict``
          - `values`: ``dict``
+         - `pending`: ``dict``
          - `subst`: ``dict``
+         - `cache`: ``dict``
+         - `fingerprint`: ``tuple``
+         - `generation`: ``int``
+         - `readonly`: ``bool``
     """
 
-    def __init__(self, names, eqignore):
+    def __init__(self, names, eqignore, accessors, eager):
         """ Initialization
 
             :Parameters:
              - `names`: The member names to serve
              - `eqignore`: The member names to ignore in comparisons
+             - `accessors`: The member instances
+             - `eager`: The member names to transform immediately
 
             :Types:
              - `names`: ``tuple``
              - `eqignore`: sequence
+             - `accessors`: ``dict``
+             - `eager`: ``dict``
         """
         self.members  = names
         self.eqignore = eqignore
+        self.accessors = accessors
+        self.eager    = eager
         self.values   = {}
+        self.pending  = {}
         self.subst    = {}
+        self.cache    = {}
+        self.fingerprint = None
+        self.generation = 0
+        self.readonly = False
+
+
+    def view(self, subst):
+        """ Returns the container for a view
+
+            The member values are shared, not copied.
+
+            :param `subst`: The additional substitution record
+            :type `subst`: ``dict``
+
+            :return: A new read-only `Private` instance
+            :rtype: `Private`
+        """
+        private = self.__class__(
+            self.members, self.eqignore, self.accessors, self.eager
+        )
+        private.values = self.values
+        private.pending = self.pending
+        private.subst.update(self.subst)
+        private.subst.update(subst)
+        private.readonly = True
+
+        return private
+
+
+def _materialize(struct):
+    """ Transforms all pending values of a struct
+
+        The values are neither substituted nor postmapped, that's left to
+        the actual member access.
+
+        :param `struct`: The struct
+        :type `struct`: `Struct`
+
+        :Exceptions:
+         - `ValueError`: A value could not be transformed
+         - `TypeError`: A value could not be transformed
+    """
+    private = struct.__private__
+    for name, value in private.pending.items():
+        private.values[name] = _transform(struct, private, name, value)
+        private.pending.pop(name, None)
+
+
+def _transform(instance, private, name, value):
+    """ Premaps and transforms a member value
+
+        :Parameters:
+         - `instance`: The struct instance
+         - `private`: The private data container of `instance`
+         - `name`: The member name
+         - `value`: The value to transform
+
+        :Types:
+         - `instance`: `Struct`
+         - `private`: `Private`
+         - `name`: ``str``
+         - `value`: any
+
+        :return: The transformed value
+        :rtype: any
+    """
+    member = private.accessors[name]
+    member.instance = instance
+    try:
+        if member.mapper is not None:
+            value = member.premap(value)
+        value = member.transform(value)
+    finally:
+        member.instance = None
+
+    return value
 
 
 class Descriptor(object):
     """ Member descriptor class
 
+        The descriptor is shared by all instances of a struct class. The
+        member instance and the values are taken from the `Private`
+        container of the particular struct instance.
+
+        Values of members, which are not eager, are stored as they are
+        and transformed on first access.
+
+        The substituted and postmapped values are cached until the
+        member values or the substitution record change. Views cannot
+        be modified.
+
         :IVariables:
          - `name`: The name of the member
-         - `private`: The private data container
-         - `member`: The actual member instance
 
         :Types:
          - `name`: ``str``
-         - `private`: `Private`
-         - `member`: `Member`
     """
 
-    def __init__(self, name, private, member):
+    def __init__(self, name):
         """ Initialization
 
-            :Parameters:
-             - `name`: The name of the member
-             - `private`: The private data container
-             - `member`: The actual member instance
-
-            :Types:
-             - `name`: ``str``
-             - `private`: `Private`
-             - `member`: `Member`
+            :param `name`: The name of the member
+            :type `name`: ``str``
         """
         self.name = name
-        self.private = private
-        self.member = member
 
 
     def __set__(self, instance, value):
         """ Sets the member value """
-        member = self.member
-        member.instance = instance
-        try:
-            if member.mapper is not None:
-                value = member.premap(value)
-            value = member.transform(value)
-        finally:
-            member.instance = None
+        private = instance.__private__
+        name = self.name
+        if private.readonly:
+            raise AttributeError("%s is read-only in a view" % name)
+        eager = private.eager
+        if eager is None or name in eager:
+            private.values[name] = _transform(instance, private, name, value)
+        else:
+            private.pending[name] = value
+            try:
+                del private.values[name]
+            except KeyError:
+                pass
 
-        self.private.values[self.name] = value 
+        private.generation += 1
 
 
     def __get__(self, instance, owner):
@@ -724,12 +936,31 @@ class Descriptor(object):
         if instance is None:
             return None
 
-        private = self.private
-        member = self.member
+        private = instance.__private__
+        name = self.name
+        try:
+            generation, value = private.cache[name]
+        except KeyError:
+            pass
+        else:
+            if generation == private.generation:
+                return value
+
+        try:
+            value = private.pending[name]
+        except KeyError:
+            pass
+        else:
+            # the (already set) value doesn't change, so the generation
+            # stays the same. The pending values may be shared with views.
+            private.values[name] = _transform(instance, private, name, value)
+            private.pending.pop(name, None)
+
+        member = private.accessors[name]
         member.instance = instance
         try:
             value = member.substitute(
-                private.values.get(self.name),
+                private.values.get(name),
                 util.ReadOnlyDict(private.subst)
             )
             if member.mapper is not None:
@@ -737,13 +968,25 @@ class Descriptor(object):
         finally:
             member.instance = None
 
+        private.cache[name] = (private.generation, value)
         return value
 
 
     def __delete__(self, instance):
         """ Deletes the value from the dict (keeps the name) """
-        try:
-            del self.private.values[self.name]
-        except KeyError:
-            """ didn't exist, well... """
-            pass
+        private = instance.__private__
+        if private.readonly:
+            raise AttributeError("%s is read-only in a view" % self.name)
+        found = False
+        for values in (private.values, private.pending):
+            try:
+                del values[self.name]
+            except KeyError:
+                """ didn't exist, well... """
+                pass
+            else:
+                found = True
+
+        if found:
+            private.generation += 1
+
@@ -95,10 +95,33 @@ class ConfigFileSettings(_base.BaseSettings):
 
             self.general = self._extractGeneralSection(config)
             self.groups = self._extractGroupSections(config) # needs general
+            if self.runtime.check_config:
+                self._checkGroupSections(self.groups)
         except (ValueError, TypeError, self._PARSEERROR), exc:
             raise ConfigInvalidError, str(exc), sys.exc_info()[2]
 
 
+    def _checkGroupSections(self, groups):
+        """ Transforms all group options
+
+            Most of the group options are transformed on first access, so
+            invalid values are usually only detected if a group is actually
+            used. This method checks all of them at once.
+
+            :param `groups`: The group containers
+            :type `groups`: ``list``
+
+            :exception ConfigInvalidError: An option value was invalid
+        """
+        for group in groups:
+            try:
+                group('values')
+            except (ValueError, TypeError), exc:
+                raise ConfigInvalidError, "%s (in section [%s])" % (
+                    str(exc), group._name.encode(self._charset)
+                ), sys.exc_info()[2]
+
+
     def _extractGroupSections(self, config):
         """ Extracts the group configurations
 
@@ -378,6 +401,7 @@ class FileConfig(_base.BaseConfig):
         """
         parser = self._createFileParser()
         config_fp = self._findConfig(settingsobj)
+        self.basedir = os.path.dirname(os.path.abspath(config_fp.name))
         try:
             parser.slurp(config_fp, config_fp.name)
             config_fp.close()
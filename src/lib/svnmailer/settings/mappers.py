@@ -21,11 +21,20 @@
 ====================
 
 The mapper provided by the `PlainMapper` class maps value according to
-configured mapping sections.
+configured mapping sections. The `DBMMapper` looks up the values in a dbm
+index file (``dbm:/path/to/index``, relative names are resolved against
+the directory of the config file), which can be built from a text file
+with `DBMMapper.buildIndex` (or ``svn-mailer build-map``).
 """
 __author__    = "André Malo"
 __docformat__ = "restructuredtext en"
-__all__       = ['Error', 'ConfigMappingSectionNotFoundError', 'PlainMapper']
+__all__       = [
+    'Error',
+    'ConfigMappingSectionNotFoundError',
+    'ConfigMappingIndexError',
+    'PlainMapper',
+    'DBMMapper',
+]
 
 # global imports
 from svnmailer.settings import _base
@@ -39,6 +48,10 @@ class ConfigMappingSectionNotFoundError(Error):
     """ Config mapping section was not found """
     pass
 
+class ConfigMappingIndexError(Error):
+    """ Mapping index could not be opened or built """
+    pass
+
 
 class PlainMapper(_base.BaseMapper):
     """ Plain Mapper Generator
@@ -99,3 +112,100 @@ class PlainMapper(_base.BaseMapper):
             return mdict.get(value, value)
 
         return mapfunc
+
+
+class DBMMapper(_base.BaseIndexedMapper):
+    """ Mapper, which looks up the values in a dbm index
+
+        The index is opened read-only with ``anydbm``, so any dbm flavour
+        available on the system can be used. Single lookups don't load the
+        whole table.
+    """
+    PREFIX = 'dbm:'
+
+    def openIndex(self, filename):
+        """ Opens the dbm index """
+        import anydbm
+
+        try:
+            index = anydbm.open(filename, 'r')
+        except (anydbm.error, IOError, OSError), exc:
+            raise ConfigMappingIndexError(
+                "Could not open mapping index %r: %s" % (filename, str(exc))
+            )
+
+        def lookup(key):
+            """ Index lookup """
+            try:
+                return index[key]
+            except KeyError:
+                return None
+
+        return lookup
+
+
+    def buildIndex(cls, source, target):
+        """ Builds a new dbm index from a text file
+
+            The text file contains one mapping per line (``key = value``
+            or ``key: value``, like in a mapping section). Empty lines and
+            lines starting with ``#`` or ``;`` are ignored. The entries are
+            stored as they are, so the text file should be encoded in the
+            config charset.
+
+            :Parameters:
+             - `source`: The name of the text file
+             - `target`: The name of the index file. An existing index is
+               replaced.
+
+            :Types:
+             - `source`: ``str``
+             - `target`: ``str``
+
+            :return: The number of stored entries
+            :rtype: ``int``
+
+            :exception ConfigMappingIndexError: The text file could not be
+                                                read or the index could
+                                                not be written
+        """
+        import anydbm, re
+        split = re.compile(r'\s*[=:]\s*').split
+
+        try:
+            fp = file(source, 'rb')
+        except IOError, exc:
+            raise ConfigMappingIndexError(
+                "Could not read mapping source %r: %s" % (source, str(exc))
+            )
+        try:
+            try:
+                index = anydbm.open(target, 'n')
+            except (anydbm.error, IOError, OSError), exc:
+                raise ConfigMappingIndexError(
+                    "Could not create mapping index %r: %s" %
+                    (target, str(exc))
+                )
+            try:
+                count = 0
+                for lineno, line in enumerate(fp):
+                    line = line.strip()
+                    if not line or line[:1] in '#;':
+                        continue
+                    try:
+                        key, value = split(line, 1)
+                    except ValueError:
+                        raise ConfigMappingIndexError(
+                            "%s:%d: Invalid mapping line %r" %
+                            (source, lineno + 1, line)
+                        )
+                    index[key] = value
+                    count += 1
+            finally:
+                index.close()
+        finally:
+            fp.close()
+
+        return count
+
+    buildIndex = classmethod(buildIndex)
@@ -22,7 +22,8 @@ __author__    = "André Malo"
 __docformat__ = "restructuredtext en"
 __all__       = [
     'UnicodeStream', 'TruncatingStream', 'CuckooStream', 'SplittingStream',
-    'DevNullStream', 'BinaryOrUnicodeStream', 'CountStream'
+    'DevNullStream', 'BinaryOrUnicodeStream', 'CountStream',
+    'LineHashStream',
 ]
 
 
@@ -74,17 +75,35 @@ class _BaseStream(object):
 class UnicodeStream(_BaseStream):
     """ Stream wrapper, which accepts unicode and a specified charset
 
+        Strings are recoded using incremental codecs, so multibyte
+        characters split between two writes are kept intact. If both
+        encodings are ASCII compatible, pure ASCII strings are passed
+        through without recoding at all.
+
         :IVariables:
-         - `decode`: Decoder function for the input encoding
+         - `decoder`: Incremental decoder for the input encoding
+         - `encoder`: Incremental encoder for the output encoding
          - `err`: error handling advise
+         - `bufsize`: Number of bytes to collect before they're written to
+           the wrapped stream (``0`` means write through)
+         - `_passthrough`: May pure ASCII strings be written unrecoded?
+         - `_pending`: May the decoder hold an incomplete character?
+         - `_buf`: The collected output chunks
+         - `_buflen`: The number of collected bytes
 
         :Types:
-         - `decode`: callable
+         - `decoder`: ``codecs.IncrementalDecoder`` (or a stand-in)
+         - `encoder`: ``codecs.IncrementalEncoder`` (or a stand-in)
          - `err`: ``str``
+         - `bufsize`: ``int``
+         - `_passthrough`: ``bool``
+         - `_pending`: ``bool``
+         - `_buf`: ``list``
+         - `_buflen`: ``int``
     """
 
     def __init__(self, stream, in_enc = 'utf-8', out_enc = 'utf-8',
-                 errors = "replace"):
+                 errors = "replace", bufsize = 0):
         """ Initialization
 
             :Parameters:
@@ -95,28 +114,302 @@ class UnicodeStream(_BaseStream):
              - `errors`: The error handling indicator, when an unicode error
                occurs. (The default is quite lenient and writes replace
                characters on errors)
+             - `bufsize`: Number of bytes to collect before writing them
+               to `stream`. The buffer is flushed before any other
+               attribute of `stream` is accessed.
 
             :Types:
              - `stream`: ``file``
              - `in_enc`: ``str``
              - `out_enc`: ``str``
              - `errors`: ``str``
+             - `bufsize`: ``int``
         """
-        import codecs
+        super(UnicodeStream, self).__init__(stream)
 
-        writer = codecs.lookup(out_enc)[3]
-        super(UnicodeStream, self).__init__(writer(stream, errors))
+        self.decoder = _getDecoder(in_enc, errors)
+        self.encoder = _getEncoder(out_enc, errors)
+        self.err     = errors
+        self.bufsize = bufsize
 
-        self.decode = codecs.lookup(in_enc)[1]
-        self.err    = errors
+        self._passthrough = bool(
+            _isAsciiCompatible(in_enc) and _isAsciiCompatible(out_enc)
+        )
+        self._pending = False
+        self._buf = []
+        self._buflen = 0
 
 
     def write(self, towrite):
         """ Write a string or unicode """
         if isinstance(towrite, str):
-            super(UnicodeStream, self).write(self.decode(towrite, self.err)[0])
+            if self._passthrough and not self._pending and \
+                    not _findNonAscii(towrite):
+                self._write(towrite)
+                return
+
+            if towrite:
+                # a trailing ASCII byte cannot start a multibyte sequence
+                # in an ASCII compatible encoding
+                self._pending = towrite[-1] >= '\x80'
+            towrite = self.decoder.decode(towrite)
+
+        self._write(self.encoder.encode(towrite))
+
+
+    def _write(self, towrite):
+        """ Writes recoded data to the buffer or the stream
+
+            :param towrite: The data to write
+            :type towrite: ``str``
+        """
+        if not self.bufsize:
+            self.stream.write(towrite)
         else:
-            super(UnicodeStream, self).write(towrite)
+            self._buf.append(towrite)
+            self._buflen += len(towrite)
+            if self._buflen >= self.bufsize:
+                self._flushBuffer()
+
+
+    def _flushBuffer(self):
+        """ Writes the collected data to the stream """
+        if self._buf:
+            buf, self._buf, self._buflen = self._buf, [], 0
+            self.stream.write(''.join(buf))
+
+
+    def flush(self):
+        """ Flushes the buffer and the stream (if possible) """
+        self._flushBuffer()
+        flush = getattr(self.stream, 'flush', None)
+        if flush is not None:
+            flush()
+
+
+    def seek(self, position, mode = 0):
+        """ Sets the file position
+
+            Seeking to the start resets the codecs.
+        """
+        self._flushBuffer()
+        self.stream.seek(position, mode)
+        if position == 0 and mode == 0:
+            self.decoder.reset()
+            self.encoder.reset()
+            self._pending = False
+
+
+    def close(self):
+        """ Finishes the recoding and closes the stream """
+        self._write(self.encoder.encode(self.decoder.decode('', True), True))
+        self._flushBuffer()
+        super(UnicodeStream, self).close()
+
+
+    def __getattr__(self, name):
+        """ Flushes the buffer and delegates to the stream """
+        self._flushBuffer()
+        return getattr(self.stream, name)
+
+
+def _getDecoder(encoding, errors):
+    """ Returns an incremental decoder
+
+        Before python 2.5 there are no incremental decoders, so the
+        decoder function is used (which doesn't keep any state).
+
+        :Parameters:
+         - `encoding`: The encoding
+         - `errors`: The error handling indicator
+
+        :Types:
+         - `encoding`: ``str``
+         - `errors`: ``str``
+
+        :return: The decoder (``codecs.IncrementalDecoder`` or
+                 `_FunctionDecoder`)
+        :rtype: ``object``
+
+        :exception LookupError: The encoding is unknown
+    """
+    import codecs
+
+    try:
+        factory = codecs.getincrementaldecoder
+    except AttributeError:
+        return _FunctionDecoder(codecs.lookup(encoding)[1], errors)
+
+    return factory(encoding)(errors)
+
+
+def _getEncoder(encoding, errors):
+    """ Returns an incremental encoder
+
+        Before python 2.5 there are no incremental encoders, so a
+        ``StreamWriter`` is used to keep the state.
+
+        :Parameters:
+         - `encoding`: The encoding
+         - `errors`: The error handling indicator
+
+        :Types:
+         - `encoding`: ``str``
+         - `errors`: ``str``
+
+        :return: The encoder (``codecs.IncrementalEncoder`` or
+                 `_WriterEncoder`)
+        :rtype: ``object``
+
+        :exception LookupError: The encoding is unknown
+    """
+    import codecs
+
+    try:
+        factory = codecs.getincrementalencoder
+    except AttributeError:
+        return _WriterEncoder(codecs.lookup(encoding)[3], errors)
+
+    return factory(encoding)(errors)
+
+
+class _FunctionDecoder(object):
+    """ Incremental decoder stand-in for python < 2.5
+
+        :IVariables:
+         - `_decode`: The decoder function
+         - `_errors`: The error handling indicator
+
+        :Types:
+         - `_decode`: ``callable``
+         - `_errors`: ``str``
+    """
+
+    def __init__(self, decode, errors):
+        """ Initialization
+
+            :Parameters:
+             - `decode`: The decoder function
+             - `errors`: The error handling indicator
+
+            :Types:
+             - `decode`: ``callable``
+             - `errors`: ``str``
+        """
+        self._decode = decode
+        self._errors = errors
+
+
+    def decode(self, value, final = False):
+        """ Decodes `value` """
+        return self._decode(value, self._errors)[0]
+
+
+    def reset(self):
+        """ Nothing to reset """
+        pass
+
+
+class _WriterEncoder(object):
+    """ Incremental encoder stand-in for python < 2.5
+
+        :IVariables:
+         - `_buf`: The buffer the writer writes into
+         - `_writer`: The ``StreamWriter``
+
+        :Types:
+         - `_buf`: ``file``
+         - `_writer`: ``codecs.StreamWriter``
+    """
+
+    def __init__(self, writer, errors):
+        """ Initialization
+
+            :Parameters:
+             - `writer`: The ``StreamWriter`` factory
+             - `errors`: The error handling indicator
+
+            :Types:
+             - `writer`: ``callable``
+             - `errors`: ``str``
+        """
+        import cStringIO
+
+        self._buf = cStringIO.StringIO()
+        self._writer = writer(self._buf, errors)
+
+
+    def encode(self, value, final = False):
+        """ Encodes `value` """
+        self._writer.write(value)
+        result = self._buf.getvalue()
+        self._buf.seek(0)
+        self._buf.truncate()
+
+        return result
+
+
+    def reset(self):
+        """ Resets the writer state """
+        self._writer.reset()
+
+
+def _isAsciiCompatible(encoding):
+    """ Returns whether pure ASCII data is kept unchanged by `encoding`
+
+        Besides the ASCII range itself the codec must not switch into
+        states where ASCII bytes mean something else (like ISO-2022).
+        The results are cached.
+
+        :param encoding: The encoding to check
+        :type encoding: ``str``
+
+        :return: Is it ASCII compatible?
+        :rtype: ``bool``
+    """
+    try:
+        return _isAsciiCompatible._cache[encoding]
+    except AttributeError:
+        _isAsciiCompatible._cache = {}
+    except KeyError:
+        pass
+
+    ascii = ''.join([chr(num) for num in range(128)])
+    uascii = unicode(ascii, 'us-ascii')
+    result = False
+    try:
+        encoder = _getEncoder(encoding, 'replace')
+        decoder = _getDecoder(encoding, 'replace')
+        if encoder.encode(uascii) == ascii and \
+                decoder.decode(ascii) == uascii:
+            # feed something, that may switch the codec state
+            encoder.encode(u'\u3042\xe9')
+            decoder.decode('\x1b$B')
+            result = encoder.encode(uascii) == ascii and \
+                decoder.decode(ascii) == uascii
+    except (LookupError, UnicodeError):
+        pass
+
+    _isAsciiCompatible._cache[encoding] = result
+    return result
+
+
+def _findNonAscii(value):
+    """ Returns a match object if `value` contains non-ASCII bytes
+
+        :param value: The string to check
+        :type value: ``str``
+
+        :return: The match object or ``None``
+        :rtype: ``_sre.SRE_Match``
+    """
+    try:
+        search = _findNonAscii._search
+    except AttributeError:
+        import re
+        search = _findNonAscii._search = re.compile(r'[\x80-\xff]').search
+
+    return search(value)
 
 
 class BinaryOrUnicodeStream(_BaseStream):
@@ -170,21 +463,34 @@ class TruncatingStream(_BaseStream):
 
 
     def write(self, towrite):
-        """ Writes a string up to the limit """
+        """ Writes a string up to the limit
+
+            The accounting is done per chunk. If the chunk fits, it's passed
+            through as a whole. Otherwise it's cut after the last complete
+            line that still fits and the rest is just counted.
+        """
         if self.current <= self.maxsize:
+            remaining = self.maxsize - self.current
+            self.current += len(towrite)
+            if self.current <= self.maxsize:
+                super(TruncatingStream, self).write(towrite)
+                return
+
+            # find the last line boundary within the limit. We look one
+            # character beyond, so a trailing \r of a \r\n sequence is not
+            # mistaken for a line end.
             written = 0
-            for line in towrite.splitlines(True):
-                self.current += len(line)
-                if self.current <= self.maxsize:
-                    super(TruncatingStream, self).write(line)
-                    written += len(line)
-                else:
-                    towrite = towrite[written:]
+            for line in towrite[:remaining + 1].splitlines(True):
+                if written + len(line) > remaining:
                     break
+                written += len(line)
+
+            if written:
+                super(TruncatingStream, self).write(towrite[:written])
+            towrite = towrite[written:]
 
-        if self.current > self.maxsize:
-            self.trunced += towrite.count('\n')
-            self.lastchar = towrite[-1:]
+        self.trunced += towrite.count('\n')
+        self.lastchar = towrite[-1:]
 
 
     def getTruncatedLineCount(self):
@@ -376,3 +682,54 @@ class CountStream(_BaseStream):
         """ write lines """
         for line in lines:
             self.write(line)
+
+
+class LineHashStream(object):
+    """ Dummy stream, which throws away all data but the line hashes
+
+        It doesn't wrap any stream, it's just a sink.
+
+        :IVariables:
+         - `hashes`: The hashes of the complete lines written so far
+         - `_partial`: The incomplete last line
+
+        :Types:
+         - `hashes`: ``list``
+         - `_partial`: ``str``
+    """
+
+    def __init__(self):
+        """ Initialization """
+        self.hashes = []
+        self._partial = ''
+
+
+    def write(self, towrite):
+        """ throw away stuff and remember the line hashes """
+        lines = (self._partial + towrite).split('\n')
+        self._partial = lines.pop()
+        self.hashes.extend(map(hash, lines))
+
+
+    def writelines(self, lines):
+        """ write lines """
+        for line in lines:
+            self.write(line)
+
+
+    def close(self):
+        """ Nothing to close """
+        pass
+
+
+    def getHashes(self):
+        """ Returns the hashes of all lines
+
+            :return: The hashes (an incomplete last line is included)
+            :rtype: ``list``
+        """
+        if self._partial:
+            self.hashes.append(hash(self._partial))
+            self._partial = ''
+
+        return self.hashes
@@ -119,6 +119,39 @@ def isBinary(mtype):
     )
 
 
+def isBinaryContent(data):
+    """ Returns True if the supplied data looks like binary content
+
+        The data is considered binary if it contains a NUL byte or if more
+        than 30% of it are control characters (except the usual
+        whitespace). Bytes above 127 are counted as text, since they're
+        common in 8 bit and UTF-8 encoded text.
+
+        :param data: The data (usually the start of a file)
+        :type data: ``str``
+
+        :return: The decision
+        :rtype: ``bool``
+    """
+    if not data:
+        return False
+    if '\0' in data:
+        return True
+
+    try:
+        identity, control = isBinaryContent._tables
+    except AttributeError:
+        identity = ''.join([chr(num) for num in range(256)])
+        control = ''.join([
+            chr(num) for num in range(32) + [127]
+            if chr(num) not in '\t\n\r\f\b\x1b'
+        ])
+        isBinaryContent._tables = (identity, control)
+
+    textsize = len(data.translate(identity, control))
+    return (len(data) - textsize) * 10 > len(data) * 3
+
+
 class RepositoryError(Exception):
     """ A repository error occured
 
@@ -171,6 +204,12 @@ class Repository(object):
          - `_revTimes`: Cached revision times
          - `_pathProps`: Cached path properties
          - `_pathPropLists`: Cached path propery lists
+         - `_pathBinaries`: Cached content sniffing results
+         - `_pathLengths`: Cached file lengths
+         - `_pathChecksums`: Cached file checksums
+
+        :CVariables:
+         - `SNIFF_SIZE`: The number of bytes read by content sniffing
 
         :Types:
          - `path`: ``unicode``
@@ -184,7 +223,12 @@ class Repository(object):
          - `_revTimes`: ``dict``
          - `_pathProps`: ``dict``
          - `_pathPropLists`: ``dict``
+         - `_pathBinaries`: ``dict``
+         - `_pathLengths`: ``dict``
+         - `_pathChecksums`: ``dict``
+         - `SNIFF_SIZE`: ``int``
     """
+    SNIFF_SIZE = 8192
     _pool = None
     _apr_initialized = False
 
@@ -217,6 +261,9 @@ class Repository(object):
         self._revTimes = {}
         self._pathProps = {}
         self._pathPropLists = {}
+        self._pathBinaries = {}
+        self._pathLengths = {}
+        self._pathChecksums = {}
         self.path = repos_path
 
 
@@ -340,6 +387,116 @@ class Repository(object):
         )
 
 
+    def getPathLength(self, path, revision):
+        """ Get the length of a particular file
+
+            :Parameters:
+             - `path`: The path of the file
+             - `revision`: The revision number
+
+            :Types:
+             - `path`: ``str``
+             - `revision`: ``int``
+
+            :return: The length in bytes
+            :rtype: ``int``
+        """
+        try:
+            length = self._pathLengths[(path, revision)]
+        except KeyError:
+            root = self._getRevisionRoot(revision)
+            length = self._pathLengths[(path, revision)] = int(
+                svn_fs.file_length(root, path, self._pool)
+            )
+
+        return length
+
+
+    def getPathChecksum(self, path, revision):
+        """ Get the MD5 checksum of a particular file
+
+            The checksum is stored in the repository, so the content
+            doesn't need to be read (usually).
+
+            :Parameters:
+             - `path`: The path of the file
+             - `revision`: The revision number
+
+            :Types:
+             - `path`: ``str``
+             - `revision`: ``int``
+
+            :return: The checksum as hex string
+            :rtype: ``str``
+        """
+        try:
+            checksum = self._pathChecksums[(path, revision)]
+        except KeyError:
+            root = self._getRevisionRoot(revision)
+            try:
+                file_checksum = svn_fs.file_checksum # >= 1.6
+            except AttributeError:
+                checksum = svn_fs.file_md5_checksum(
+                    root, path, self._pool
+                ).encode('hex')
+            else:
+                checksum = svn_core.svn_checksum_to_cstring_display(
+                    file_checksum(
+                        svn_core.svn_checksum_md5, root, path, True,
+                        self._pool
+                    ), self._pool
+                )
+            self._pathChecksums[(path, revision)] = checksum
+
+        return checksum
+
+
+    def isPathContentBinary(self, path, revision):
+        """ Determine whether the content of a file looks binary
+
+            Only the first `SNIFF_SIZE` bytes are read and checked by
+            `isBinaryContent`.
+
+            :Parameters:
+             - `path`: The path of the file
+             - `revision`: The revision number
+
+            :Types:
+             - `path`: ``str``
+             - `revision`: ``int``
+
+            :return: is binary?
+            :rtype: ``bool``
+        """
+        try:
+            result = self._pathBinaries[(path, revision)]
+        except KeyError:
+            pool = svn_core.svn_pool_create(self._pool)
+            try:
+                root = self._getRevisionRoot(revision)
+                stream = svn_fs.file_contents(root, path, pool)
+
+                try:
+                    chunks, size = [], 0
+                    while size < self.SNIFF_SIZE:
+                        chunk = svn_core.svn_stream_read(
+                            stream, self.SNIFF_SIZE - size
+                        )
+                        if not chunk:
+                            break
+                        chunks.append(chunk)
+                        size += len(chunk)
+                finally:
+                    svn_core.svn_stream_close(stream)
+            finally:
+                svn_core.svn_pool_destroy(pool)
+
+            result = self._pathBinaries[(path, revision)] = \
+                isBinaryContent(''.join(chunks))
+
+        return result
+
+
     def dumpPathContent(self, fp, path, revision):
         """ Dump the contents of a particular path into a file
 
@@ -692,21 +849,79 @@ class VersionedPathDescriptor(PathDescriptor):
     def isBinary(self):
         """ Returns whether one of the revisions is a binary file
 
+            Revisions without a mime type are considered binary if their
+            content looks binary (see `Repository.isPathContentBinary`).
+
             :return: is binary?
             :rtype: ``bool``
         """
+        revisions = []
         if not self.wasDeleted():
-            if isBinary(self.repos.getPathMimeType(
-                self.path, self.revision
-            )):
+            revisions.append((self.path, self.revision))
+        if not self.wasAdded() or self.wasCopied():
+            revisions.append((self.getBasePath(), self.getBaseRevision()))
+
+        sniff = []
+        for path, revision in revisions:
+            mtype = self.repos.getPathMimeType(path, revision)
+            if isBinary(mtype):
+                return True
+            elif not mtype:
+                sniff.append((path, revision))
+
+        if self.isDirectory():
+            return False
+
+        for path, revision in sniff:
+            if self.repos.isPathContentBinary(path, revision):
                 return True
 
+        return False
+
+
+    def hasIdenticalContent(self):
+        """ Returns whether the old and the new revision have the same content
+
+            This is determined by comparing the lengths and checksums
+            stored in the repository, so no content is read. It's ``False``
+            for directories and for files that were added (without history)
+            or deleted.
+
+            :return: is the content the same?
+            :rtype: ``bool``
+        """
+        if self.isDirectory() or self.wasDeleted() or \
+                (self.wasAdded() and not self.wasCopied()):
+            return False
+
+        repos = self.repos
+        base = (self.getBasePath(), self.getBaseRevision())
+        current = (self.path, self.revision)
+
+        return bool(
+            repos.getPathLength(*base) == repos.getPathLength(*current) and
+            repos.getPathChecksum(*base) == repos.getPathChecksum(*current)
+        )
+
+
+    def getContentLength(self):
+        """ Returns the length of the larger revision of a file
+
+            :return: The length in bytes (``0`` for directories)
+            :rtype: ``int``
+        """
+        if self.isDirectory():
+            return 0
+
+        lengths = [0]
+        if not self.wasDeleted():
+            lengths.append(self.repos.getPathLength(self.path, self.revision))
         if not self.wasAdded() or self.wasCopied():
-            return isBinary(self.repos.getPathMimeType(
+            lengths.append(self.repos.getPathLength(
                 self.getBasePath(), self.getBaseRevision()
             ))
 
-        return False
+        return max(lengths)
 
 
     def hasPropertyChanges(self):
@@ -27,10 +27,12 @@ __author__    = "André Malo"
 __docformat__ = "restructuredtext en"
 __all__       = [
     'TempFile',
+    'SpooledTempFile',
     'splitCommand',
     'filename',
     'extractX509User',
     'substitute',
+    'Template',
     'filterForXml',
     'getParentDirList',
     'getGlobValue',
@@ -106,6 +108,17 @@ class TempFile(object):
                 pass
 
 
+    def getvalue(self):
+        """ Returns the data if it's held in memory (never)
+
+            This is for compatibility with `SpooledTempFile`.
+
+            :return: ``None``
+            :rtype: ``NoneType``
+        """
+        return None
+
+
     def close(self):
         """ Close the file (but don't delete it)
 
@@ -115,6 +128,157 @@ class TempFile(object):
             self.fp.close()
 
 
+class SpooledTempFile(object):
+    """ Tempfile container, which keeps small contents in memory
+
+        The data is collected in memory until it grows beyond `maxsize`
+        bytes. Then it's moved into a `TempFile`. Accessing `name`
+        moves the data to disk as well, so the container can be used
+        wherever a `TempFile` is expected.
+
+        :IVariables:
+         - `fp`: The stream to write to
+
+        :Types:
+         - `fp`: `_SpoolStream`
+    """
+
+    def __init__(self, tempdir = None, maxsize = 0):
+        """ Initialization
+
+            :Parameters:
+             - `tempdir`: The temporary directory
+             - `maxsize`: The maximum number of bytes kept in memory
+
+            :Types:
+             - `tempdir`: ``str``
+             - `maxsize`: ``int``
+        """
+        self.fp = _SpoolStream(tempdir, maxsize)
+
+
+    def _getName(self):
+        """ Returns the file name (moves the data to disk if necessary)
+
+            :return: The full name of the file
+            :rtype: ``str``
+        """
+        return self.fp.rollover().name
+
+    name = property(_getName, doc = """ The full name of the file """)
+
+
+    def getvalue(self):
+        """ Returns the data if it's still held in memory
+
+            :return: The data or ``None`` if it's on disk
+            :rtype: ``str``
+        """
+        return self.fp.getvalue()
+
+
+    def close(self):
+        """ Close the file (but don't delete it) """
+        self.fp.close()
+
+
+class _SpoolStream(object):
+    """ Write stream of `SpooledTempFile`
+
+        :IVariables:
+         - `_tempdir`: The temporary directory
+         - `_maxsize`: The maximum number of bytes kept in memory
+         - `_chunks`: The data chunks (or ``None`` if it's on disk)
+         - `_size`: The number of bytes in `_chunks`
+         - `_file`: The temporary file (or ``None``)
+         - `_closed`: Was the stream closed?
+
+        :Types:
+         - `_tempdir`: ``str``
+         - `_maxsize`: ``int``
+         - `_chunks`: ``list``
+         - `_size`: ``int``
+         - `_file`: `TempFile`
+         - `_closed`: ``bool``
+    """
+
+    def __init__(self, tempdir, maxsize):
+        """ Initialization
+
+            :Parameters:
+             - `tempdir`: The temporary directory
+             - `maxsize`: The maximum number of bytes kept in memory
+
+            :Types:
+             - `tempdir`: ``str``
+             - `maxsize`: ``int``
+        """
+        self._tempdir = tempdir
+        self._maxsize = maxsize
+        self._chunks = []
+        self._size = 0
+        self._file = None
+        self._closed = False
+
+
+    def write(self, data):
+        """ Writes data to the stream
+
+            :param data: The data to write
+            :type data: ``str``
+        """
+        if self._chunks is None:
+            self._file.fp.write(data)
+        else:
+            self._chunks.append(data)
+            self._size += len(data)
+            if self._size > self._maxsize:
+                self.rollover()
+
+
+    def flush(self):
+        """ Flushes the stream """
+        if self._file is not None:
+            self._file.fp.flush()
+
+
+    def close(self):
+        """ Closes the stream (the data is kept) """
+        self._closed = True
+        if self._file is not None:
+            self._file.close()
+
+
+    def getvalue(self):
+        """ Returns the data if it's still held in memory
+
+            :return: The data or ``None``
+            :rtype: ``str``
+        """
+        if self._chunks is None:
+            return None
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+
+        return self._chunks and self._chunks[0] or ""
+
+
+    def rollover(self):
+        """ Moves the data into a temporary file (if not done already)
+
+            :return: The temporary file
+            :rtype: `TempFile`
+        """
+        if self._chunks is not None:
+            self._file = TempFile(self._tempdir)
+            self._file.fp.write("".join(self._chunks))
+            self._chunks = None
+            if self._closed:
+                self._file.close()
+
+        return self._file
+
+
 def splitCommand(command):
     r"""Split a command string with respect to quotes and such
 
@@ -380,10 +544,98 @@ def substitute(template, subst):
     """
     if template is None:
         return None
+    elif isinstance(template, Template):
+        return template.substitute(subst)
 
     return template % SafeDict(subst)
 
 
+class Template(unicode):
+    """ Substitution template, which is parsed only once
+
+        The template is a unicode string, which can be substituted like
+        ``template % SafeDict(subst)``. Templates consisting only of
+        ``%(name)s`` placeholders and ``%%`` escapes are split into their
+        segments in advance, so substituting them is a simple join (and
+        templates without placeholders are returned immediately). Other
+        templates fall back to the ``%`` operator.
+
+        :CVariables:
+         - `_PARSE`: The placeholder finder
+
+        :IVariables:
+         - `_segments`: The literal and placeholder segments
+           (``[literal, name, literal, ...]``), ``None`` if the template
+           needs the ``%`` operator
+
+        :Types:
+         - `_PARSE`: ``callable``
+         - `_segments`: ``list``
+    """
+    import re as _re
+    _PARSE = _re.compile(ur'%(?:\(([^()]*)\)s|(%)|)').finditer
+    del _re
+
+    def __new__(cls, template):
+        """ Parses the template
+
+            :param template: The template
+            :type template: ``unicode``
+
+            :return: The new template
+            :rtype: `Template`
+        """
+        self = unicode.__new__(cls, template)
+
+        segments, literal, pos = [], [], 0
+        for match in self._PARSE(self):
+            literal.append(self[pos:match.start()])
+            pos = match.end()
+            name, escape = match.group(1, 2)
+            if escape:
+                literal.append(u'%')
+            elif name is not None:
+                segments.extend([u''.join(literal), name])
+                literal = []
+            else:
+                # something else than %(name)s and %% needs the real thing
+                segments = None
+                break
+        else:
+            literal.append(self[pos:])
+            segments.append(u''.join(literal))
+
+        self._segments = segments
+
+        return self
+
+
+    def substitute(self, subst):
+        """ Returns the filled template
+
+            :param subst: The substitution parameters
+            :type subst: ``dict``
+
+            :return: The filled template
+            :rtype: ``unicode``
+        """
+        segments = self._segments
+        if segments is None:
+            return unicode(self) % SafeDict(subst)
+        elif len(segments) == 1:
+            return segments[0]
+
+        result = segments[:]
+        get = subst.get
+        for idx in xrange(1, len(result), 2):
+            value = get(result[idx]) or u''
+            if not isinstance(value, basestring):
+                value = u"%s" % (value,)
+            result[idx] = value
+
+        return u''.join(result)
+
+
 def filterForXml(value):
     """ Replaces control characters with replace characters
 
@@ -0,0 +1,1130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+usage: benchmark.py [options] [scenario ...]
+
+Runs svnmailer end-to-end against synthetic repositories.
+
+The repositories are created with ``svnadmin`` and filled via the subversion
+python bindings (they're kept in the work directory and reused by later
+runs). Every scenario is a repository, whose youngest revision is the one
+being notified about:
+
+  small      many small files modified, some added and deleted
+  huge       a few huge files with scattered changes
+  branch     a branch copy of 50k paths
+  props      heavy property churn
+  encodings  files in mixed encodings (declared by svn:mime-type and
+             svnmailer:content-charset)
+
+Every scenario is notified in every selected delivery mode:
+
+  debug      mail notifier in debug mode (writes to stdout)
+  smtp       mail notifier, delivering to a local SMTP stand-in
+  nntp       news notifier, posting to a local NNTP stand-in
+  cia        CIA notifier, delivering to a local XML-RPC stand-in
+
+Each run happens in a fresh child process. The report contains the wall
+time of the run (``Main.fromCommandline`` and ``Main.run``), the time of
+the whole child process, its peak RSS and the exclusive time spent in the
+main phases. Results can be saved as baseline (``--save-baseline``) and
+compared against a stored baseline later (``--baseline``). Use ``--lib``
+to benchmark another checkout of the library (e.g. to create a baseline
+of an older version).
+
+options:
+  -w DIR, --workdir=DIR    The directory for the repositories (default:
+                           bench-work next to this script)
+  -s N, --scale=N          Scale factor for the scenario sizes (default: 1.0)
+  -m MODES, --modes=MODES  Comma separated delivery modes (default: all)
+  -n N, --repeat=N         Run every benchmark N times, keep the fastest
+                           (default: 1)
+  -o S.O=V, --option=S.O=V Additional config option (e.g.
+                           general.diff_processes=4), may be repeated
+  -l DIR, --lib=DIR        The library directory to benchmark (default:
+                           ../src/lib relative to this script)
+  -b FILE, --baseline=FILE Compare the results against the baseline
+  --save-baseline=FILE     Store the results as baseline
+  --rebuild                Recreate the repositories
+"""
+__docformat__ = "restructuredtext en"
+
+import os, sys, SocketServer
+
+SCENARIOS = ('small', 'huge', 'branch', 'props', 'encodings')
+MODES = ('debug', 'smtp', 'nntp', 'cia')
+PHASES = (
+    ('settings',   'svnmailer.main', 'Main', 'fromOptions'),
+    ('repository', 'svnmailer.main', 'Main', '_openRepository'),
+    ('changes',    'svnmailer.main', 'Main', '_getChanges'),
+    ('groups',     'svnmailer.main', 'Main', '_getGroupSets'),
+    ('select',     'svnmailer.notifier.selector', 'Selector',
+                   'selectNotifiers'),
+    ('dump',       'svnmailer.notifier._base', 'BaseNotifier',
+                   'dumpContent'),
+    ('finish',     'svnmailer.notifier.selector', 'Selector', 'finish'),
+)
+
+
+class Error(Exception):
+    """ Benchmark error """
+    pass
+
+
+class Builder(object):
+    """ Creates and fills a repository
+
+        :ivar _repos: The repository
+        :type _repos: ``svn_repos_t``
+
+        :ivar _fs: The repository filesystem
+        :type _fs: ``svn_fs_t``
+    """
+
+    def __init__(self, path):
+        """ Initialization (creates the repository)
+
+            :param path: The repository path
+            :type path: ``str``
+
+            :exception Error: ``svnadmin`` failed
+        """
+        import subprocess
+        from svn import core as svn_core, repos as svn_repos
+
+        if subprocess.call(["svnadmin", "create", "--fs-type", "fsfs", path]):
+            raise Error("svnadmin create %s failed" % path)
+
+        svn_core.apr_initialize()
+        self._repos = svn_repos.svn_repos_open(path)
+        self._fs = svn_repos.svn_repos_fs(self._repos)
+
+
+    def commit(self, log, edit):
+        """ Commits a revision
+
+            :Parameters:
+             - `log`: The log message
+             - `edit`: Callable, which receives a `Transaction` and applies
+               the changes
+
+            :Types:
+             - `log`: ``str``
+             - `edit`: ``callable``
+
+            :return: The new revision number
+            :rtype: ``int``
+        """
+        from svn import fs as svn_fs, repos as svn_repos
+
+        base = svn_fs.youngest_rev(self._fs)
+        txn = svn_repos.svn_repos_fs_begin_txn_for_commit(
+            self._repos, base, "bench", log
+        )
+        edit(Transaction(
+            svn_fs.txn_root(txn), svn_fs.revision_root(self._fs, base)
+        ))
+        svn_repos.svn_repos_fs_commit_txn(self._repos, txn)
+
+        return svn_fs.youngest_rev(self._fs)
+
+
+class Transaction(object):
+    """ Simple wrapper around a transaction root
+
+        :ivar _root: The transaction root
+        :type _root: ``svn_fs_root_t``
+
+        :ivar _base: The root of the base revision
+        :type _base: ``svn_fs_root_t``
+    """
+
+    def __init__(self, root, base):
+        """ Initialization
+
+            :Parameters:
+             - `root`: The transaction root
+             - `base`: The root of the base revision
+
+            :Types:
+             - `root`: ``svn_fs_root_t``
+             - `base`: ``svn_fs_root_t``
+        """
+        self._root = root
+        self._base = base
+
+
+    def mkdir(self, path):
+        """ Creates a directory (and its parents, if necessary)
+
+            :param path: The directory path
+            :type path: ``str``
+        """
+        from svn import core as svn_core, fs as svn_fs
+
+        if svn_fs.check_path(self._root, path) == svn_core.svn_node_none:
+            parent = os.path.dirname(path)
+            if parent:
+                self.mkdir(parent)
+            svn_fs.make_dir(self._root, path)
+
+
+    def write(self, path, data):
+        """ Stores a file content (the file is created if necessary)
+
+            :Parameters:
+             - `path`: The file path
+             - `data`: The content
+
+            :Types:
+             - `path`: ``str``
+             - `data`: ``str``
+        """
+        from svn import core as svn_core, fs as svn_fs
+
+        if svn_fs.check_path(self._root, path) == svn_core.svn_node_none:
+            parent = os.path.dirname(path)
+            if parent:
+                self.mkdir(parent)
+            svn_fs.make_file(self._root, path)
+
+        stream = svn_fs.apply_text(self._root, path, None)
+        for pos in xrange(0, len(data), 65536):
+            svn_core.svn_stream_write(stream, data[pos:pos + 65536])
+        svn_core.svn_stream_close(stream)
+
+
+    def setprop(self, path, name, value):
+        """ Sets (or deletes) a node property
+
+            :Parameters:
+             - `path`: The node path
+             - `name`: The property name
+             - `value`: The property value (``None`` deletes the property)
+
+            :Types:
+             - `path`: ``str``
+             - `name`: ``str``
+             - `value`: ``str``
+        """
+        from svn import fs as svn_fs
+
+        svn_fs.change_node_prop(self._root, path, name, value)
+
+
+    def copy(self, source, path):
+        """ Copies a node from the base revision
+
+            :Parameters:
+             - `source`: The source path
+             - `path`: The target path
+
+            :Types:
+             - `source`: ``str``
+             - `path`: ``str``
+        """
+        from svn import fs as svn_fs
+
+        parent = os.path.dirname(path)
+        if parent:
+            self.mkdir(parent)
+        svn_fs.copy(self._base, source, self._root, path)
+
+
+    def delete(self, path):
+        """ Deletes a node
+
+            :param path: The node path
+            :type path: ``str``
+        """
+        from svn import fs as svn_fs
+
+        svn_fs.delete(self._root, path)
+
+
+class Generator(object):
+    """ Generates the scenario repositories
+
+        :ivar _scale: The scale factor
+        :type _scale: ``float``
+
+        :ivar _random: The random generator
+        :type _random: ``random.Random``
+    """
+    _WORDS = (
+        "svn", "mailer", "commit", "revision", "diff", "notifier", "group",
+        "path", "property", "content", "stream", "config", "repository",
+        "return", "self", "if", "else", "for", "in", "import", "def",
+        "class", "None", "True", "False", "value", "name", "data", "(", ")",
+    )
+    _ENCODINGS = (
+        'utf-8', 'iso-8859-1', 'cp1252', 'iso-8859-15', 'koi8-r',
+        'shift_jis', 'euc-jp', 'big5', 'utf-16',
+    )
+    _SAMPLES = (
+        u"Gr\xfc\xdfe aus K\xf6ln, \xe0 bient\xf4t €",
+        u"Привет, мир",
+        u"日本語のテキスト",
+        u"中文內容",
+    )
+
+    def __init__(self, scale):
+        """ Initialization
+
+            :param scale: The scale factor
+            :type scale: ``float``
+        """
+        import random
+
+        self._scale = scale
+        self._random = random.Random(42)
+
+
+    def build(self, scenario, path):
+        """ Creates the repository of a scenario
+
+            :Parameters:
+             - `scenario`: The scenario name
+             - `path`: The repository path
+
+            :Types:
+             - `scenario`: ``str``
+             - `path`: ``str``
+
+            :return: The revision to notify about
+            :rtype: ``int``
+        """
+        builder = Builder(path)
+        return getattr(self, "_build_%s" % scenario)(builder)
+
+
+    def _count(self, count):
+        """ Returns a scaled number (at least 1) """
+        return max(1, int(count * self._scale))
+
+
+    def _lines(self, count):
+        """ Returns random text lines
+
+            :param count: The number of lines
+            :type count: ``int``
+
+            :return: The lines
+            :rtype: ``list``
+        """
+        choice, randint, words = (
+            self._random.choice, self._random.randint, self._WORDS
+        )
+        return ["%s\n" % " ".join([
+            choice(words) for _ in xrange(randint(1, 12))
+        ]) for _ in xrange(count)]
+
+
+    def _modify(self, lines, count):
+        """ Changes, inserts and deletes some lines
+
+            :Parameters:
+             - `lines`: The lines (modified in place)
+             - `count`: The number of modifications
+
+            :Types:
+             - `lines`: ``list``
+             - `count`: ``int``
+
+            :return: The lines
+            :rtype: ``list``
+        """
+        rand = self._random
+        for _ in xrange(count):
+            pos = rand.randrange(len(lines) or 1)
+            what = rand.random()
+            if what < 0.5 and lines:
+                lines[pos:pos + 1] = self._lines(1)
+            elif what < 0.8:
+                lines[pos:pos] = self._lines(rand.randint(1, 3))
+            elif lines:
+                del lines[pos]
+
+        return lines
+
+
+    def _build_small(self, builder):
+        """ Many small files, all modified, some added and deleted """
+        files = {}
+        for idx in xrange(self._count(5000)):
+            files["trunk/small/d%03d/f%05d.txt" % (idx // 100, idx)] = \
+                self._lines(self._random.randint(10, 60))
+
+        def create(txn):
+            """ Initial import """
+            for name, lines in files.iteritems():
+                txn.write(name, "".join(lines))
+        builder.commit("import", create)
+
+        names = sorted(files)
+        def modify(txn):
+            """ Modify all, delete and add some """
+            for idx, name in enumerate(names):
+                if idx % 10 == 9:
+                    txn.delete(name)
+                else:
+                    txn.write(name, "".join(self._modify(files[name], 3)))
+            for idx in xrange(self._count(500)):
+                txn.write("trunk/small/new/n%05d.txt" % idx,
+                    "".join(self._lines(20))
+                )
+        return builder.commit("modify small files", modify)
+
+
+    def _build_huge(self, builder):
+        """ A few huge files with scattered changes """
+        files = {}
+        for idx in xrange(3):
+            # average line length is about 40 bytes
+            files["trunk/huge/h%d.txt" % idx] = \
+                self._lines(self._count(500000))
+
+        def create(txn):
+            """ Initial import """
+            for name, lines in files.iteritems():
+                txn.write(name, "".join(lines))
+        builder.commit("import", create)
+
+        def modify(txn):
+            """ Scattered changes plus appended lines """
+            for name, lines in files.iteritems():
+                self._modify(lines, 20)
+                lines.extend(self._lines(100))
+                txn.write(name, "".join(lines))
+        return builder.commit("modify huge files", modify)
+
+
+    def _build_branch(self, builder):
+        """ Branch copy of 50k paths """
+        count = self._count(50000)
+
+        def create(txn):
+            """ Initial import """
+            for idx in xrange(count):
+                txn.write("trunk/src/m%03d/p%05d.txt" % (idx // 200, idx),
+                    "".join(self._lines(2))
+                )
+        builder.commit("import", create)
+
+        def branch(txn):
+            """ Branch copy """
+            txn.copy("trunk", "branches/b1")
+        return builder.commit("create branch", branch)
+
+
+    def _build_props(self, builder):
+        """ Heavy property churn """
+        names = ["trunk/props/p%05d.txt" % idx
+            for idx in xrange(self._count(2000))
+        ]
+
+        def create(txn):
+            """ Initial import with properties """
+            for name in names:
+                txn.write(name, "".join(self._lines(5)))
+                for prop in xrange(10):
+                    txn.setprop(name, "bench:p%d" % prop,
+                        "".join(self._lines(self._random.randint(1, 5)))
+                    )
+                txn.setprop(name, "svn:eol-style", "native")
+        builder.commit("import", create)
+
+        def modify(txn):
+            """ Change, add and delete properties """
+            for name in names:
+                for prop in xrange(8):
+                    txn.setprop(name, "bench:p%d" % prop,
+                        "".join(self._lines(self._random.randint(1, 5)))
+                    )
+                for prop in xrange(8, 10):
+                    txn.setprop(name, "bench:p%d" % prop, None)
+                for prop in xrange(10, 15):
+                    txn.setprop(name, "bench:p%d" % prop,
+                        "".join(self._lines(1))
+                    )
+        return builder.commit("property churn", modify)
+
+
+    def _build_encodings(self, builder):
+        """ Files in mixed encodings """
+        files = {}
+        for enc in self._ENCODINGS:
+            for idx in xrange(self._count(100)):
+                lines = self._lines(30)
+                for pos in xrange(0, 30, 3):
+                    sample = self._SAMPLES[pos % len(self._SAMPLES)]
+                    lines[pos] = u"%s\n" % sample
+                files["trunk/enc/%s/e%04d.txt" % (enc, idx)] = (enc, lines)
+
+        def encode(enc, lines):
+            """ Encodes the lines (unknown characters become ``?``) """
+            return u"".join([
+                isinstance(line, unicode) and line or line.decode('ascii')
+                for line in lines
+            ]).encode(enc, 'replace')
+
+        def create(txn):
+            """ Initial import, declaring the encodings """
+            for idx, name in enumerate(sorted(files)):
+                enc, lines = files[name]
+                txn.write(name, encode(enc, lines))
+                if idx % 2:
+                    txn.setprop(name, "svn:mime-type",
+                        "text/plain; charset=%s" % enc
+                    )
+                else:
+                    txn.setprop(name, "svnmailer:content-charset", enc)
+        builder.commit("import", create)
+
+        def modify(txn):
+            """ Modify all files """
+            for name, (enc, lines) in files.iteritems():
+                txn.write(name, encode(enc, self._modify(lines, 4)))
+        return builder.commit("modify encoded files", modify)
+
+
+class StandIns(object):
+    """ Local SMTP, NNTP and XML-RPC servers, which swallow everything
+
+        :ivar ports: The ports of the servers (``{mode: port}``)
+        :type ports: ``dict``
+
+        :ivar _servers: The servers
+        :type _servers: ``list``
+
+        :ivar _stats: Received messages and bytes (``[messages, bytes]``)
+        :type _stats: ``list``
+    """
+
+    def __init__(self, modes):
+        """ Initialization (starts the servers)
+
+            :param modes: The delivery modes to serve
+            :type modes: ``list``
+        """
+        import threading
+
+        self.ports = {}
+        self._servers = []
+        self._stats = [0, 0]
+        stats, lock = self._stats, threading.Lock()
+
+        def count(size):
+            """ Counts a received message """
+            lock.acquire()
+            try:
+                stats[0] += 1
+                stats[1] += size
+            finally:
+                lock.release()
+
+        class Server(SocketServer.ThreadingTCPServer):
+            """ Threading server """
+            allow_reuse_address = True
+            daemon_threads = True
+
+        for mode in modes:
+            if mode == 'smtp':
+                server = Server(('127.0.0.1', 0), _SMTPHandler)
+            elif mode == 'nntp':
+                server = Server(('127.0.0.1', 0), _NNTPHandler)
+            elif mode == 'cia':
+                server = _createXMLRPCServer(count)
+            else:
+                continue
+            server.count = count
+            self.ports[mode] = server.server_address[1]
+            self._servers.append(server)
+
+            thread = threading.Thread(target = server.serve_forever)
+            thread.setDaemon(True)
+            thread.start()
+
+
+    def reset(self):
+        """ Resets the statistics """
+        self._stats[:] = [0, 0]
+
+
+    def getStats(self):
+        """ Returns the statistics
+
+            :return: The number of received messages and bytes
+            :rtype: ``tuple``
+        """
+        return tuple(self._stats)
+
+
+    def close(self):
+        """ Stops the servers """
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+
+
+def _createXMLRPCServer(count):
+    """ Returns a local XML-RPC server with a ``hub.deliver`` method
+
+        :param count: The message counter
+        :type count: ``callable``
+
+        :return: The server
+        :rtype: ``SimpleXMLRPCServer.SimpleXMLRPCServer``
+    """
+    import SimpleXMLRPCServer
+
+    class Handler(SimpleXMLRPCServer.SimpleXMLRPCRequestHandler):
+        """ Keep-alive request handler """
+        protocol_version = "HTTP/1.1"
+
+    class Server(SocketServer.ThreadingMixIn,
+                 SimpleXMLRPCServer.SimpleXMLRPCServer):
+        """ Threading XML-RPC server """
+        allow_reuse_address = True
+        daemon_threads = True
+
+    def deliver(message):
+        """ Swallows a message """
+        count(len(message))
+        return True
+
+    server = Server(('127.0.0.1', 0), Handler, logRequests = False)
+    server.register_function(deliver, 'hub.deliver')
+    return server
+
+
+def _readData(rfile):
+    """ Reads a dot terminated message
+
+        :param rfile: The stream to read from
+        :type rfile: ``file``
+
+        :return: The size of the message
+        :rtype: ``int``
+    """
+    size = 0
+    while True:
+        line = rfile.readline()
+        if not line or line.rstrip("\r\n") == ".":
+            return size
+        size += len(line)
+
+
+class _LineHandler(SocketServer.StreamRequestHandler):
+    """ Line protocol server session """
+
+    def reply(self, line):
+        """ Sends a reply line """
+        self.wfile.write("%s\r\n" % line)
+        self.wfile.flush()
+
+
+class _SMTPHandler(_LineHandler):
+    """ Minimal SMTP server session """
+
+    def handle(self):
+        """ Handles the session """
+        self.reply("220 localhost benchmark ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                break
+            cmd = line[:4].upper()
+            if cmd == "DATA":
+                self.reply("354 go ahead")
+                self.server.count(_readData(self.rfile))
+                self.reply("250 ok")
+            elif cmd == "QUIT":
+                self.reply("221 bye")
+                break
+            else: # EHLO, HELO, MAIL, RCPT, RSET, NOOP
+                self.reply("250 ok")
+
+
+class _NNTPHandler(_LineHandler):
+    """ Minimal NNTP server session """
+
+    def handle(self):
+        """ Handles the session """
+        self.reply("200 localhost benchmark")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                break
+            words = line.split()
+            cmd = words and words[0].upper() or ""
+            if cmd == "POST":
+                self.reply("340 send article")
+                self.server.count(_readData(self.rfile))
+                self.reply("240 article received")
+            elif cmd == "QUIT":
+                self.reply("205 bye")
+                break
+            elif cmd == "MODE":
+                self.reply("200 reader mode")
+            elif cmd == "AUTHINFO":
+                self.reply("281 ok")
+            else:
+                self.reply("500 unknown command")
+
+
+def getConfig(mode, scenario, ports, options):
+    """ Returns the svnmailer configuration of a benchmark run
+
+        :Parameters:
+         - `mode`: The delivery mode
+         - `scenario`: The scenario name
+         - `ports`: The ports of the stand-ins
+         - `options`: Additional options (``[(section, option, value),
+           ...]``)
+
+        :Types:
+         - `mode`: ``str``
+         - `scenario`: ``str``
+         - `ports`: ``dict``
+         - `options`: ``list``
+
+        :return: The configuration file content
+        :rtype: ``str``
+    """
+    sections = {
+        'general': [],
+        'defaults': [
+            ("from_addr", "bench@localhost"),
+            ("generate_diffs", "add copy modify propchange"),
+        ],
+    }
+    general, defaults = sections['general'], sections['defaults']
+    if scenario == 'encodings':
+        defaults.append(("apply_charset_property", "yes"))
+
+    if mode == 'debug':
+        defaults.append(("to_addr", "commits@localhost"))
+    elif mode == 'smtp':
+        general.append(("smtp_host", "127.0.0.1:%d" % ports[mode]))
+        defaults.append(("to_addr", "commits@localhost"))
+    elif mode == 'nntp':
+        general.append(("nntp_host", "127.0.0.1:%d" % ports[mode]))
+        defaults.append(("to_newsgroup", "bench.commits"))
+    elif mode == 'cia':
+        general.append(("cia_rpc_server", "http://127.0.0.1:%d/" % ports[mode]))
+        defaults.append(("cia_project_name", "bench"))
+
+    for section, option, value in options:
+        sections.setdefault(section, []).append((option, value))
+
+    result = []
+    for section in ['general', 'defaults'] + sorted([name
+            for name in sections if name not in ('general', 'defaults')]):
+        result.append("[%s]" % section)
+        result.extend(["%s = %s" % item for item in sections[section]])
+        result.append("")
+
+    return "\n".join(result)
+
+
+def runChild(args):
+    """ Runs svnmailer in the child process and stores the results
+
+        :param args: The arguments (``[resultfile, svn-mailer args ...]``)
+        :type args: ``list``
+    """
+    import resource, time
+
+    resultfile, args = args[0], args[1:]
+    times = {}
+    stack = []
+
+    def wrap(phase, func):
+        """ Wraps a function, so its exclusive time is accounted """
+        def timed(*args, **kwargs):
+            """ Timed call """
+            stack.append(0.0)
+            start = time.time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                spent = time.time() - start
+                inner = stack.pop()
+                times[phase] = times.get(phase, 0.0) + spent - inner
+                if stack:
+                    stack[-1] += spent
+        return timed
+
+    for phase, modname, clsname, funcname in PHASES:
+        cls = getattr(__import__(modname, {}, {}, [clsname]), clsname)
+        func = cls.__dict__[funcname]
+        if isinstance(func, classmethod):
+            func = classmethod(wrap(phase, func.__get__(None, cls).im_func))
+        else:
+            func = wrap(phase, func)
+        setattr(cls, funcname, func)
+
+    # the notifiers override run(), so wrap them as they're selected
+    from svnmailer.notifier import selector
+    select = selector.Selector.selectNotifiers
+    def selectNotifiers(self, groupset):
+        """ Wraps the run methods of the selected notifiers """
+        notifiers = select(self, groupset)
+        for notifier in notifiers:
+            notifier.run = wrap("notify:%s" % notifier.__class__.__name__,
+                notifier.run
+            )
+        return notifiers
+    selector.Selector.selectNotifiers = selectNotifiers
+
+    from svnmailer import main
+
+    sys.argv[1:] = args
+    start = time.time()
+    main.Main.fromCommandline(background = False).run()
+    wall = time.time() - start
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != 'darwin':
+        rss *= 1024
+
+    fp = file(resultfile, "w")
+    try:
+        print >> fp, "wall\t%f" % wall
+        print >> fp, "rss\t%d" % rss
+        for phase, spent in times.items():
+            print >> fp, "phase:%s\t%f" % (phase, spent)
+    finally:
+        fp.close()
+
+
+class Runner(object):
+    """ Runs the benchmarks
+
+        :ivar _workdir: The work directory
+        :type _workdir: ``str``
+
+        :ivar _lib: The library directory
+        :type _lib: ``str``
+
+        :ivar _options: Additional config options
+        :type _options: ``list``
+
+        :ivar _repeat: The number of runs per benchmark
+        :type _repeat: ``int``
+    """
+
+    def __init__(self, workdir, lib, options, repeat):
+        """ Initialization
+
+            :Parameters:
+             - `workdir`: The work directory
+             - `lib`: The library directory
+             - `options`: Additional config options
+             - `repeat`: The number of runs per benchmark
+
+            :Types:
+             - `workdir`: ``str``
+             - `lib`: ``str``
+             - `options`: ``list``
+             - `repeat`: ``int``
+        """
+        self._workdir = workdir
+        self._lib = lib
+        self._options = options
+        self._repeat = repeat
+
+
+    def prepare(self, scenario, scale, rebuild = False):
+        """ Creates the repository of a scenario (if necessary)
+
+            :Parameters:
+             - `scenario`: The scenario name
+             - `scale`: The scale factor
+             - `rebuild`: Recreate an existing repository?
+
+            :Types:
+             - `scenario`: ``str``
+             - `scale`: ``float``
+             - `rebuild`: ``bool``
+
+            :return: The repository path and revision
+            :rtype: ``tuple``
+        """
+        import shutil, time
+
+        path = os.path.join(self._workdir, "%s-%s" % (scenario, scale))
+        marker = os.path.join(path, "benchmark-revision")
+        if os.path.exists(path):
+            if not rebuild and os.path.exists(marker):
+                return path, int(file(marker).read())
+            shutil.rmtree(path)
+
+        start = time.time()
+        revision = Generator(scale).build(scenario, path)
+        file(marker, "w").write("%d\n" % revision)
+        print >> sys.stderr, "created %s (r%d) in %.1fs" % (
+            path, revision, time.time() - start
+        )
+
+        return path, revision
+
+
+    def run(self, scenario, repos, revision, mode, standins):
+        """ Runs a benchmark
+
+            :Parameters:
+             - `scenario`: The scenario name
+             - `repos`: The repository path
+             - `revision`: The revision to notify about
+             - `mode`: The delivery mode
+             - `standins`: The server stand-ins
+
+            :Types:
+             - `scenario`: ``str``
+             - `repos`: ``str``
+             - `revision`: ``int``
+             - `mode`: ``str``
+             - `standins`: `StandIns`
+
+            :return: The results (``{metric: value}``)
+            :rtype: ``dict``
+
+            :exception Error: The run failed
+        """
+        import subprocess, time
+
+        config = os.path.join(self._workdir, "%s-%s.conf" % (scenario, mode))
+        file(config, "w").write(
+            getConfig(mode, scenario, standins.ports, self._options)
+        )
+        resultfile = os.path.join(self._workdir, "result")
+        args = [
+            sys.executable, os.path.abspath(__file__), "--child", resultfile,
+            "--commit", "--repository", repos, "--revision", str(revision),
+            "--config", config,
+        ]
+        if mode == 'debug':
+            args.append("--debug")
+
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [
+            self._lib, env.get('PYTHONPATH')
+        ]))
+
+        best = None
+        devnull = file(os.devnull, "w")
+        try:
+            for _ in xrange(self._repeat):
+                standins.reset()
+                start = time.time()
+                if subprocess.call(args, env = env, stdout = devnull):
+                    raise Error("%s/%s failed" % (scenario, mode))
+                results = {'process': time.time() - start}
+                messages, size = standins.getStats()
+                if mode != 'debug':
+                    results['messages'], results['bytes'] = messages, size
+
+                for line in file(resultfile):
+                    name, value = line.rstrip("\n").split("\t")
+                    results[name] = float(value)
+                os.unlink(resultfile)
+
+                if best is None or results['wall'] < best['wall']:
+                    best = results
+        finally:
+            devnull.close()
+
+        return best
+
+
+def loadBaseline(name):
+    """ Loads a stored baseline
+
+        :param name: The file name
+        :type name: ``str``
+
+        :return: The results (``{(scenario, mode): {metric: value}}``)
+        :rtype: ``dict``
+    """
+    baseline = {}
+    for line in file(name):
+        line = line.rstrip("\n")
+        if not line or line.startswith("#"):
+            continue
+        scenario, mode, metric, value = line.split("\t")
+        baseline.setdefault((scenario, mode), {})[metric] = float(value)
+
+    return baseline
+
+
+def saveBaseline(name, results, scale):
+    """ Stores the results as baseline
+
+        :Parameters:
+         - `name`: The file name
+         - `results`: The results (``{(scenario, mode): {metric: value}}``)
+         - `scale`: The scale factor
+
+        :Types:
+         - `name`: ``str``
+         - `results`: ``dict``
+         - `scale`: ``float``
+    """
+    fp = file(name, "w")
+    try:
+        print >> fp, "# svnmailer benchmark baseline (scale %s)" % scale
+        for (scenario, mode), metrics in sorted(results.items()):
+            for metric, value in sorted(metrics.items()):
+                print >> fp, "%s\t%s\t%s\t%r" % (scenario, mode, metric, value)
+    finally:
+        fp.close()
+
+
+def report(results, baseline = None, fp = sys.stdout):
+    """ Prints the results
+
+        :Parameters:
+         - `results`: The results (``{(scenario, mode): {metric: value}}``)
+         - `baseline`: The baseline to compare to
+         - `fp`: The stream to write to
+
+        :Types:
+         - `results`: ``dict``
+         - `baseline`: ``dict``
+         - `fp`: ``file``
+    """
+    def fmt(metric, value):
+        """ Formats a metric value """
+        if metric == 'rss':
+            return "%.1f MB" % (value / 1048576.0)
+        elif metric in ('messages', 'bytes'):
+            return "%d" % value
+        return "%.3f s" % value
+
+    def order(metric):
+        """ Sort key of the metrics """
+        main = ('wall', 'process', 'rss', 'messages', 'bytes')
+        if metric in main:
+            return (0, list(main).index(metric))
+        return (1, metric)
+
+    for key in sorted(results):
+        metrics = results[key]
+        base = (baseline or {}).get(key, {})
+        print >> fp, "%s/%s" % key
+        for metric in sorted(metrics, key = order):
+            value = metrics[metric]
+            line = "  %-24s %14s" % (metric, fmt(metric, value))
+            if metric in base:
+                line += "  (baseline %s" % fmt(metric, base[metric])
+                if base[metric]:
+                    line += ", %+.1f%%" % (
+                        (value - base[metric]) * 100.0 / base[metric]
+                    )
+                line += ")"
+            print >> fp, line
+        print >> fp
+
+
+def main(argv):
+    """ Command line entry point
+
+        :param argv: The arguments
+        :type argv: ``list``
+
+        :return: The exit code
+        :rtype: ``int``
+    """
+    import getopt
+
+    if argv[:1] == ["--child"]:
+        runChild(argv[1:])
+        return 0
+
+    basedir = os.path.dirname(os.path.abspath(__file__))
+    workdir = os.path.join(basedir, "bench-work")
+    lib = os.path.normpath(os.path.join(basedir, "..", "src", "lib"))
+    scale, modes, repeat, options = 1.0, list(MODES), 1, []
+    baseline = savename = None
+    rebuild = False
+
+    try:
+        opts, scenarios = getopt.getopt(argv, "w:s:m:n:o:l:b:h", [
+            "workdir=", "scale=", "modes=", "repeat=", "option=", "lib=",
+            "baseline=", "save-baseline=", "rebuild", "help",
+        ])
+        for opt, value in opts:
+            if opt in ("-w", "--workdir"):
+                workdir = value
+            elif opt in ("-s", "--scale"):
+                scale = float(value)
+            elif opt in ("-m", "--modes"):
+                modes = [mode for mode in value.split(",") if mode]
+            elif opt in ("-n", "--repeat"):
+                repeat = max(1, int(value))
+            elif opt in ("-o", "--option"):
+                name, value = value.split("=", 1)
+                section, name = name.strip().split(".", 1)
+                options.append((section, name, value.strip()))
+            elif opt in ("-l", "--lib"):
+                lib = os.path.abspath(value)
+            elif opt in ("-b", "--baseline"):
+                baseline = loadBaseline(value)
+            elif opt == "--save-baseline":
+                savename = value
+            elif opt == "--rebuild":
+                rebuild = True
+            elif opt in ("-h", "--help"):
+                print __doc__.strip()
+                return 0
+        for name in scenarios:
+            if name not in SCENARIOS:
+                raise ValueError("unknown scenario %r" % name)
+        for name in modes:
+            if name not in MODES:
+                raise ValueError("unknown mode %r" % name)
+    except (getopt.GetoptError, ValueError), exc:
+        print >> sys.stderr, "%s\n\n%s" % (exc, __doc__.strip())
+        return 2
+
+    if not os.path.isdir(workdir):
+        os.makedirs(workdir)
+
+    runner = Runner(workdir, lib, options, repeat)
+    results = {}
+    standins = StandIns(modes)
+    try:
+        for scenario in scenarios or SCENARIOS:
+            repos, revision = runner.prepare(scenario, scale, rebuild)
+            for mode in modes:
+                results[(scenario, mode)] = runner.run(
+                    scenario, repos, revision, mode, standins
+                )
+                report({(scenario, mode): results[(scenario, mode)]},
+                    baseline
+                )
+    finally:
+        standins.close()
+
+    if savename:
+        saveBaseline(savename, results, scale)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+usage: config_benchmark.py [options]
+
+Measures the config file loading with a synthetic config.
+
+The config consists of a main file and two included files (one with the
+groups, one with an author mapping section) and has the requested number
+of lines (including comments, blank lines and continuation lines). Two
+timings are reported, both the fastest of all repetitions:
+
+  parse      parsing the files with the FileParser (main and includes)
+  load       loading the complete settings (parse, maps, groups)
+
+options:
+  -n N, --lines=N          The number of config lines (default: 10000)
+  -r N, --repeat=N         Repeat every measurement N times (default: 5)
+  -w DIR, --workdir=DIR    The directory for the config files (default: a
+                           temporary directory, removed afterwards)
+  -l DIR, --lib=DIR        The library directory to benchmark (default:
+                           ../src/lib relative to this script)
+"""
+__docformat__ = "restructuredtext en"
+
+import os, sys, time
+
+
+def writeConfig(workdir, lines):
+    """ Writes the config files
+
+        :Parameters:
+         - `workdir`: The directory to write to
+         - `lines`: The approximate number of lines
+
+        :Types:
+         - `workdir`: ``str``
+         - `lines`: ``int``
+
+        :return: The names of the files (main file first)
+        :rtype: ``list``
+    """
+    names = [os.path.join(workdir, name)
+        for name in ('main.conf', 'groups.conf', 'authors.conf')
+    ]
+    groups, authors = lines * 3 / 40, lines / 4
+
+    fp = file(names[0], 'w')
+    try:
+        fp.write("# synthetic benchmark config\n"
+            "config_charset = utf-8\n"
+            "include_config = groups.conf authors.conf\n\n"
+            "[general]\n"
+            "sendmail_command = /usr/sbin/sendmail -t\n\n"
+            "[maps]\n"
+            "from_addr = [authors]\n\n"
+            "[defaults]\n"
+            "from_addr = %(author)s\n"
+            "generate_diffs = add copy modify\n"
+            "commit_subject_prefix = [%(group)s]\n\n"
+        )
+    finally:
+        fp.close()
+
+    fp = file(names[1], 'w')
+    try:
+        for idx in xrange(groups):
+            fp.write("; group %(idx)d\n"
+                "[group%(idx)d]\n"
+                "for_paths = project%(idx)d/(?P<branch>trunk|branches/"
+                "[^/]+)/.*\n"
+                "exclude_paths = project%(idx)d/.*/generated/.*\n"
+                "to_addr = commits-%(idx)d@example.com\n"
+                "    dev-%(idx)d@example.com\n"
+                "    %%(author)s\n"
+                "commit_subject_prefix = [p%(idx)d:%%(branch)s]\n"
+                "max_subject_length = 200\n\n" % {'idx': idx}
+            )
+    finally:
+        fp.close()
+
+    fp = file(names[2], 'w')
+    try:
+        fp.write("[authors]\n")
+        for idx in xrange(authors):
+            fp.write("user%d = User %d <user%d@example.com>\n" %
+                (idx, idx, idx)
+            )
+    finally:
+        fp.close()
+
+    return names
+
+
+def countLines(names):
+    """ Returns the number of lines of the files
+
+        :param names: The file names
+        :type names: ``list``
+
+        :return: The number of lines
+        :rtype: ``int``
+    """
+    result = 0
+    for name in names:
+        fp = file(name)
+        try:
+            result += len(fp.readlines())
+        finally:
+            fp.close()
+
+    return result
+
+
+def timeParse(names, repeat):
+    """ Measures the FileParser
+
+        :Parameters:
+         - `names`: The config files
+         - `repeat`: The number of repetitions
+
+        :Types:
+         - `names`: ``list``
+         - `repeat`: ``int``
+
+        :return: The fastest time
+        :rtype: ``float``
+    """
+    from svnmailer.settings import _fileparser
+
+    best = None
+    for _ in xrange(repeat):
+        start = time.time()
+        parser = _fileparser.FileParser()
+        for name in names:
+            fp = file(name)
+            try:
+                parser.slurp(fp, name)
+            finally:
+                fp.close()
+        spent = time.time() - start
+        if best is None or spent < best:
+            best = spent
+
+    return best
+
+
+def timeLoad(name, repeat):
+    """ Measures the complete settings loading
+
+        :Parameters:
+         - `name`: The main config file
+         - `repeat`: The number of repetitions
+
+        :Types:
+         - `name`: ``str``
+         - `repeat`: ``int``
+
+        :return: The fastest time and the number of groups
+        :rtype: ``tuple``
+    """
+    from svnmailer import settings
+
+    class Options(object):
+        """ Runtime options stand-in """
+        def __init__(self):
+            """ Initialization """
+            self.config = name
+            self.mode = settings.MODES.commit
+            self.path_encoding = self.debug = None
+            self.repository = self.revision = self.author = None
+            self.propname = self.action = None
+
+    best, groups = None, 0
+    for _ in xrange(repeat):
+        start = time.time()
+        loaded = settings.Manager().loadSettings(Options())
+        spent = time.time() - start
+        groups = len(loaded.groups)
+        if best is None or spent < best:
+            best = spent
+
+    return best, groups
+
+
+def main(argv):
+    """ Command line entry point
+
+        :param argv: The arguments
+        :type argv: ``list``
+
+        :return: The exit code
+        :rtype: ``int``
+    """
+    import getopt, shutil, tempfile
+
+    basedir = os.path.dirname(os.path.abspath(__file__))
+    lib = os.path.normpath(os.path.join(basedir, "..", "src", "lib"))
+    lines, repeat, workdir = 10000, 5, None
+
+    try:
+        opts, args = getopt.getopt(argv, "n:r:w:l:h", [
+            "lines=", "repeat=", "workdir=", "lib=", "help",
+        ])
+        for opt, value in opts:
+            if opt in ("-n", "--lines"):
+                lines = max(100, int(value))
+            elif opt in ("-r", "--repeat"):
+                repeat = max(1, int(value))
+            elif opt in ("-w", "--workdir"):
+                workdir = value
+            elif opt in ("-l", "--lib"):
+                lib = os.path.abspath(value)
+            elif opt in ("-h", "--help"):
+                print __doc__.strip()
+                return 0
+        if args:
+            raise ValueError("unexpected arguments %r" % (args,))
+    except (getopt.GetoptError, ValueError), exc:
+        print >> sys.stderr, "%s\n\n%s" % (exc, __doc__.strip())
+        return 2
+
+    sys.path.insert(0, lib)
+
+    tempdir = None
+    if workdir is None:
+        workdir = tempdir = tempfile.mkdtemp()
+    elif not os.path.isdir(workdir):
+        os.makedirs(workdir)
+
+    try:
+        names = writeConfig(workdir, lines)
+        count = countLines(names)
+        parse = timeParse(names, repeat)
+        load, groups = timeLoad(names[0], repeat)
+    finally:
+        if tempdir is not None:
+            shutil.rmtree(tempdir, True)
+
+    print "library  %s" % lib
+    print "config   %d lines, %d groups" % (count, groups)
+    print "  %-8s %10.3f s" % ('parse', parse)
+    print "  %-8s %10.3f s" % ('load', load)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))